@@ -15,16 +15,23 @@ class ArtMode:
         self.label.place(relx=0.5, rely=0.5, anchor="center")
 
         self.current_image_path = None
+        # ETag of the last /latest response; an unchanged gallery answers 304 (no body)
+        self._dream_etag = None
+        self._latest_dream_url = None
 
     def _fetch_latest_dream(self):
         try:
-            url = f"{BASE_URL}/dreams/{PLANT_ID}"
-            r = requests.get(url, timeout=8)
-            if r.status_code != 200 or not r.json():
+            url = f"{BASE_URL}/dreams/{PLANT_ID}/latest"
+            headers = {"If-None-Match": self._dream_etag} if self._dream_etag else {}
+            r = requests.get(url, headers=headers, timeout=8)
+            if r.status_code == 304:
+                return self._latest_dream_url
+            if r.status_code != 200:
                 return None
 
-            latest = sorted(r.json(), key=lambda x: x["created_at"], reverse=True)[0]
-            return latest["file_path"]
+            self._dream_etag = r.headers.get("ETag")
+            self._latest_dream_url = r.json()["file_path"]
+            return self._latest_dream_url
         except Exception as e:
             print(f"Failed to obtain: {e}")
             return None
@@ -1,8 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
+from database import run_migrations
 import models
-from routers import sensor, image, analysis, report, admin, plants, dream, metrics, alerts, scheduler, images
+from routers import sensor, image, analysis, report, admin, plants, dream, metrics, alerts, scheduler, images, export
 from services.scheduler import start_scheduler, shutdown_scheduler
 
 app = FastAPI()
@@ -19,9 +19,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Before-Id"],
 )
 
-Base.metadata.create_all(bind=engine)
+@app.on_event("startup")
+def _migrate_schema():
+    run_migrations()
 
 
 @app.on_event("startup")
@@ -44,6 +47,7 @@ app.include_router(metrics.router)
 app.include_router(alerts.router)
 app.include_router(scheduler.router)
 app.include_router(images.router)
+app.include_router(export.router)
 
 
 @app.get("/")
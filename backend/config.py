@@ -15,3 +15,52 @@ if not raw_db_url:
 if raw_db_url.startswith("postgres://"):
     raw_db_url = raw_db_url.replace("postgres://", "postgresql+psycopg2://", 1)
 DB_URL = raw_db_url
+
+
+def _async_url(url: str) -> str:
+    # asyncpg takes `ssl` instead of `sslmode`
+    return "postgresql+asyncpg://" + url.split("://", 1)[1].replace("sslmode=", "ssl=")
+
+
+# Async engine (asyncpg) for the request path; the scheduler keeps the sync engine.
+# Derived from DB_URL unless ASYNC_DB_URL is set.
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL") or _async_url(DB_URL)
+
+# Optional read replica for the read-only analytics endpoints. Reads fall back to the
+# primary while the replica lags more than DB_REPLICA_MAX_LAG_SECONDS (or is down).
+DB_REPLICA_URL = os.getenv("DB_REPLICA_URL") or None
+if DB_REPLICA_URL and DB_REPLICA_URL.startswith("postgres://"):
+    DB_REPLICA_URL = DB_REPLICA_URL.replace("postgres://", "postgresql+psycopg2://", 1)
+ASYNC_DB_REPLICA_URL = os.getenv("ASYNC_DB_REPLICA_URL") or (_async_url(DB_REPLICA_URL) if DB_REPLICA_URL else None)
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "30"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5"))  # lag probe cache
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Connection pool, per engine (sync + async each get one). Supabase's transaction-mode
+# pooler (port 6543) can't keep server-side prepared statements across transactions:
+# set DB_PGBOUNCER=1 there to disable them.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; -1 disables
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)
+
+# Response cache for the polled per-plant read endpoints (services/response_cache.py).
+# In-process LRU by default; set RESPONSE_CACHE_REDIS_URL to share it across workers.
+RESPONSE_CACHE_ENABLED = _env_bool("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "120"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL") or None
+
+# Scheduler LLM / dream jobs: plants processed in parallel, each in its own session.
+# Every worker holds a sync-engine connection while it touches the database, so keep
+# this within DB_POOL_SIZE + DB_MAX_OVERFLOW (minus headroom for the other jobs).
+SCHEDULER_PLANT_CONCURRENCY = max(1, int(os.getenv("SCHEDULER_PLANT_CONCURRENCY", "4")))
@@ -1,18 +1,316 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from config import DB_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config import (
+    ASYNC_DB_REPLICA_URL,
+    ASYNC_DB_URL,
+    DB_MAX_OVERFLOW,
+    DB_PGBOUNCER,
+    DB_REPLICA_LAG_CHECK_SECONDS,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    DB_REPLICA_URL,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_URL,
+)
+
+
+class PoolTelemetry:
+    """Checkout counters and recent wait times for one pool (read by /admin/db-pool)."""
+
+    WINDOW = 1000  # recent checkouts kept for percentiles
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=self.WINDOW)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.overflow_peak = 0
+        self.last_timeout_at = None
+
+    def record(self, waited: float, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+            self._waits.append(waited)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.last_timeout_at = datetime.utcnow()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+
+            def pct(q):
+                return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 2) if waits else None
+
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "last_timeout_at": self.last_timeout_at.isoformat() if self.last_timeout_at else None,
+                "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else None,
+                "wait_ms_p50": pct(0.50),
+                "wait_ms_p95": pct(0.95),
+                "wait_ms_max": round(self.wait_max * 1000, 2),
+                "overflow_peak": self.overflow_peak,
+            }
+
+
+class _TimedPoolMixin:
+    # Times every checkout (queue wait + connect + pre-ping), i.e. what a request waits for.
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.telemetry = PoolTelemetry()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record_timeout()
+            raise
+        self.telemetry.record(time.perf_counter() - started, self.overflow())
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the counters
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
 
 connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
+async_connect_args = {}
+if DB_PGBOUNCER:
+    # Transaction-mode pgbouncer hands each transaction a different server connection,
+    # so named prepared statements must not outlive a transaction. psycopg2 never
+    # prepares; psycopg 3 and asyncpg do unless told otherwise.
+    if DB_URL.startswith("postgresql+psycopg://"):
+        connect_args["prepare_threshold"] = None
+    async_connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
 
-engine = create_engine(DB_URL, echo=False, connect_args=connect_args)
+engine = create_engine(DB_URL, echo=False, connect_args=connect_args, poolclass=TimedQueuePool, **POOL_SETTINGS)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Request path (sensor/metrics/plants/dream routers). Sync service code runs on it
+# via AsyncSession.run_sync, so one implementation serves both engines.
+async_engine = create_async_engine(
+    ASYNC_DB_URL,
+    echo=False,
+    connect_args=async_connect_args,
+    poolclass=TimedAsyncQueuePool,
+    **POOL_SETTINGS,
+)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read replica (read-only analytics endpoints via get_read_db / get_async_read_db).
+replica_engine = async_replica_engine = None
+ReplicaSessionLocal = AsyncReplicaSessionLocal = None
+if DB_REPLICA_URL:
+    replica_engine = create_engine(
+        DB_REPLICA_URL, echo=False, connect_args=connect_args, poolclass=TimedQueuePool, **POOL_SETTINGS
+    )
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+    async_replica_engine = create_async_engine(
+        ASYNC_DB_REPLICA_URL,
+        echo=False,
+        connect_args=async_connect_args,
+        poolclass=TimedAsyncQueuePool,
+        **POOL_SETTINGS,
+    )
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+
+# Replay lag in seconds; 0 when the replica has applied everything it received while
+# its WAL receiver is streaming (an idle primary would otherwise look like growing lag).
+# A disconnected/stalled receiver also ends with receive = replay, so without streaming
+# the lag is the age of the last replayed transaction (NULL before any: primary fallback).
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0.0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0.0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReplicaMonitor:
+    """
+    Cached replica lag probe. Reads use the replica only while its lag is known and
+    within DB_REPLICA_MAX_LAG_SECONDS; the probe runs at most every DB_REPLICA_LAG_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self._checked_mono = None
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def _due(self) -> bool:
+        return self._checked_mono is None or time.monotonic() - self._checked_mono >= DB_REPLICA_LAG_CHECK_SECONDS
+
+    def _store(self, lag, error) -> None:
+        with self._lock:
+            self.lag = None if lag is None else float(lag)
+            self.error = error
+            self.checked_at = datetime.utcnow()
+            self._checked_mono = time.monotonic()
+
+    def _route(self) -> bool:
+        ok = self.error is None and self.lag is not None and self.lag <= DB_REPLICA_MAX_LAG_SECONDS
+        with self._lock:
+            if ok:
+                self.replica_reads += 1
+            else:
+                self.primary_fallbacks += 1
+        return ok
+
+    def use_replica(self) -> bool:
+        if replica_engine is None:
+            return False
+        if self._due():
+            try:
+                with replica_engine.connect() as conn:
+                    self._store(conn.execute(_REPLICA_LAG_SQL).scalar(), None)
+            except Exception as e:  # replica down: serve from the primary
+                self._store(None, str(e))
+        return self._route()
+
+    async def use_replica_async(self) -> bool:
+        if async_replica_engine is None:
+            return False
+        if self._due():
+            try:
+                async with async_replica_engine.connect() as conn:
+                    self._store((await conn.execute(_REPLICA_LAG_SQL)).scalar(), None)
+            except Exception as e:  # replica down: serve from the primary
+                self._store(None, str(e))
+        return self._route()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "configured": replica_engine is not None,
+                "lag_seconds": self.lag,
+                "max_lag_seconds": DB_REPLICA_MAX_LAG_SECONDS,
+                "error": self.error,
+                "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+                "replica_reads": self.replica_reads,
+                "primary_fallbacks": self.primary_fallbacks,
+            }
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def pool_status(eng) -> dict:
+    """Live pool occupancy plus checkout telemetry for an Engine or AsyncEngine."""
+    pool = eng.pool
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": DB_MAX_OVERFLOW,
+    }
+    telemetry = getattr(pool, "telemetry", None)
+    if telemetry is not None:
+        status.update(telemetry.snapshot())
+    return status
+
+
 Base = declarative_base()
 
+MIGRATIONS_LOCK_KEY = 727_001  # pg advisory lock id; serializes startup upgrades across workers
+
+
+def run_migrations() -> None:
+    """
+    Upgrade the schema to the latest Alembic revision (backend/migrations).
+    Replaces Base.metadata.create_all at import time.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    here = Path(__file__).resolve().parent
+    cfg = Config(str(here / "alembic.ini"))
+    cfg.set_main_option("script_location", str(here / "migrations"))
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, "head")
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """Session for read-only endpoints: the replica when configured and caught up, else the primary."""
+    db = ReplicaSessionLocal() if replica_monitor.use_replica() else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def async_read_sessionmaker():
+    """Async session factory for reads: the replica's while it is healthy, else the primary's."""
+    return AsyncReplicaSessionLocal if await replica_monitor.use_replica_async() else AsyncSessionLocal
+
+
+async def get_async_read_db():
+    async with (await async_read_sessionmaker())() as db:
+        yield db
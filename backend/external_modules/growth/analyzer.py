@@ -1,16 +1,20 @@
-from collections import defaultdict
-from datetime import datetime, timedelta, date
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from models import SensorRecord, WeightRecord
+from models import SensorRecord
+from external_modules.growth import features as daily_features
+from external_modules.growth import kernels
 
 # Thresholds for growth rate classification (grams per day)
 MIN_NORMAL_GROWTH = 0.2   # >= this: normal
 MIN_SLOW_GROWTH = 0.05    # 0 < rate < MIN_SLOW_GROWTH -> slow
 GROWTH_RATE_WINDOW_DAYS = 5  # use last N days to compute growth_rate_3d
+SENSOR_SUMMARY_DAYS = 7  # calendar days (today included) behind sensor_7d
+ANALYSIS_WINDOW_DAYS = max(GROWTH_RATE_WINDOW_DAYS, SENSOR_SUMMARY_DAYS)  # feature days analyze_growth reads
 
 # Temperature range (°C) considered acceptable
 TEMP_OPT_LOW = 18.0
@@ -33,9 +37,13 @@ FERT_WEIGHT_JUMP_MIN = 10.0      # grams; adjust based on real data
 FERT_MOISTURE_DELTA_MAX = 0.05   # |Δsoil_moisture| <= this => moisture considered "unchanged"
 
 
-def analyze_growth(plant_id: int, db: Session) -> Dict:
+def analyze_growth(plant_id: int, db: Session, feature_rows: Optional[List[Dict]] = None) -> Dict:
     """
     Main entry point used by services and schedulers.
+    Reads the plant's daily feature rows (stored closed days from
+    plant_daily_features, the rest computed in memory; or the rows the caller
+    passes, covering ANALYSIS_WINDOW_DAYS) plus one raw 24h sensor average.
+    Read-only.
 
     Returns:
     {
@@ -45,20 +53,50 @@ def analyze_growth(plant_id: int, db: Session) -> Dict:
       "debug": {...}
     }
     """
-    ref_points, fertilizer_events = _compute_daily_reference_points(plant_id, db, days=GROWTH_RATE_WINDOW_DAYS)
-    growth_rate_3d, delta_weight_1d = _compute_growth_rates(ref_points)
-
+    now = datetime.utcnow()
+    if feature_rows is None:
+        feature_rows = daily_features.load(
+            db, [plant_id], now.date() - timedelta(days=ANALYSIS_WINDOW_DAYS), now=now
+        )[plant_id]
     sensor_24h = _compute_sensor_average(plant_id, db, hours=24)
-    sensor_7d = _compute_sensor_average(plant_id, db, days=7)
+    return analyze_features(feature_rows, sensor_24h, now.date())
 
-    stress_factors = _infer_stress_factors(sensor_24h)
-    day_count = len(ref_points)
-    short_term_mode = day_count < 3
 
-    if short_term_mode:
-        growth_status = _classify_short_term_status(delta_weight_1d, stress_factors)
-    else:
-        growth_status = _classify_growth_status(growth_rate_3d, stress_factors)
+def analyze_growth_many(db: Session, plant_ids: Iterable[int]) -> Dict[int, Dict]:
+    """
+    analyze_growth for a whole fleet with a fixed number of queries: the feature
+    rows of all plants in one load (which also stores their newly closed days) and
+    the 24h sensor averages in one GROUP BY. Statuses are classified for all plants
+    at once. Caller commits.
+    """
+    now = datetime.utcnow()
+    plant_ids = sorted(set(plant_ids))
+    if not plant_ids:
+        return {}
+    feature_rows = daily_features.load(
+        db, plant_ids, now.date() - timedelta(days=ANALYSIS_WINDOW_DAYS), now=now, persist=True
+    )
+    sensor_24h = _sensor_averages(db, plant_ids, now - timedelta(hours=24))
+    results = _classify([_analysis_inputs(feature_rows[pid], sensor_24h[pid], now.date()) for pid in plant_ids])
+    return dict(zip(plant_ids, results))
+
+
+def analyze_features(feature_rows: List[Dict], sensor_24h: Dict[str, Optional[float]], today: date) -> Dict:
+    """analyze_growth on already loaded inputs (no queries)."""
+    return _classify([_analysis_inputs(feature_rows, sensor_24h, today)])[0]
+
+
+def _analysis_inputs(feature_rows: List[Dict], sensor_24h: Dict[str, Optional[float]], today: date) -> Dict:
+    """Everything of the analyze_growth result except growth_status."""
+    ref_points, fertilizer_events = _reference_points(
+        [r for r in feature_rows if r["day"] >= today - timedelta(days=GROWTH_RATE_WINDOW_DAYS)]
+    )
+    growth_rate_3d, delta_weight_1d = _compute_growth_rates(ref_points)
+    sensor_7d = daily_features.day_sensor_average(
+        r for r in feature_rows if r["day"] >= today - timedelta(days=SENSOR_SUMMARY_DAYS - 1)
+    )
+
+    stress_factors = _infer_stress_factors(sensor_24h)
 
     debug_ref_points: List[Dict] = []
     for p in ref_points:
@@ -91,13 +129,28 @@ def analyze_growth(plant_id: int, db: Session) -> Dict:
     }
 
     return {
-        "growth_status": growth_status,
         "growth_rate_3d": growth_rate_3d,
         "stress_factors": stress_factors,
         "debug": debug_info,
     }
 
 
+def _classify(analyses: List[Dict]) -> List[Dict]:
+    """
+    Add growth_status to _analysis_inputs() results, all in one kernel call.
+    Fewer than 3 reference days -> short-term mode (1-day weight delta).
+    """
+    statuses = kernels.growth_status(
+        kernels.as_float_array([a["growth_rate_3d"] for a in analyses]),
+        kernels.as_float_array([a["debug"]["delta_weight_1d"] for a in analyses]),
+        np.array([len(a["debug"]["ref_points"]) < 3 for a in analyses], dtype=bool),
+        np.array([bool(a["stress_factors"]) for a in analyses], dtype=bool),
+        MIN_SLOW_GROWTH,
+        MIN_NORMAL_GROWTH,
+    )
+    return [{"growth_status": str(status), **a} for status, a in zip(statuses, analyses)]
+
+
 # ------------------------------------------------------------------
 # 1) Daily reference weights with fertilizer filtering
 # ------------------------------------------------------------------
@@ -105,113 +158,37 @@ def _compute_daily_reference_points(
     plant_id: int,
     db: Session,
     days: int = 7,
+    feature_rows: Optional[List[Dict]] = None,
 ) -> Tuple[List[Dict], List[Dict]]:
-    since = datetime.utcnow() - timedelta(days=days)
-
-    rows = (
-        db.query(
-            WeightRecord.timestamp,
-            WeightRecord.weight,
-            SensorRecord.soil_moisture,
-        )
-        .outerjoin(
-            SensorRecord,
-            (SensorRecord.plant_id == WeightRecord.plant_id)
-            & (SensorRecord.timestamp == WeightRecord.timestamp),
-        )
-        .filter(
-            WeightRecord.plant_id == plant_id,
-            WeightRecord.timestamp >= since,
-        )
-        .order_by(WeightRecord.timestamp.asc())
-        .all()
-    )
+    """Reference points for the calendar days from `days` days ago through today."""
+    since = datetime.utcnow().date() - timedelta(days=days)
+    if feature_rows is None:
+        feature_rows = daily_features.load(db, [plant_id], since)[plant_id]
+    return _reference_points([r for r in feature_rows if r["day"] >= since])
 
-    if not rows:
-        return [], []
-
-    fertilizer_offset = 0.0
-    corrected_samples: List[Tuple[datetime, float, Optional[float]]] = []
-    fertilizer_events: List[Dict] = []
-
-    prev_w: Optional[float] = None
-    prev_m_norm: Optional[float] = None
-
-    for ts, w, moist_raw in rows:
-        moist_norm = None
-        if moist_raw is not None:
-            moist_norm = max(0.0, min(1.0, moist_raw / SOIL_SCALE))
-
-        if w is None:
-            prev_w = w
-            prev_m_norm = moist_norm
-            continue
-
-        if prev_w is not None:
-            delta_w = w - prev_w
-            delta_m = 0.0
-            if prev_m_norm is not None and moist_norm is not None:
-                delta_m = moist_norm - prev_m_norm
-
-            if delta_w >= FERT_WEIGHT_JUMP_MIN and abs(delta_m) <= FERT_MOISTURE_DELTA_MAX:
-                fertilizer_offset += delta_w
-                fertilizer_events.append(
-                    {
-                        "timestamp": ts,
-                        "delta_weight": float(delta_w),
-                        "delta_moisture": float(delta_m),
-                    }
-                )
-
-        corrected_weight = w - fertilizer_offset
-        corrected_samples.append((ts, corrected_weight, moist_norm))
-
-        prev_w = w
-        prev_m_norm = moist_norm
-
-    day_candidates: Dict[date, List[Tuple[float, float]]] = defaultdict(list)
-    day_all_weights: Dict[date, List[float]] = defaultdict(list)
-
-    for ts, corrected_w, moist_norm in corrected_samples:
-        day_key = ts.date()
-        day_all_weights[day_key].append(corrected_w)
-        if moist_norm is not None and M_REF_LOW <= moist_norm <= M_REF_HIGH:
-            day_candidates[day_key].append((corrected_w, moist_norm))
-
-    ref_points: List[Dict] = []
-
-    for day_key in sorted(day_all_weights.keys()):
-        candidates = day_candidates.get(day_key, [])
-        fallback_used = False
-
-        if candidates:
-            total_w = 0.0
-            total_m = 0.0
-            for w, m in candidates:
-                total_w += w
-                total_m += m
-            avg_w = total_w / len(candidates)
-            avg_m = total_m / len(candidates)
-            num_candidates = len(candidates)
-        else:
-            fallback_used = True
-            weights = day_all_weights[day_key]
-            if not weights:
-                continue
-            avg_w = sum(weights) / len(weights)
-            avg_m = None
-            num_candidates = 0
-
-        ref_points.append(
-            {
-                "date": day_key,
-                "weight": avg_w,
-                "avg_soil_moisture": avg_m,
-                "num_candidates": num_candidates,
-                "fallback_used": fallback_used,
-            }
-        )
 
+def _reference_points(feature_rows: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Daily reference weights (fertilizer jumps of earlier days in the range
+    subtracted, see daily_features.chained_reference_weights) and the fertilizer
+    events of the given day rows.
+    """
+    ref_rows = [r for r in feature_rows if r["ref_weight"] is not None]
+    ref_points: List[Dict] = [
+        {
+            "date": r["day"],
+            "weight": weight,
+            "avg_soil_moisture": r["ref_avg_soil_moisture"],
+            "num_candidates": 0 if r["ref_fallback_used"] else r["ref_num_candidates"],
+            "fallback_used": r["ref_fallback_used"],
+        }
+        for r, weight in zip(ref_rows, daily_features.chained_reference_weights(ref_rows) if ref_rows else [])
+    ]
+    fertilizer_events: List[Dict] = [
+        {**ev, "timestamp": datetime.fromisoformat(ev["timestamp"])}
+        for r in feature_rows
+        for ev in r["fertilizer_events"] or []
+    ]
     return ref_points, fertilizer_events
 
 
@@ -222,19 +199,12 @@ def _compute_growth_rates(
         return None, None
 
     ref_points_sorted = sorted(ref_points, key=lambda p: p["date"])
-    last = ref_points_sorted[-1]
-    prev = ref_points_sorted[-2]
-    delta_weight_1d = last["weight"] - prev["weight"]
-
-    subset = ref_points_sorted[-3:] if len(ref_points_sorted) >= 3 else ref_points_sorted
-    first = subset[0]
-    last = subset[-1]
-
-    days_span = (last["date"] - first["date"]).days
-    if days_span < 1:
-        days_span = 1
+    days = kernels.day_ordinals([p["date"] for p in ref_points_sorted])
+    weights = np.array([p["weight"] for p in ref_points_sorted], dtype=np.float64)
 
-    growth_rate_3d = (last["weight"] - first["weight"]) / days_span
+    # Slope over the last (up to) 3 reference days, day span floored at 1
+    growth_rate_3d = float(kernels.rolling_slopes(days, weights, window=3)[-1])
+    delta_weight_1d = float(weights[-1] - weights[-2])
 
     return growth_rate_3d, delta_weight_1d
 
@@ -249,31 +219,39 @@ def _compute_sensor_average(
         hours = 24
 
     since = datetime.utcnow() - timedelta(days=days) if days is not None else datetime.utcnow() - timedelta(hours=hours)
+    return _sensor_averages(db, [plant_id], since)[plant_id]
 
-    agg = (
-        db.query(
+
+def _sensor_averages(db: Session, plant_ids: List[int], since: datetime) -> Dict[int, Dict[str, Optional[float]]]:
+    """Raw sensor means since `since` per plant (one GROUP BY); soil normalized 0-1."""
+    agg = {
+        row[0]: row[1:]
+        for row in db.query(
+            SensorRecord.plant_id,
             func.avg(SensorRecord.temperature),
             func.avg(SensorRecord.light),
             func.avg(SensorRecord.soil_moisture),
         )
         .filter(
-            SensorRecord.plant_id == plant_id,
+            SensorRecord.plant_id.in_(plant_ids),
             SensorRecord.timestamp >= since,
         )
-        .one()
-    )
-
-    soil_raw = agg[2]
-    soil_norm = None
-    if soil_raw is not None:
-        soil_norm = max(0.0, min(1.0, soil_raw / SOIL_SCALE))
-
-    return {
-        "avg_temperature": agg[0],
-        "avg_light": agg[1],
-        "avg_soil_moisture": soil_norm,
+        .group_by(SensorRecord.plant_id)
     }
 
+    averages: Dict[int, Dict[str, Optional[float]]] = {}
+    for plant_id in plant_ids:
+        temperature, light, soil_raw = agg.get(plant_id, (None, None, None))
+        soil_norm = None
+        if soil_raw is not None:
+            soil_norm = max(0.0, min(1.0, soil_raw / SOIL_SCALE))
+        averages[plant_id] = {
+            "avg_temperature": temperature,
+            "avg_light": light,
+            "avg_soil_moisture": soil_norm,
+        }
+    return averages
+
 
 def _infer_stress_factors(
     sensor_avg: Dict[str, Optional[float]],
@@ -297,45 +275,3 @@ def _infer_stress_factors(
         stress_factors.append("temp_out_of_range")
 
     return stress_factors
-
-
-def _classify_growth_status(
-    growth_rate_3d: Optional[float],
-    stress_factors: List[str],
-) -> str:
-    if growth_rate_3d is None:
-        return "stressed" if stress_factors else "normal"
-
-    if growth_rate_3d <= 0:
-        base_status = "stagnant"
-    elif growth_rate_3d < MIN_SLOW_GROWTH:
-        base_status = "slow"
-    elif growth_rate_3d < MIN_NORMAL_GROWTH:
-        base_status = "slow"
-    else:
-        base_status = "normal"
-
-    if stress_factors and growth_rate_3d <= MIN_SLOW_GROWTH:
-        return "stressed"
-
-    return base_status
-
-
-def _classify_short_term_status(
-    delta_weight_1d: Optional[float],
-    stress_factors: List[str],
-) -> str:
-    """
-    Demo-friendly short-term classification when data < 3 days.
-    - Uses 1-day weight delta and stress.
-    - Thresholds are slightly lenient to show state changes.
-    """
-    if delta_weight_1d is None:
-        return "stressed" if stress_factors else "normal"
-
-    if delta_weight_1d <= 0:
-        return "stressed" if stress_factors else "stagnant"
-    elif delta_weight_1d < 0.05:
-        return "stressed" if stress_factors else "slow"
-    else:
-        return "stressed" if stress_factors else "normal"
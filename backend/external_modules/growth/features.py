@@ -0,0 +1,290 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import Plant, PlantDailyFeatures
+from external_modules.growth import kernels
+from external_modules.growth.window import PlantWindow, day_ordinals_us, from_us
+
+LOOKBACK_DAYS = 7  # stored days read before the requested range (jump carry-over, growth slopes)
+SENSOR_METRICS = ("temperature", "light", "soil_moisture")
+UPSERT_CHUNK_ROWS = 1000  # x 25 columns stays under the 65535 bind-parameter limit
+
+_COLUMNS = [c.name for c in PlantDailyFeatures.__table__.columns]
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _bins(index: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    return np.bincount(index, weights=values, minlength=size)
+
+
+def _compute_days(
+    window: PlantWindow,
+    first: date,
+    today: date,
+    prior: List[Dict],
+) -> List[Dict]:
+    """
+    Feature rows for every day in [first, today] from the window's raw series.
+    `prior` are the stored rows before `first` (oldest first): the last sample
+    of the latest one with weights seeds jump detection across midnight, and
+    the last two reference days seed the rolling growth slope.
+    """
+    from external_modules.growth import analyzer
+
+    n_days = (today - first).days + 1
+    first_ord = first.toordinal()
+    day_list = [first + timedelta(days=i) for i in range(n_days)]
+
+    # -- weight series: fertilizer jumps, day-local corrected weights, reference means
+    w_us, w, soil = window.weight_since(_day_start(first))
+    keep = day_ordinals_us(w_us) - first_ord < n_days
+    w_us, w, soil = w_us[keep], w[keep], soil[keep]
+    idx = day_ordinals_us(w_us) - first_ord
+
+    carry = next((r for r in reversed(prior) if r["last_weight"] is not None), None)
+    skip = 0
+    if carry is not None:
+        carry_soil = np.nan if carry["last_soil_moisture"] is None else carry["last_soil_moisture"]
+        w_all, soil_all, skip = np.r_[carry["last_weight"], w], np.r_[carry_soil, soil], 1
+    else:
+        w_all, soil_all = w, soil
+    m_all = kernels.soil_norm(soil_all)
+    _, events, delta_w, delta_m = kernels.fertilizer_offsets(
+        w_all, m_all, analyzer.FERT_WEIGHT_JUMP_MIN, analyzer.FERT_MOISTURE_DELTA_MAX
+    )
+    jumps = np.where(events, delta_w, 0.0)[skip:]
+    events, delta_w, delta_m, m_norm = events[skip:], delta_w[skip:], delta_m[skip:], m_all[skip:]
+    offsets = np.cumsum(jumps)
+
+    # Offsets restart at each day's first sample (a jump at that sample still counts)
+    day_first = np.searchsorted(idx, np.arange(n_days), side="left")
+    day_last = np.searchsorted(idx, np.arange(n_days), side="right") - 1
+    base = np.r_[0.0, offsets][day_first]
+    corrected = w - (offsets - base[idx])
+
+    with np.errstate(invalid="ignore"):
+        in_band = (m_norm >= analyzer.M_REF_LOW) & (m_norm <= analyzer.M_REF_HIGH)
+    counts = np.bincount(idx, minlength=n_days)
+    weight_sum = _bins(idx, w, n_days)
+    all_sum = _bins(idx, corrected, n_days)
+    cand_count = np.bincount(idx, weights=in_band.astype(np.float64), minlength=n_days).astype(np.int64)
+    cand_sum = _bins(idx, np.where(in_band, corrected, 0.0), n_days)
+    cand_m_sum = _bins(idx, np.where(in_band, m_norm, 0.0), n_days)
+    fert = _bins(idx, jumps, n_days)
+
+    events_by_day: Dict[int, List[Dict]] = {}
+    for i in np.flatnonzero(events):
+        events_by_day.setdefault(int(idx[i]), []).append(
+            {
+                "timestamp": from_us(w_us[i]).isoformat(),
+                "delta_weight": float(delta_w[i]),
+                "delta_moisture": float(delta_m[i]),
+            }
+        )
+
+    # -- sensor series: count / sum / sum_sq per day and metric
+    s_us, *s_values = window.sensor_since(_day_start(first))
+    s_idx = day_ordinals_us(s_us) - first_ord
+    in_range = s_idx < n_days
+    sensor: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    for metric, values in zip(SENSOR_METRICS, s_values):
+        present = in_range & ~np.isnan(values)
+        v, i = values[present], s_idx[present]
+        sensor[metric] = (np.bincount(i, minlength=n_days), _bins(i, v, n_days), _bins(i, v * v, n_days))
+
+    now = datetime.utcnow()
+    rows: List[Dict] = []
+    for d, day in enumerate(day_list):
+        row: Dict = {
+            "plant_id": window.plant_id,
+            "day": day,
+            "weight_count": int(counts[d]),
+            "weight_avg": None,
+            "ref_weight": None,
+            "ref_num_candidates": int(cand_count[d]),
+            "ref_fallback_used": False,
+            "ref_avg_soil_moisture": None,
+            "fertilizer_offset": float(fert[d]),
+            "fertilizer_events": events_by_day.get(d, []),
+            "last_weight": None,
+            "last_soil_moisture": None,
+            "growth_rate_3d": None,
+            "finalized": day < today,
+            "updated_at": now,
+        }
+        if counts[d]:
+            row["weight_avg"] = float(weight_sum[d] / counts[d])
+            row["last_weight"] = float(w[day_last[d]])
+            row["last_soil_moisture"] = None if np.isnan(soil[day_last[d]]) else float(soil[day_last[d]])
+            if cand_count[d]:
+                row["ref_weight"] = float(cand_sum[d] / cand_count[d])
+                row["ref_avg_soil_moisture"] = float(cand_m_sum[d] / cand_count[d])
+            else:
+                row["ref_weight"] = float(all_sum[d] / counts[d])
+                row["ref_fallback_used"] = True
+        for metric, (count, total, total_sq) in sensor.items():
+            row[f"{metric}_count"] = int(count[d])
+            row[f"{metric}_sum"] = float(total[d])
+            row[f"{metric}_sum_sq"] = float(total_sq[d])
+        row["stress_factors"] = analyzer._infer_stress_factors(day_sensor_average([row]))
+        rows.append(row)
+
+    # Rolling 3-reference-day slope, continuing from the stored reference days
+    ref_rows = [r for r in prior if r["ref_weight"] is not None][-2:] + [r for r in rows if r["ref_weight"] is not None]
+    if ref_rows:
+        slopes = kernels.rolling_slopes(
+            kernels.day_ordinals([r["day"] for r in ref_rows]), np.array(chained_reference_weights(ref_rows)), window=3
+        )
+        for r, slope in zip(ref_rows, slopes):
+            if r["day"] >= first:
+                r["growth_rate_3d"] = None if np.isnan(slope) else float(slope)
+    return rows
+
+
+def chained_reference_weights(ref_rows: List[Dict]) -> List[float]:
+    """
+    Day-local reference weights of consecutive reference days (oldest first) made
+    comparable: each minus the fertilizer offsets of the earlier days in the list.
+    Days without weights have no jumps, so only reference days carry offsets.
+    """
+    offsets = np.array([r["fertilizer_offset"] or 0.0 for r in ref_rows])
+    before = np.r_[0.0, np.cumsum(offsets)[:-1]]
+    return (np.array([r["ref_weight"] for r in ref_rows]) - before).tolist()
+
+
+def _days_between(start: date, end: date) -> List[date]:
+    """Days in [start, end)."""
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+def day_sensor_average(rows: Iterable[Dict]) -> Dict[str, Optional[float]]:
+    """Sensor means over the given day rows, shaped like analyzer sensor averages (soil normalized 0-1)."""
+    stats = merged_sensor_stats(rows)
+    soil = stats["soil_moisture"]["avg"]
+    return {
+        "avg_temperature": stats["temperature"]["avg"],
+        "avg_light": stats["light"]["avg"],
+        "avg_soil_moisture": None if soil is None else max(0.0, min(1.0, soil / kernels.SOIL_SCALE)),
+    }
+
+
+def merged_sensor_stats(rows: Iterable[Dict]) -> Dict[str, Dict[str, Optional[float]]]:
+    """{metric: {count, avg, std}} over several days (population std, like the rollups)."""
+    rows = list(rows)
+    out: Dict[str, Dict[str, Optional[float]]] = {}
+    for metric in SENSOR_METRICS:
+        count = sum(r[f"{metric}_count"] for r in rows)
+        avg = std = None
+        if count:
+            avg = sum(r[f"{metric}_sum"] for r in rows) / count
+            std = max(0.0, sum(r[f"{metric}_sum_sq"] for r in rows) / count - avg * avg) ** 0.5
+        out[metric] = {"count": count, "avg": avg, "std": std}
+    return out
+
+
+def _stale_from(rows: List[Dict], start_day: date, today: date) -> date:
+    """
+    First day to compute from raw rows: a closed day in range that is missing or
+    not finalized (never built, or reopened by late / backfilled rows), else today,
+    which is never stored.
+    """
+    finalized = {r["day"] for r in rows if r["finalized"]}
+    missing = [d for d in _days_between(start_day, today) if d not in finalized]
+    missing += [r["day"] for r in rows if not r["finalized"]]  # reopened look-back days too
+    return min(missing, default=today)
+
+
+def load(
+    db: Session,
+    plant_ids: Iterable[int],
+    start_day: date,
+    now: Optional[datetime] = None,
+    persist: bool = False,
+) -> Dict[int, List[Dict]]:
+    """
+    Daily feature rows for [start_day, today] per plant (one dict per day, oldest
+    first). Finalized closed days come from the store; closed days that are
+    missing or reopened, and always today, are computed from raw rows in memory
+    (two raw-series queries for all plants together).
+
+    Read-only unless `persist`: then the computed closed days of existing plants
+    are upserted as finalized (the nightly analysis does this). Caller commits.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    plant_ids = sorted(set(plant_ids))
+    if not plant_ids:
+        return {}
+
+    stored: Dict[int, List[Dict]] = {pid: [] for pid in plant_ids}
+    query = (
+        select(PlantDailyFeatures.__table__)
+        .where(
+            PlantDailyFeatures.plant_id.in_(plant_ids),
+            PlantDailyFeatures.day >= start_day - timedelta(days=LOOKBACK_DAYS),
+            PlantDailyFeatures.day < today,
+        )
+        .order_by(PlantDailyFeatures.plant_id, PlantDailyFeatures.day)
+    )
+    for row in db.execute(query).mappings():
+        stored[row["plant_id"]].append({c: row[c] for c in _COLUMNS})
+
+    refresh_from = {pid: _stale_from(stored[pid], start_day, today) for pid in plant_ids}
+    windows = PlantWindow.load_many(db, plant_ids, _day_start(min(refresh_from.values())), now=now)
+    computed: List[Dict] = []
+    for pid, first in refresh_from.items():
+        prior = [r for r in stored[pid] if r["day"] < first]
+        rows = _compute_days(windows[pid], first, today, prior)
+        computed.extend(r for r in rows if r["finalized"])
+        stored[pid] = prior + rows
+
+    if persist and computed:
+        # Rows only for plants that exist (the foreign key would reject the rest)
+        known = set(db.execute(select(Plant.id).where(Plant.id.in_({r["plant_id"] for r in computed}))).scalars())
+        _upsert(db, [r for r in computed if r["plant_id"] in known])
+
+    return {pid: [r for r in stored[pid] if start_day <= r["day"] <= today] for pid in plant_ids}
+
+
+def _upsert(db: Session, rows: List[Dict]) -> None:
+    # Sorted so concurrent refreshes lock rows in the same order
+    rows = sorted(rows, key=lambda r: (r["plant_id"], r["day"]))
+    # Multi-row VALUES per chunk: an executemany upsert goes out a few rows per round trip
+    for i in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        stmt = insert(PlantDailyFeatures).values(rows[i : i + UPSERT_CHUNK_ROWS])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlantDailyFeatures.plant_id, PlantDailyFeatures.day],
+            set_={c: stmt.excluded[c] for c in _COLUMNS if c not in ("plant_id", "day")},
+        )
+        db.execute(stmt)
+
+
+def invalidate(db: Session, since_by_plant: Dict[int, datetime]) -> None:
+    """
+    Un-finalize closed days from the earliest written timestamp on, for writes
+    that land before today (late/buffered ingest, backfills). Later days depend on
+    earlier ones (jump carry-over, growth slopes), so everything after goes too.
+    load() computes them in memory until the next persisting load stores them
+    again. Caller commits.
+    """
+    today = datetime.utcnow().date()
+    for plant_id, since in sorted(since_by_plant.items()):
+        if since.date() >= today:
+            continue
+        db.execute(
+            update(PlantDailyFeatures)
+            .where(
+                PlantDailyFeatures.plant_id == plant_id,
+                PlantDailyFeatures.day >= since.date(),
+                PlantDailyFeatures.finalized.is_(True),
+            )
+            .values(finalized=False)
+        )
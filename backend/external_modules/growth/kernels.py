@@ -0,0 +1,156 @@
+"""
+NumPy kernels behind the growth analyzer and /plants/{id}/growth-analytics.
+
+Every function takes flat arrays (missing values as NaN) and returns arrays, so the
+same code serves one plant or many stacked series. Results match the original
+per-row loops exactly: reductions run in input order, like the Python sums did.
+"""
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SOIL_SCALE = 255.0  # raw scale: 0 wet, 255 dry
+
+
+def as_float_array(values) -> np.ndarray:
+    """Sequence with None -> float64 array with NaN."""
+    return np.array(values, dtype=np.float64)
+
+
+def day_ordinals(timestamps) -> np.ndarray:
+    """
+    datetime/date sequence -> int64 proleptic day ordinals (date.toordinal()).
+    Much cheaper than going through datetime64 for Python datetime objects.
+    """
+    return np.fromiter((ts.toordinal() for ts in timestamps), dtype=np.int64, count=len(timestamps))
+
+
+def ordinals_to_dates(ordinals: np.ndarray) -> List[date]:
+    return [date.fromordinal(int(o)) for o in ordinals]
+
+
+def soil_norm(raw: np.ndarray) -> np.ndarray:
+    """Raw soil (0 wet - 255 dry) -> raw / 255 clipped to [0, 1]; NaN stays NaN."""
+    return np.clip(raw / SOIL_SCALE, 0.0, 1.0)
+
+
+def fertilizer_offsets(
+    weights: np.ndarray,
+    moist_norm: np.ndarray,
+    jump_min: float,
+    moisture_delta_max: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Detect fertilizer events (weight jumps >= `jump_min` between consecutive samples
+    while soil moisture moves by at most `moisture_delta_max`) and subtract the
+    running total of those jumps from every later weight.
+    A missing moisture on either side counts as "unchanged"; a missing weight
+    breaks the chain for the next sample.
+    Returns (corrected_weights, event_mask, delta_weight, delta_moisture).
+    """
+    n = weights.shape[0]
+    delta_w = np.full(n, np.nan)
+    delta_m = np.zeros(n)
+    if n > 1:
+        delta_w[1:] = weights[1:] - weights[:-1]
+        delta_m[1:] = np.nan_to_num(moist_norm[1:] - moist_norm[:-1], nan=0.0)
+    with np.errstate(invalid="ignore"):
+        events = (delta_w >= jump_min) & (np.abs(delta_m) <= moisture_delta_max)
+    offsets = np.cumsum(np.where(events, delta_w, 0.0))
+    return weights - offsets, events, delta_w, delta_m
+
+
+def grouped_means(keys: np.ndarray, values: np.ndarray, mask=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mean of `values` per distinct key (optionally only where `mask`).
+    Returns (sorted_keys, means, counts); keys without selected values get NaN / 0.
+    """
+    unique, inverse = np.unique(keys, return_inverse=True)
+    weights = values if mask is None else np.where(mask, values, 0.0)
+    selected = np.ones(values.shape[0]) if mask is None else mask.astype(np.float64)
+    sums = np.bincount(inverse, weights=weights, minlength=unique.shape[0])
+    counts = np.bincount(inverse, weights=selected, minlength=unique.shape[0]).astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return unique, means, counts
+
+
+def rolling_slopes(days: np.ndarray, values: np.ndarray, window: int = 3) -> np.ndarray:
+    """
+    Slope (value units per day) from the first to the last point of each trailing
+    window of `window` points, over sorted day ordinals. NaN where the window holds
+    a single point; the day span is floored at 1.
+    """
+    idx = np.arange(days.shape[0])
+    first = np.maximum(idx - (window - 1), 0)
+    span = np.maximum(days - days[first], 1)
+    return np.where(idx > first, (values - values[first]) / span, np.nan)
+
+
+def z_stress(values: np.ndarray, means: np.ndarray, stds: np.ndarray, floor: float = 0.5) -> np.ndarray:
+    """
+    |z| scaled to a 0-10 stress score (z=5 -> 10), floored at `floor`.
+    Missing value or stats -> 5.0; a zero std is treated as 1e-6. Unrounded; callers
+    round for display (Python's round, not np.round, to keep the exact old values).
+    """
+    std = np.where((stds == 0) | np.isnan(stds), 1e-6, stds)
+    with np.errstate(invalid="ignore"):
+        scores = np.minimum(10.0, np.abs(values - means) / std * 2.0)
+    scores = np.where(np.isnan(values) | np.isnan(means), 5.0, scores)
+    return np.maximum(floor, scores)
+
+
+def growth_stress(rates: np.ndarray, g_slow: float, g_norm: float, floor: float = 0.5) -> np.ndarray:
+    """
+    Growth rate (g/day) -> 0-10 stress: 10 at <= 0, 6-10 below `g_slow`,
+    linear 6 -> 0.5 up to `g_norm`, 0.5 above; NaN (no rate) -> 5.0. Unrounded.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        below_slow = 6 + (1 - rates / g_slow) * 4
+        below_norm = (1 - (rates - g_slow) / (g_norm - g_slow)) * 5.5 + 0.5
+        scores = np.select(
+            [np.isnan(rates), rates >= g_norm, rates <= 0, rates < g_slow],
+            [5.0, 0.5, 10.0, below_slow],
+            default=below_norm,
+        )
+    return np.maximum(floor, scores)
+
+
+def moments(values: np.ndarray) -> Tuple[int, Optional[float], Optional[float]]:
+    """(count, mean, population std) of the non-NaN values; mean/std None when empty."""
+    present = values[~np.isnan(values)]
+    if not present.size:
+        return 0, None, None
+    return int(present.size), float(present.mean()), float(present.std())
+
+
+def growth_status(
+    rates: np.ndarray,
+    deltas_1d: np.ndarray,
+    short_term: np.ndarray,
+    stressed: np.ndarray,
+    g_slow: float,
+    g_norm: float,
+    short_slow: float = 0.05,
+) -> np.ndarray:
+    """
+    Growth status per series: "normal" | "slow" | "stagnant" | "stressed".
+    Series with fewer than 3 reference days (`short_term`) are judged on the 1-day
+    weight delta, where any stress factor wins; otherwise on the 3-day rate, where
+    stress wins only at or below `g_slow`. No value -> "stressed" if stressed else "normal".
+    """
+    values = np.where(short_term, deltas_1d, rates)
+    missing = np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        return np.select(
+            [
+                missing & stressed,
+                missing,
+                stressed & (short_term | (values <= g_slow)),
+                values <= 0,
+                values < np.where(short_term, short_slow, g_norm),
+            ],
+            ["stressed", "normal", "stressed", "stagnant", "slow"],
+            default="normal",
+        )
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+US_PER_DAY = 86_400_000_000
+
+# Timestamps come back as integer microseconds since the epoch (exact, and far
+# cheaper to turn into arrays than datetime objects).
+# Soil at the same timestamp rides along with each weight sample for the
+# fertilizer / reference-band logic.
+_WEIGHT_SQL = text(
+    """
+    SELECT w.plant_id, (EXTRACT(EPOCH FROM w."timestamp") * 1000000)::int8, w.weight, s.soil_moisture
+    FROM weight_records w
+    LEFT JOIN sensor_records s
+        ON s.plant_id = w.plant_id AND s."timestamp" = w."timestamp" AND s."timestamp" >= :start
+    WHERE w.plant_id = ANY(:plant_ids) AND w."timestamp" >= :start
+    ORDER BY w.plant_id, w."timestamp"
+    """
+)
+
+_SENSOR_SQL = text(
+    """
+    SELECT plant_id, (EXTRACT(EPOCH FROM "timestamp") * 1000000)::int8, temperature, light, soil_moisture
+    FROM sensor_records
+    WHERE plant_id = ANY(:plant_ids) AND "timestamp" >= :start
+    ORDER BY plant_id, "timestamp"
+    """
+)
+
+
+def to_us(ts: datetime) -> int:
+    return (ts - EPOCH) // timedelta(microseconds=1)
+
+
+def from_us(us) -> datetime:
+    return EPOCH + timedelta(microseconds=int(us))
+
+
+def day_ordinals_us(ts_us: np.ndarray) -> np.ndarray:
+    """Epoch microseconds -> date.toordinal() of the (naive UTC) calendar day."""
+    return ts_us // US_PER_DAY + EPOCH_ORDINAL
+
+
+def _columns(rows, width: int) -> Tuple[np.ndarray, ...]:
+    """(plant_id, ts_us, *float columns) arrays from result rows."""
+    if not rows:
+        return tuple(np.empty(0, dtype=np.int64 if i < 2 else np.float64) for i in range(width))
+    # Column-wise via zip: np.array() straight over Row objects is ~100x slower.
+    plant_ids, ts_us, *values = zip(*rows)
+    return (
+        np.array(plant_ids, dtype=np.int64),
+        np.array(ts_us, dtype=np.int64),
+    ) + tuple(np.array(v, dtype=np.float64) for v in values)  # None -> NaN
+
+
+def _split(columns: Tuple[np.ndarray, ...], plant_id: int) -> Tuple[np.ndarray, ...]:
+    lo, hi = np.searchsorted(columns[0], [plant_id, plant_id + 1])
+    return tuple(col[lo:hi] for col in columns[1:])
+
+
+class PlantWindow:
+    """
+    One plant's weight and sensor series since `start`, loaded in two queries into
+    arrays (for any number of plants with load_many), so the daily features of
+    several days can be computed by slicing the same data instead of re-querying
+    it. `now` anchors relative windows computed from it.
+    """
+
+    def __init__(self, plant_id: int, start: datetime, now: datetime, weight_columns, sensor_columns):
+        self.plant_id = plant_id
+        self.start = start
+        self.now = now
+        self.weight_us, self.weight, self.weight_soil = weight_columns
+        self.sensor_us, self.temperature, self.light, self.soil_moisture = sensor_columns
+
+    @classmethod
+    def load(cls, db: Session, plant_id: int, start: datetime, now: Optional[datetime] = None) -> "PlantWindow":
+        return cls.load_many(db, [plant_id], start, now)[plant_id]
+
+    @classmethod
+    def load_many(
+        cls, db: Session, plant_ids: Iterable[int], start: datetime, now: Optional[datetime] = None
+    ) -> Dict[int, "PlantWindow"]:
+        """Windows for several plants from the same two queries (one per series)."""
+        plant_ids = sorted(set(plant_ids))
+        params = {"plant_ids": plant_ids, "start": start}
+        weight = _columns(db.execute(_WEIGHT_SQL, params).all(), 4)
+        sensor = _columns(db.execute(_SENSOR_SQL, params).all(), 5)
+        now = now or datetime.utcnow()
+        return {pid: cls(pid, start, now, _split(weight, pid), _split(sensor, pid)) for pid in plant_ids}
+
+    def _offset(self, ts_us: np.ndarray, since: datetime) -> int:
+        if since < self.start:
+            raise ValueError(f"window starts at {self.start.isoformat()}, cannot slice from {since.isoformat()}")
+        return int(np.searchsorted(ts_us, to_us(since), side="left"))
+
+    def weight_since(self, since: datetime) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(ts_us, weight, soil_moisture at the same timestamp) for samples at or after `since`."""
+        i = self._offset(self.weight_us, since)
+        return self.weight_us[i:], self.weight[i:], self.weight_soil[i:]
+
+    def sensor_since(self, since: datetime) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(ts_us, temperature, light, soil_moisture) for samples at or after `since`."""
+        i = self._offset(self.sensor_us, since)
+        return self.sensor_us[i:], self.temperature[i:], self.light[i:], self.soil_moisture[i:]
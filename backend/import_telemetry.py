@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Bulk-import historical sensor/weight readings (e.g. ThingsBoard exports) from CSV
+or Parquet files; same pipeline as POST /admin/import/telemetry.
+
+    python import_telemetry.py readings.csv more.parquet --plant-id 2
+
+Columns: plant_id, timestamp (ISO or epoch s/ms), temperature, light,
+soil_moisture (raw 0 wet - 255 dry), weight. Each file is one transaction.
+"""
+
+import argparse
+import json
+import sys
+
+from database import SessionLocal
+from services import backfill
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("files", nargs="+", help="CSV or Parquet files")
+    parser.add_argument("--plant-id", type=int, help="plant for rows without a plant_id column")
+    parser.add_argument("--format", choices=backfill.FORMATS, help="override detection by file extension")
+    parser.add_argument("--no-analysis", action="store_true", help="skip growth analysis recomputation")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.files:
+        db = SessionLocal()
+        try:
+            with open(path, "rb") as fh:
+                records = backfill.read_upload(fh, path, args.format)
+                result = backfill.import_telemetry(
+                    db, records, default_plant_id=args.plant_id, recompute_analysis=not args.no_analysis
+                )
+            db.commit()
+            print(json.dumps({"file": path, **result}, indent=2))
+        except Exception as exc:
+            db.rollback()
+            failed = True
+            print(f"{path}: import failed: {exc}", file=sys.stderr)
+        finally:
+            db.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""baseline schema (tables previously created by Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Existing deployments already have these tables from create_all, so each
+table is only created when it is missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table("plants"):
+        op.create_table(
+            "plants",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("species", sa.String(), nullable=True),
+            sa.Column("nickname", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("last_watered_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_plants_id", "plants", ["id"])
+
+    if not _has_table("images"):
+        op.create_table(
+            "images",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), nullable=False),
+            sa.Column("file_path", sa.String(), nullable=False),
+            sa.Column("captured_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_images_id", "images", ["id"])
+
+    if not _has_table("sensor_records"):
+        op.create_table(
+            "sensor_records",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), nullable=False),
+            sa.Column("temperature", sa.Float(), nullable=True),
+            sa.Column("light", sa.Float(), nullable=True),
+            sa.Column("soil_moisture", sa.Float(), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_sensor_records_id", "sensor_records", ["id"])
+        op.create_index("ix_sensor_records_timestamp", "sensor_records", ["timestamp"])
+
+    if not _has_table("weight_records"):
+        op.create_table(
+            "weight_records",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), nullable=False),
+            sa.Column("weight", sa.Float(), nullable=False),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_weight_records_id", "weight_records", ["id"])
+        op.create_index("ix_weight_records_timestamp", "weight_records", ["timestamp"])
+
+    if not _has_table("analysis_results"):
+        op.create_table(
+            "analysis_results",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), nullable=False),
+            sa.Column("growth_status", sa.String(), nullable=True),
+            sa.Column("growth_rate_3d", sa.Float(), nullable=True),
+            sa.Column("plant_type", sa.String(), nullable=True),
+            sa.Column("trigger", sa.String(), nullable=False),
+            sa.Column("growth_overview", sa.String(), nullable=True),
+            sa.Column("environment_assessment", sa.String(), nullable=True),
+            sa.Column("suggestions", sa.String(), nullable=True),
+            sa.Column("full_analysis", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_analysis_results_id", "analysis_results", ["id"])
+        op.create_index("ix_analysis_results_created_at", "analysis_results", ["created_at"])
+
+    if not _has_table("dream_images"):
+        op.create_table(
+            "dream_images",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), nullable=False),
+            sa.Column("sensor_record_id", sa.Integer(), sa.ForeignKey("sensor_records.id"), nullable=True),
+            sa.Column("weight_record_id", sa.Integer(), sa.ForeignKey("weight_records.id"), nullable=True),
+            sa.Column("file_path", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_dream_images_id", "dream_images", ["id"])
+        op.create_index("ix_dream_images_created_at", "dream_images", ["created_at"])
+
+    if not _has_table("alerts"):
+        op.create_table(
+            "alerts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), nullable=True),
+            sa.Column("analysis_result_id", sa.Integer(), sa.ForeignKey("analysis_results.id"), nullable=True),
+            sa.Column("message", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_alerts_id", "alerts", ["id"])
+        op.create_index("ix_alerts_plant_id", "alerts", ["plant_id"])
+        op.create_index("ix_alerts_created_at", "alerts", ["created_at"])
+
+    if not _has_table("scheduler_jobs"):
+        op.create_table(
+            "scheduler_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("job_key", sa.String(), nullable=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("cron_expr", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("next_run_time", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_scheduler_jobs_id", "scheduler_jobs", ["id"])
+        op.create_index("ix_scheduler_jobs_job_key", "scheduler_jobs", ["job_key"], unique=True)
+
+    if not _has_table("scheduler_job_runs"):
+        op.create_table(
+            "scheduler_job_runs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("job_id", sa.Integer(), sa.ForeignKey("scheduler_jobs.id"), nullable=True),
+            sa.Column("job_key", sa.String(), nullable=True),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("message", sa.Text(), nullable=True),
+            sa.Column("started_at", sa.DateTime(), nullable=False),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("duration_seconds", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_scheduler_job_runs_id", "scheduler_job_runs", ["id"])
+        op.create_index("ix_scheduler_job_runs_job_key", "scheduler_job_runs", ["job_key"])
+
+
+def downgrade() -> None:
+    for table in (
+        "scheduler_job_runs",
+        "scheduler_jobs",
+        "alerts",
+        "dream_images",
+        "analysis_results",
+        "weight_records",
+        "sensor_records",
+        "images",
+        "plants",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,58 @@
+"""composite (plant_id, time DESC) indexes and BRIN on append-only timestamps
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Latest-value and window queries filter on plant_id and order/range by time.
+The sensor/weight composite indexes INCLUDE the value columns so
+"latest reading" lookups are index-only scans. The global btree on
+timestamp is replaced by a much smaller BRIN index (rows arrive in time order).
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_sensor_records_plant_id_timestamp "
+        "ON sensor_records (plant_id, timestamp DESC) INCLUDE (temperature, light, soil_moisture)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_weight_records_plant_id_timestamp "
+        "ON weight_records (plant_id, timestamp DESC) INCLUDE (weight)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_images_plant_id_captured_at ON images (plant_id, captured_at DESC)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_analysis_results_plant_id_created_at "
+        "ON analysis_results (plant_id, created_at DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_dream_images_plant_id_created_at "
+        "ON dream_images (plant_id, created_at DESC)"
+    )
+
+    op.execute("CREATE INDEX IF NOT EXISTS brin_sensor_records_timestamp ON sensor_records USING brin (timestamp)")
+    op.execute("CREATE INDEX IF NOT EXISTS brin_weight_records_timestamp ON weight_records USING brin (timestamp)")
+    op.execute("DROP INDEX IF EXISTS ix_sensor_records_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_weight_records_timestamp")
+
+    op.execute("ANALYZE sensor_records")
+    op.execute("ANALYZE weight_records")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_weight_records_timestamp ON weight_records (timestamp)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_sensor_records_timestamp ON sensor_records (timestamp)")
+    op.execute("DROP INDEX IF EXISTS brin_weight_records_timestamp")
+    op.execute("DROP INDEX IF EXISTS brin_sensor_records_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_dream_images_plant_id_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_analysis_results_plant_id_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_images_plant_id_captured_at")
+    op.execute("DROP INDEX IF EXISTS ix_weight_records_plant_id_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_sensor_records_plant_id_timestamp")
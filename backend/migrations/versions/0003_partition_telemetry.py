@@ -0,0 +1,134 @@
+"""monthly range partitioning for sensor_records and weight_records
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Both tables become PARTITION BY RANGE (timestamp) with one partition per
+month (`<table>_pYYYYMM`) plus a `<table>_default` catch-all. Retention is
+then done by detaching/dropping whole partitions (services/partitions.py).
+
+A partitioned table's unique keys must include the partition key, so the
+primary key becomes (id, timestamp) and the dream_images -> sensor/weight
+foreign keys are dropped (the id columns are kept as plain references).
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+TABLES = {
+    "sensor_records": {
+        "columns": """
+            id integer NOT NULL DEFAULT nextval('sensor_records_id_seq'),
+            plant_id integer NOT NULL REFERENCES plants(id),
+            temperature double precision,
+            light double precision,
+            soil_moisture double precision,
+            "timestamp" timestamp without time zone NOT NULL
+        """,
+        "copy_columns": 'id, plant_id, temperature, light, soil_moisture, "timestamp"',
+        "indexes": [
+            "CREATE INDEX ix_sensor_records_id ON sensor_records (id)",
+            "CREATE INDEX ix_sensor_records_plant_id_timestamp "
+            "ON sensor_records (plant_id, timestamp DESC) INCLUDE (temperature, light, soil_moisture)",
+            "CREATE INDEX brin_sensor_records_timestamp ON sensor_records USING brin (timestamp)",
+        ],
+    },
+    "weight_records": {
+        "columns": """
+            id integer NOT NULL DEFAULT nextval('weight_records_id_seq'),
+            plant_id integer NOT NULL REFERENCES plants(id),
+            weight double precision NOT NULL,
+            "timestamp" timestamp without time zone NOT NULL
+        """,
+        "copy_columns": 'id, plant_id, weight, "timestamp"',
+        "indexes": [
+            "CREATE INDEX ix_weight_records_id ON weight_records (id)",
+            "CREATE INDEX ix_weight_records_plant_id_timestamp "
+            "ON weight_records (plant_id, timestamp DESC) INCLUDE (weight)",
+            "CREATE INDEX brin_weight_records_timestamp ON weight_records USING brin (timestamp)",
+        ],
+    },
+}
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    idx = dt.year * 12 + dt.month - 1 + months
+    return datetime(idx // 12, idx % 12 + 1, 1)
+
+
+def _partition_table(table: str, spec: dict) -> None:
+    conn = op.get_bind()
+    legacy = f"{table}_legacy"
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"CREATE TABLE {table} ({spec['columns']}) PARTITION BY RANGE (\"timestamp\")")
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    now = datetime.utcnow()
+    first_ts = conn.execute(sa.text(f'SELECT min("timestamp") FROM {legacy}')).scalar()
+    month = _month_start(first_ts or now)
+    last_month = _add_months(_month_start(now), MONTHS_AHEAD)
+    while month <= last_month:
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat(sep=' ')}') TO ('{nxt.isoformat(sep=' ')}')"
+        )
+        month = nxt
+
+    cols = spec["copy_columns"]
+    select_cols = cols.replace('"timestamp"', 'COALESCE("timestamp", now() AT TIME ZONE \'utc\')')
+    op.execute(f"INSERT INTO {table} ({cols}) SELECT {select_cols} FROM {legacy}")
+    op.execute(f"DROP TABLE {legacy}")
+
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, \"timestamp\")")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"SELECT setval('{table}_id_seq', COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)")
+    for ddl in spec["indexes"]:
+        op.execute(ddl)
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE dream_images DROP CONSTRAINT IF EXISTS dream_images_sensor_record_id_fkey")
+    op.execute("ALTER TABLE dream_images DROP CONSTRAINT IF EXISTS dream_images_weight_record_id_fkey")
+    for table, spec in TABLES.items():
+        _partition_table(table, spec)
+
+
+def downgrade() -> None:
+    for table, spec in TABLES.items():
+        legacy = f"{table}_legacy"
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"CREATE TABLE {legacy} (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {legacy} SELECT * FROM {table}")
+        op.execute(f"DROP TABLE {table} CASCADE")
+        op.execute(f"ALTER TABLE {legacy} RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+        op.execute(f"ALTER TABLE {table} ADD FOREIGN KEY (plant_id) REFERENCES plants(id)")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        for ddl in spec["indexes"]:
+            op.execute(ddl)
+    op.execute(
+        "ALTER TABLE dream_images ADD CONSTRAINT dream_images_sensor_record_id_fkey "
+        "FOREIGN KEY (sensor_record_id) REFERENCES sensor_records(id)"
+    )
+    op.execute(
+        "ALTER TABLE dream_images ADD CONSTRAINT dream_images_weight_record_id_fkey "
+        "FOREIGN KEY (weight_record_id) REFERENCES weight_records(id)"
+    )
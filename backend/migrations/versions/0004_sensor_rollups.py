@@ -0,0 +1,102 @@
+"""hourly and daily sensor/weight rollup tables
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Rollups are backfilled from the raw history here. The backfill SQL is a frozen
+copy of services.rollups as of this revision (whole history, no bounds), so later
+changes to the service cannot change what this migration does.
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("sensor_rollups_hourly", "sensor_rollups_daily")
+LIGHT_MAX_GAP_MIN = 30.0
+
+BACKFILL_HOURLY = """
+WITH samples AS (
+    SELECT s.plant_id, s."timestamp" AS ts, v.metric, v.value,
+           lead(s."timestamp") OVER (PARTITION BY s.plant_id, v.metric ORDER BY s."timestamp") AS next_ts
+    FROM sensor_records s
+    CROSS JOIN LATERAL (VALUES
+        ('temperature', s.temperature),
+        ('light', s.light),
+        ('soil_moisture', s.soil_moisture),
+        ('soil_pct', GREATEST(0.0, LEAST(100.0, (255.0 - s.soil_moisture) / 255.0 * 100.0)))
+    ) AS v(metric, value)
+    WHERE v.value IS NOT NULL
+    UNION ALL
+    SELECT w.plant_id, w."timestamp", 'weight', w.weight,
+           lead(w."timestamp") OVER (PARTITION BY w.plant_id ORDER BY w."timestamp")
+    FROM weight_records w
+    WHERE w.weight IS NOT NULL
+)
+INSERT INTO sensor_rollups_hourly
+    (plant_id, metric, bucket_start, count, sum, sum_sq, min, max,
+     first_value, first_at, last_value, last_at, integral, updated_at)
+SELECT plant_id, metric, date_trunc('hour', ts),
+       count(*), sum(value), sum(value * value), min(value), max(value),
+       (array_agg(value ORDER BY ts))[1], min(ts),
+       (array_agg(value ORDER BY ts DESC))[1], max(ts),
+       CASE WHEN metric = 'light' THEN sum(
+           value * GREATEST(0.0, EXTRACT(EPOCH FROM (
+               LEAST(COALESCE(next_ts, ts + :max_gap), ts + :max_gap, :now) - ts
+           ))) / 3600.0
+       ) END,
+       :now
+FROM samples
+GROUP BY plant_id, metric, date_trunc('hour', ts)
+"""
+
+BACKFILL_DAILY = """
+INSERT INTO sensor_rollups_daily
+    (plant_id, metric, bucket_start, count, sum, sum_sq, min, max,
+     first_value, first_at, last_value, last_at, integral, updated_at)
+SELECT plant_id, metric, date_trunc('day', bucket_start),
+       sum(count), sum(sum), sum(sum_sq), min(min), max(max),
+       (array_agg(first_value ORDER BY first_at))[1], min(first_at),
+       (array_agg(last_value ORDER BY last_at DESC))[1], max(last_at),
+       sum(integral), :now
+FROM sensor_rollups_hourly
+GROUP BY plant_id, metric, date_trunc('day', bucket_start)
+"""
+
+
+def upgrade() -> None:
+    for table in ROLLUP_TABLES:
+        op.create_table(
+            table,
+            sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), primary_key=True),
+            sa.Column("metric", sa.String(20), primary_key=True),
+            sa.Column("bucket_start", sa.DateTime(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("sum", sa.Float(), nullable=False),
+            sa.Column("sum_sq", sa.Float(), nullable=False),
+            sa.Column("min", sa.Float(), nullable=True),
+            sa.Column("max", sa.Float(), nullable=True),
+            sa.Column("first_value", sa.Float(), nullable=True),
+            sa.Column("first_at", sa.DateTime(), nullable=True),
+            sa.Column("last_value", sa.Float(), nullable=True),
+            sa.Column("last_at", sa.DateTime(), nullable=True),
+            sa.Column("integral", sa.Float(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+    conn = op.get_bind()
+    params = {"max_gap": timedelta(minutes=LIGHT_MAX_GAP_MIN), "now": datetime.utcnow()}
+    conn.execute(sa.text(BACKFILL_HOURLY), params)
+    conn.execute(sa.text(BACKFILL_DAILY), params)
+
+
+def downgrade() -> None:
+    for table in ROLLUP_TABLES:
+        op.drop_table(table)
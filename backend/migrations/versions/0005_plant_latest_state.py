@@ -0,0 +1,99 @@
+"""plant_latest_state: per-plant latest readings, image and analysis
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+One row per plant, upserted on ingest so "latest reading" reads are a
+primary-key lookup. Backfilled here from the source tables with a frozen copy
+of services.latest_state's rebuild query as of this revision.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+BACKFILL_SQL = """
+INSERT INTO plant_latest_state (
+    plant_id, temperature, temperature_at, light, light_at, soil_moisture, soil_moisture_at,
+    sensor_record_id, sensor_at, weight, weight_record_id, weight_at,
+    image_id, image_path, image_at, analysis_id, analysis_at, updated_at
+)
+SELECT p.id, t.temperature, t."timestamp", l.light, l."timestamp", m.soil_moisture, m."timestamp",
+       s.id, s."timestamp", w.weight, w.id, w."timestamp",
+       i.id, i.file_path, i.captured_at, a.id, a.created_at, :now
+FROM plants p
+LEFT JOIN LATERAL (
+    SELECT temperature, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id AND temperature IS NOT NULL ORDER BY "timestamp" DESC LIMIT 1
+) t ON true
+LEFT JOIN LATERAL (
+    SELECT light, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id AND light IS NOT NULL ORDER BY "timestamp" DESC LIMIT 1
+) l ON true
+LEFT JOIN LATERAL (
+    SELECT soil_moisture, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id AND soil_moisture IS NOT NULL ORDER BY "timestamp" DESC LIMIT 1
+) m ON true
+LEFT JOIN LATERAL (
+    SELECT id, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id ORDER BY "timestamp" DESC LIMIT 1
+) s ON true
+LEFT JOIN LATERAL (
+    SELECT id, weight, "timestamp" FROM weight_records
+    WHERE plant_id = p.id ORDER BY "timestamp" DESC LIMIT 1
+) w ON true
+LEFT JOIN LATERAL (
+    SELECT id, file_path, captured_at FROM images
+    WHERE plant_id = p.id ORDER BY captured_at DESC LIMIT 1
+) i ON true
+LEFT JOIN LATERAL (
+    SELECT id, created_at FROM analysis_results
+    WHERE plant_id = p.id ORDER BY created_at DESC LIMIT 1
+) a ON true
+ON CONFLICT (plant_id) DO UPDATE SET
+    temperature = EXCLUDED.temperature, temperature_at = EXCLUDED.temperature_at,
+    light = EXCLUDED.light, light_at = EXCLUDED.light_at,
+    soil_moisture = EXCLUDED.soil_moisture, soil_moisture_at = EXCLUDED.soil_moisture_at,
+    sensor_record_id = EXCLUDED.sensor_record_id, sensor_at = EXCLUDED.sensor_at,
+    weight = EXCLUDED.weight, weight_record_id = EXCLUDED.weight_record_id, weight_at = EXCLUDED.weight_at,
+    image_id = EXCLUDED.image_id, image_path = EXCLUDED.image_path, image_at = EXCLUDED.image_at,
+    analysis_id = EXCLUDED.analysis_id, analysis_at = EXCLUDED.analysis_at,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "plant_latest_state",
+        sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), primary_key=True),
+        sa.Column("temperature", sa.Float(), nullable=True),
+        sa.Column("temperature_at", sa.DateTime(), nullable=True),
+        sa.Column("light", sa.Float(), nullable=True),
+        sa.Column("light_at", sa.DateTime(), nullable=True),
+        sa.Column("soil_moisture", sa.Float(), nullable=True),
+        sa.Column("soil_moisture_at", sa.DateTime(), nullable=True),
+        sa.Column("sensor_record_id", sa.Integer(), nullable=True),
+        sa.Column("sensor_at", sa.DateTime(), nullable=True),
+        sa.Column("weight", sa.Float(), nullable=True),
+        sa.Column("weight_record_id", sa.Integer(), nullable=True),
+        sa.Column("weight_at", sa.DateTime(), nullable=True),
+        sa.Column("image_id", sa.Integer(), nullable=True),
+        sa.Column("image_path", sa.String(), nullable=True),
+        sa.Column("image_at", sa.DateTime(), nullable=True),
+        sa.Column("analysis_id", sa.Integer(), nullable=True),
+        sa.Column("analysis_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    op.get_bind().execute(sa.text(BACKFILL_SQL), {"now": datetime.utcnow()})
+
+
+def downgrade() -> None:
+    op.drop_table("plant_latest_state")
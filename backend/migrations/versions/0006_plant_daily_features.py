@@ -0,0 +1,52 @@
+"""plant_daily_features: per plant / day growth-analysis inputs
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+Filled lazily: the analyzer builds missing days on first use and finalizes
+closed ones (external_modules/growth/features.py), so no backfill here.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "plant_daily_features",
+        sa.Column("plant_id", sa.Integer(), sa.ForeignKey("plants.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("weight_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("weight_avg", sa.Float(), nullable=True),
+        sa.Column("ref_weight", sa.Float(), nullable=True),
+        sa.Column("ref_num_candidates", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ref_fallback_used", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("ref_avg_soil_moisture", sa.Float(), nullable=True),
+        sa.Column("fertilizer_offset", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("fertilizer_events", sa.JSON(), nullable=True),
+        sa.Column("last_weight", sa.Float(), nullable=True),
+        sa.Column("last_soil_moisture", sa.Float(), nullable=True),
+        sa.Column("growth_rate_3d", sa.Float(), nullable=True),
+        sa.Column("temperature_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("temperature_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("temperature_sum_sq", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("light_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("light_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("light_sum_sq", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("soil_moisture_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("soil_moisture_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("soil_moisture_sum_sq", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("stress_factors", sa.JSON(), nullable=True),
+        sa.Column("finalized", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("plant_daily_features")
@@ -7,6 +7,9 @@ from .dream_images import DreamImageRecord
 from .alerts import Alert
 from .scheduler_jobs import SchedulerJob
 from .scheduler_job_runs import SchedulerJobRun
+from .sensor_rollups import SensorRollupHourly, SensorRollupDaily
+from .plant_latest_state import PlantLatestState
+from .plant_daily_features import PlantDailyFeatures
 
 __all__ = [
     "Plant",
@@ -18,4 +21,8 @@ __all__ = [
     "Alert",
     "SchedulerJob",
     "SchedulerJobRun",
+    "SensorRollupHourly",
+    "SensorRollupDaily",
+    "PlantLatestState",
+    "PlantDailyFeatures",
 ]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -24,3 +24,5 @@ class AnalysisResult(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     plant = relationship("Plant", back_populates="analysis_results")
+
+    __table_args__ = (Index("ix_analysis_results_plant_id_created_at", plant_id, created_at.desc()),)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -11,10 +11,13 @@ class DreamImageRecord(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id"), nullable=False)
-    sensor_record_id = Column(Integer, ForeignKey("sensor_records.id"), nullable=True)
-    weight_record_id = Column(Integer, ForeignKey("weight_records.id"), nullable=True)
+    # Plain references: sensor/weight tables are partitioned, so ids alone are not FK targets.
+    sensor_record_id = Column(Integer, nullable=True)
+    weight_record_id = Column(Integer, nullable=True)
     file_path = Column(String, nullable=False)
     description = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     plant = relationship("Plant", back_populates="dream_images")
+
+    __table_args__ = (Index("ix_dream_images_plant_id_created_at", plant_id, created_at.desc()),)
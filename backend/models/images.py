@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -15,3 +15,5 @@ class ImageRecord(Base):
     captured_at = Column(DateTime, default=datetime.utcnow)
 
     plant = relationship("Plant", back_populates="images")
+
+    __table_args__ = (Index("ix_images_plant_id_captured_at", plant_id, captured_at.desc()),)
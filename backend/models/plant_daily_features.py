@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Float, Date, DateTime, Boolean, ForeignKey, JSON
+
+from database import Base
+
+
+class PlantDailyFeatures(Base):
+    """
+    Per plant / UTC day inputs of the growth analysis, maintained by
+    external_modules/growth/features.py. Closed days are computed once and marked
+    `finalized`; today's row is recomputed when new data arrives, and late writes
+    into a closed day clear `finalized` from that day on.
+
+    `ref_weight` is the day's reference weight with fertilizer jumps subtracted
+    from the day's own first sample on (`fertilizer_offset` is the day's total);
+    chaining days means subtracting the offsets of the days in between.
+    Sensor stats are count/sum/sum_sq so multi-day windows merge exactly.
+    """
+
+    __tablename__ = "plant_daily_features"
+
+    plant_id = Column(Integer, ForeignKey("plants.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    weight_count = Column(Integer, nullable=False, default=0)
+    weight_avg = Column(Float, nullable=True)
+    ref_weight = Column(Float, nullable=True)
+    ref_num_candidates = Column(Integer, nullable=False, default=0)
+    ref_fallback_used = Column(Boolean, nullable=False, default=False)
+    ref_avg_soil_moisture = Column(Float, nullable=True)  # normalized 0-1
+    fertilizer_offset = Column(Float, nullable=False, default=0.0)
+    fertilizer_events = Column(JSON, nullable=True)
+    last_weight = Column(Float, nullable=True)  # carried into the next day's jump detection
+    last_soil_moisture = Column(Float, nullable=True)  # raw 0 wet - 255 dry
+    growth_rate_3d = Column(Float, nullable=True)  # g/day over the last (up to) 3 reference days
+
+    temperature_count = Column(Integer, nullable=False, default=0)
+    temperature_sum = Column(Float, nullable=False, default=0.0)
+    temperature_sum_sq = Column(Float, nullable=False, default=0.0)
+    light_count = Column(Integer, nullable=False, default=0)
+    light_sum = Column(Float, nullable=False, default=0.0)
+    light_sum_sq = Column(Float, nullable=False, default=0.0)
+    soil_moisture_count = Column(Integer, nullable=False, default=0)
+    soil_moisture_sum = Column(Float, nullable=False, default=0.0)  # raw scale
+    soil_moisture_sum_sq = Column(Float, nullable=False, default=0.0)
+    stress_factors = Column(JSON, nullable=True)  # from the day's averages
+
+    finalized = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
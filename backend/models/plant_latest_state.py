@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+
+from database import Base
+
+
+class PlantLatestState(Base):
+    """
+    Latest known value per plant, upserted on ingest (services/latest_state.py).
+    Each value keeps its own timestamp; out-of-order writes never move it backwards.
+    """
+
+    __tablename__ = "plant_latest_state"
+
+    plant_id = Column(Integer, ForeignKey("plants.id"), primary_key=True)
+
+    temperature = Column(Float, nullable=True)
+    temperature_at = Column(DateTime, nullable=True)
+    light = Column(Float, nullable=True)
+    light_at = Column(DateTime, nullable=True)
+    soil_moisture = Column(Float, nullable=True)  # raw 0 wet - 255 dry
+    soil_moisture_at = Column(DateTime, nullable=True)
+    sensor_record_id = Column(Integer, nullable=True)
+    sensor_at = Column(DateTime, nullable=True)
+
+    weight = Column(Float, nullable=True)
+    weight_record_id = Column(Integer, nullable=True)
+    weight_at = Column(DateTime, nullable=True)
+
+    image_id = Column(Integer, nullable=True)
+    image_path = Column(String, nullable=True)
+    image_at = Column(DateTime, nullable=True)
+
+    analysis_id = Column(Integer, nullable=True)
+    analysis_at = Column(DateTime, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def last_data_at(self):
+        candidates = [ts for ts in (self.sensor_at, self.weight_at) if ts is not None]
+        return max(candidates) if candidates else None
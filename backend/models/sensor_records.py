@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -9,13 +9,25 @@ from database import Base
 class SensorRecord(Base):
     __tablename__ = "sensor_records"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by RANGE(timestamp) (migration 0003): the key must include the partition column.
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id"), nullable=False)
 
     temperature = Column(Float, nullable=True)
     light = Column(Float, nullable=True)
     soil_moisture = Column(Float, nullable=True)
 
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     plant = relationship("Plant", back_populates="sensor_records")
+
+    __table_args__ = (
+        # latest-value / window lookups per plant (index-only via INCLUDE)
+        Index(
+            "ix_sensor_records_plant_id_timestamp",
+            plant_id,
+            timestamp.desc(),
+            postgresql_include=["temperature", "light", "soil_moisture"],
+        ),
+        Index("brin_sensor_records_timestamp", timestamp, postgresql_using="brin"),
+    )
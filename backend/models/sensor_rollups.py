@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+
+from database import Base
+
+
+class _RollupColumns:
+    """
+    One row per plant / metric / bucket. Metrics: temperature, light,
+    soil_moisture (raw 0 wet-255 dry), soil_pct (0-100), weight.
+    `integral` is the time-weighted sum (lux-hours) and is only set for light.
+    """
+
+    plant_id = Column(Integer, ForeignKey("plants.id"), primary_key=True)
+    metric = Column(String(20), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    sum_sq = Column(Float, nullable=False)
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    first_value = Column(Float, nullable=True)
+    first_at = Column(DateTime, nullable=True)
+    last_value = Column(Float, nullable=True)
+    last_at = Column(DateTime, nullable=True)
+    integral = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SensorRollupHourly(_RollupColumns, Base):
+    __tablename__ = "sensor_rollups_hourly"
+
+
+class SensorRollupDaily(_RollupColumns, Base):
+    __tablename__ = "sensor_rollups_daily"
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -9,10 +9,21 @@ from database import Base
 class WeightRecord(Base):
     __tablename__ = "weight_records"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by RANGE(timestamp) (migration 0003): the key must include the partition column.
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id"), nullable=False)
 
     weight = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     plant = relationship("Plant", back_populates="weight_records")
+
+    __table_args__ = (
+        Index(
+            "ix_weight_records_plant_id_timestamp",
+            plant_id,
+            timestamp.desc(),
+            postgresql_include=["weight"],
+        ),
+        Index("brin_weight_records_timestamp", timestamp, postgresql_using="brin"),
+    )
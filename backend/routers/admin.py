@@ -1,18 +1,30 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from database import get_db
+from config import DB_PGBOUNCER
+from database import (
+    POOL_SETTINGS,
+    async_engine,
+    async_replica_engine,
+    engine,
+    get_db,
+    get_read_db,
+    pool_status,
+    replica_engine,
+    replica_monitor,
+)
 from models import Plant, SensorRecord, WeightRecord, ImageRecord, AnalysisResult, DreamImageRecord
+from services import backfill
 
 router = APIRouter()
 
 
 @router.get("/admin/stats")
-def get_stats(db: Session = Depends(get_db)):
+def get_stats(db: Session = Depends(get_read_db)):
     total_plants = db.query(func.count(Plant.id)).scalar() or 0
     total_sensor_records = db.query(func.count(SensorRecord.id)).scalar() or 0
     total_weight_records = db.query(func.count(WeightRecord.id)).scalar() or 0
@@ -38,6 +50,49 @@ def get_stats(db: Session = Depends(get_db)):
     }
 
 
+@router.get("/admin/db-pool")
+def get_db_pool():
+    """
+    Pool occupancy (checked out / idle / overflow) and checkout wait times for the
+    sync engine (scheduler, report, admin) and the async engine (ingest, metrics, plants),
+    plus replica lag/routing when DB_REPLICA_URL is set.
+    """
+    replica = replica_monitor.status()
+    if replica_engine is not None:
+        replica["sync"] = pool_status(replica_engine)
+        replica["async"] = pool_status(async_replica_engine)
+    return {
+        "settings": {**POOL_SETTINGS, "pgbouncer": DB_PGBOUNCER},
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine),
+        "replica": replica,
+    }
+
+
+@router.post("/admin/import/telemetry")
+def import_telemetry(
+    file: UploadFile = File(...),
+    plant_id: Optional[int] = Form(None),
+    format: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk-import historical sensor/weight readings from a CSV or Parquet file
+    (columns: plant_id, timestamp, temperature, light, soil_moisture, weight; any
+    reading may be empty). `plant_id` is used for rows without one. Rows that fail
+    validation are reported and skipped; (plant_id, timestamp) pairs already stored
+    are not inserted again. Sync route: the upload is streamed from its spool file.
+    """
+    try:
+        records = backfill.read_upload(file.file, file.filename or "", format)
+        result = backfill.import_telemetry(db, records, default_plant_id=plant_id)
+        db.commit()
+    except (ValueError, RuntimeError) as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return result
+
+
 @router.get("/system/overview")
 def system_overview(db: Session = Depends(get_db)):
     return {
@@ -50,7 +105,7 @@ def system_overview(db: Session = Depends(get_db)):
 
 
 @router.get("/dashboard/system-overview")
-def dashboard_system_overview(db: Session = Depends(get_db)):
+def dashboard_system_overview(db: Session = Depends(get_read_db)):
     now = datetime.utcnow()
     last_24h = now - timedelta(hours=24)
     today_start = datetime.combine(now.date(), datetime.min.time())
@@ -2,18 +2,25 @@ from datetime import datetime
 from typing import Optional
 
 import requests
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, ConfigDict
 
 from config import SUPABASE_DREAM_BUCKET
-from database import get_db
-from models import DreamImageRecord, Plant, SensorRecord, WeightRecord, AnalysisResult
+from database import get_async_db, get_async_read_db
+from models import DreamImageRecord, Plant, PlantLatestState, SensorRecord, WeightRecord, AnalysisResult
 from services.llm_service import LLMService
+from services.response_cache import etag_matches
 from services.storage import upload_bytes
+from utils.time_utils import to_utc_naive
 
 router = APIRouter()
 
+DREAMS_PAGE_SIZE = 100
+DREAMS_MAX_PAGE_SIZE = 500
+
 llm_service = LLMService()
 
 
@@ -21,31 +28,11 @@ class DreamCreate(BaseModel):
     plant_id: int
 
 
-def _build_environment(db: Session, dream: DreamImageRecord) -> dict:
+def _environment(temp, light, soil_raw, weight) -> dict:
     """
-    Build environment info from linked sensor/weight records.
+    Environment info from the linked sensor/weight records.
     """
-    temp = light = soil_raw = soil_pct = weight = None
-    if dream.sensor_record_id:
-        sensor = (
-            db.query(SensorRecord)
-            .filter(SensorRecord.id == dream.sensor_record_id)
-            .first()
-        )
-        if sensor:
-            temp = sensor.temperature
-            light = sensor.light
-            soil_raw = sensor.soil_moisture
-            if soil_raw is not None:
-                soil_pct = (255.0 - soil_raw) / 255.0 * 100.0
-    if dream.weight_record_id:
-        w = (
-            db.query(WeightRecord)
-            .filter(WeightRecord.id == dream.weight_record_id)
-            .first()
-        )
-        if w:
-            weight = w.weight
+    soil_pct = (255.0 - soil_raw) / 255.0 * 100.0 if soil_raw is not None else None
     return {
         "temperature": temp,
         "light": light,
@@ -55,6 +42,31 @@ def _build_environment(db: Session, dream: DreamImageRecord) -> dict:
     }
 
 
+async def _dreams_with_environment(db: AsyncSession, query) -> list:
+    """
+    Run a DreamImageRecord select with the linked sensor/weight values outer-joined
+    in, so any number of dreams costs one query.
+    """
+    rows = await db.execute(
+        query.add_columns(
+            SensorRecord.temperature, SensorRecord.light, SensorRecord.soil_moisture, WeightRecord.weight
+        )
+        .outerjoin(SensorRecord, SensorRecord.id == DreamImageRecord.sensor_record_id)
+        .outerjoin(WeightRecord, WeightRecord.id == DreamImageRecord.weight_record_id)
+    )
+    return [
+        {
+            "id": r.id,
+            "plant_id": r.plant_id,
+            "file_path": r.file_path,
+            "description": r.description,
+            "created_at": r.created_at,
+            "environment": _environment(temp, light, soil_raw, weight),
+        }
+        for r, temp, light, soil_raw, weight in rows
+    ]
+
+
 class DreamOut(BaseModel):
     id: int
     plant_id: int
@@ -66,40 +78,12 @@ class DreamOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-@router.post("/dreams", response_model=DreamOut)
-def create_dream_image(payload: DreamCreate, db: Session = Depends(get_db)):
-    plant = db.query(Plant).filter(Plant.id == payload.plant_id).first()
-    if not plant:
-        raise HTTPException(status_code=400, detail=f"Plant {payload.plant_id} does not exist.")
-
-    # Gather latest sensor/weight rows and analysis as defaults
-    latest_sensor_row = (
-        db.query(SensorRecord)
-        .filter(SensorRecord.plant_id == payload.plant_id)
-        .order_by(SensorRecord.timestamp.desc())
-        .first()
-    )
-    latest_weight_row = (
-        db.query(WeightRecord)
-        .filter(WeightRecord.plant_id == payload.plant_id, WeightRecord.weight.isnot(None))
-        .order_by(WeightRecord.timestamp.desc())
-        .first()
-    )
-    latest_analysis = (
-        db.query(AnalysisResult)
-        .filter(AnalysisResult.plant_id == payload.plant_id)
-        .order_by(AnalysisResult.created_at.desc())
-        .first()
-    )
-    sensor_payload = {
-        "temperature": latest_sensor_row.temperature if latest_sensor_row else None,
-        "light": latest_sensor_row.light if latest_sensor_row else None,
-        "soil_moisture": latest_sensor_row.soil_moisture if latest_sensor_row else None,
-        "weight": latest_weight_row.weight if latest_weight_row else None,
-        "health_status": latest_analysis.full_analysis if latest_analysis else None,
-    }
-
-    dream_result = llm_service.generate_dream_image(payload.plant_id, sensor_payload)
+def _generate_and_store(plant_id: int, sensor_payload: dict):
+    """
+    Blocking LLM call + Supabase upload; runs in the threadpool from the async route.
+    Returns (file_path, description).
+    """
+    dream_result = llm_service.generate_dream_image(plant_id, sensor_payload)
     dream_bytes = dream_result.get("data")
     ext = dream_result.get("ext", "png")
     description = dream_result.get("describe") or dream_result.get("description")
@@ -111,7 +95,7 @@ def create_dream_image(payload: DreamCreate, db: Session = Depends(get_db)):
     def _upload_bytes(bytes_data: bytes, ext_hint: str) -> str:
         ts = int(datetime.utcnow().timestamp())
         ext_clean = ext_hint.lstrip(".") or "png"
-        storage_path = f"{payload.plant_id}/{ts}.{ext_clean}"
+        storage_path = f"{plant_id}/{ts}.{ext_clean}"
         public_url = upload_bytes(
             SUPABASE_DREAM_BUCKET,
             storage_path,
@@ -124,7 +108,7 @@ def create_dream_image(payload: DreamCreate, db: Session = Depends(get_db)):
     if dream_bytes:
         ts = int(datetime.utcnow().timestamp())
         ext_clean = ext.lstrip(".") or "png"
-        storage_path = f"{payload.plant_id}/{ts}.{ext_clean}"
+        storage_path = f"{plant_id}/{ts}.{ext_clean}"
 
         try:
             public_url = upload_bytes(
@@ -162,45 +146,121 @@ def create_dream_image(payload: DreamCreate, db: Session = Depends(get_db)):
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"download/upload failed: {exc}") from exc
 
+    return file_path, description
+
+
+@router.post("/dreams", response_model=DreamOut)
+async def create_dream_image(payload: DreamCreate, db: AsyncSession = Depends(get_async_db)):
+    plant = await db.get(Plant, payload.plant_id)
+    if not plant:
+        raise HTTPException(status_code=400, detail=f"Plant {payload.plant_id} does not exist.")
+
+    # Latest readings and analysis as defaults (primary-key lookups)
+    state = await db.get(PlantLatestState, payload.plant_id)
+    latest_analysis = await db.get(AnalysisResult, state.analysis_id) if state and state.analysis_id else None
+    sensor_payload = {
+        "temperature": state.temperature if state else None,
+        "light": state.light if state else None,
+        "soil_moisture": state.soil_moisture if state else None,
+        "weight": state.weight if state else None,
+        "health_status": latest_analysis.full_analysis if latest_analysis else None,
+    }
+
+    # End the read transaction so no pooled connection is held during the slow LLM call;
+    # the LLM + storage calls are blocking HTTP, so keep them off the event loop.
+    await db.commit()
+    file_path, description = await run_in_threadpool(_generate_and_store, payload.plant_id, sensor_payload)
+
     record = DreamImageRecord(
         plant_id=payload.plant_id,
-        sensor_record_id=latest_sensor_row.id if latest_sensor_row else None,
-        weight_record_id=latest_weight_row.id if latest_weight_row else None,
+        sensor_record_id=state.sensor_record_id if state else None,
+        weight_record_id=state.weight_record_id if state else None,
         file_path=file_path,
         description=description,
         created_at=datetime.utcnow(),
     )
 
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
 
-    return {
-        "id": record.id,
-        "plant_id": record.plant_id,
-        "file_path": record.file_path,
-        "description": record.description,
-        "created_at": record.created_at,
-        "environment": _build_environment(db, record),
-    }
+    return (await _dreams_with_environment(db, select(DreamImageRecord).where(DreamImageRecord.id == record.id)))[0]
+
+
+def _parse_since(since: str):
+    """`since` is a dream id (digits) or an ISO timestamp (UTC if naive)."""
+    since = since.strip()
+    if since.isdigit():
+        return DreamImageRecord.id > int(since)
+    try:
+        ts = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be a dream id or an ISO timestamp")
+    return DreamImageRecord.created_at > to_utc_naive(ts)
+
+
+async def _gallery_etag(db: AsyncSession, plant_id: int) -> str:
+    # Dreams are append-only, so the newest id identifies the gallery state.
+    max_id = await db.scalar(select(func.max(DreamImageRecord.id)).where(DreamImageRecord.plant_id == plant_id))
+    return f'"dreams-{plant_id}-{max_id or 0}"'
+
+
+@router.get("/dreams/{plant_id}/latest", response_model=DreamOut)
+async def get_latest_dream(
+    plant_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)
+):
+    """Newest dream only; 304 while If-None-Match still matches the gallery ETag."""
+    etag = await _gallery_etag(db, plant_id)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    dreams = await _dreams_with_environment(
+        db,
+        select(DreamImageRecord)
+        .where(DreamImageRecord.plant_id == plant_id)
+        .order_by(DreamImageRecord.created_at.desc(), DreamImageRecord.id.desc())
+        .limit(1),
+    )
+    if not dreams:
+        raise HTTPException(status_code=404, detail="No dreams for this plant")
+    response.headers["ETag"] = etag
+    return dreams[0]
 
 
 @router.get("/dreams/{plant_id}", response_model=list[DreamOut])
-def list_dream_images(plant_id: int, db: Session = Depends(get_db)):
-    records = (
-        db.query(DreamImageRecord)
-        .filter(DreamImageRecord.plant_id == plant_id)
-        .order_by(DreamImageRecord.created_at.desc())
-        .all()
+async def list_dream_images(
+    plant_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[str] = Query(None, description="only dreams newer than this dream id or ISO timestamp"),
+    limit: int = Query(DREAMS_PAGE_SIZE, ge=1, le=DREAMS_MAX_PAGE_SIZE),
+    before_id: Optional[int] = Query(None, description="keyset cursor: the last id of the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Newest first, `limit` per page. The next page is `?before_id=<X-Next-Before-Id>`;
+    the header is absent on the last page.
+    """
+    etag = await _gallery_etag(db, plant_id)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    query = select(DreamImageRecord).where(DreamImageRecord.plant_id == plant_id)
+    if since:
+        query = query.where(_parse_since(since))
+    if before_id is not None:
+        cursor_at = await db.scalar(
+            select(DreamImageRecord.created_at).where(
+                DreamImageRecord.id == before_id, DreamImageRecord.plant_id == plant_id
+            )
+        )
+        if cursor_at is None:
+            raise HTTPException(status_code=400, detail=f"Unknown before_id {before_id} for plant {plant_id}")
+        # (created_at, id) keyset: stable under equal timestamps, walks the (plant_id, created_at) index
+        query = query.where(tuple_(DreamImageRecord.created_at, DreamImageRecord.id) < tuple_(cursor_at, before_id))
+    dreams = await _dreams_with_environment(
+        db,
+        query.order_by(DreamImageRecord.created_at.desc(), DreamImageRecord.id.desc()).limit(limit + 1),
     )
-    return [
-        {
-            "id": r.id,
-            "plant_id": r.plant_id,
-            "file_path": r.file_path,
-            "description": r.description,
-            "created_at": r.created_at,
-            "environment": _build_environment(db, r),
-        }
-        for r in records
-    ]
+    response.headers["ETag"] = etag
+    if len(dreams) > limit:
+        dreams = dreams[:limit]
+        response.headers["X-Next-Before-Id"] = str(dreams[-1]["id"])
+    return dreams
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_read_sessionmaker, get_async_read_db
+from models import Plant
+from services.export import COLUMNAR_FORMATS, METRICS, export_query, pa, stream_columnar
+from utils.time_utils import to_utc_naive
+
+router = APIRouter()
+
+
+async def _telemetry_export(fmt, plant_ids, metrics, start_time, end_time, db: AsyncSession):
+    if pa is None:
+        raise HTTPException(status_code=501, detail="Columnar export requires pyarrow on the server")
+    metric_list = list(METRICS) if not metrics else [m.strip() for m in metrics.split(",") if m.strip()]
+    unknown = [m for m in metric_list if m not in METRICS]
+    if not metric_list or unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported metric(s): {', '.join(unknown) or metrics}")
+    if plant_ids:
+        try:
+            ids = sorted({int(p) for p in plant_ids.split(",") if p.strip()})
+        except ValueError:
+            raise HTTPException(status_code=400, detail="plant_ids must be comma-separated integers")
+    else:
+        ids = list((await db.scalars(select(Plant.id).order_by(Plant.id))).all())
+
+    query = export_query(ids, metric_list, to_utc_naive(start_time), to_utc_naive(end_time))
+    body = await stream_columnar(await async_read_sessionmaker(), query, metric_list, fmt)
+    return StreamingResponse(
+        body,
+        media_type=COLUMNAR_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="telemetry.{fmt}"'},
+    )
+
+
+@router.get("/export/telemetry.parquet")
+async def export_telemetry_parquet(
+    plant_ids: Optional[str] = Query(None, description="comma-separated plant ids; default all plants"),
+    metrics: Optional[str] = Query(None, description="comma-separated temperature|light|soil_moisture|weight; default all"),
+    start_time: Optional[datetime] = Query(None, description="ISO datetime (UTC if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="ISO datetime (UTC if no offset)"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Parquet file: plant_id (int32), timestamp (UTC, µs), one float64 column per metric;
+    one zstd row group per streamed batch.
+    """
+    return await _telemetry_export("parquet", plant_ids, metrics, start_time, end_time, db)
+
+
+@router.get("/export/telemetry.arrow")
+async def export_telemetry_arrow(
+    plant_ids: Optional[str] = Query(None, description="comma-separated plant ids; default all plants"),
+    metrics: Optional[str] = Query(None, description="comma-separated temperature|light|soil_moisture|weight; default all"),
+    start_time: Optional[datetime] = Query(None, description="ISO datetime (UTC if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="ISO datetime (UTC if no offset)"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same columns as the Parquet export, as an Arrow IPC stream (record batch at a time)."""
+    return await _telemetry_export("arrow", plant_ids, metrics, start_time, end_time, db)
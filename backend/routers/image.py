@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from config import SUPABASE_PLANT_BUCKET
 from database import get_db
 from models import ImageRecord
+from services import latest_state
 from services.storage import upload_bytes
 
 router = APIRouter()
@@ -40,6 +41,8 @@ async def upload_image(
     )
 
     db.add(record)
+    db.flush()
+    latest_state.record_image(db, record)
     db.commit()
     db.refresh(record)
 
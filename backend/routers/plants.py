@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+
+import numpy as np
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 from fastapi.responses import StreamingResponse
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from sqlalchemy.orm import Session
 
-from sqlalchemy import func
+from sqlalchemy import func, select, tuple_
 
 from pydantic import BaseModel, ConfigDict
 
@@ -14,36 +20,24 @@ from datetime import datetime, timedelta
 
 
 
-from database import get_db
+from database import async_read_sessionmaker, get_async_db, get_async_read_db
 
-from models import Plant, AnalysisResult, SensorRecord, WeightRecord
+from models import Plant, AnalysisResult, PlantLatestState, SensorRecord, SensorRollupDaily, WeightRecord
 
 from external_modules.growth import analyzer as growth_analyzer
 
+from external_modules.growth import kernels as growth_kernels
 
+from external_modules.growth import features as daily_features
 
-router = APIRouter()
+from services import export, response_cache
 
+from utils.time_utils import to_utc_naive
 
 
-def _latest_sensor_value(db: Session, plant_id: int, column):
-    row = (
-        db.query(column, SensorRecord.timestamp)
-        .filter(SensorRecord.plant_id == plant_id, column.isnot(None))
-        .order_by(SensorRecord.timestamp.desc())
-        .first()
-    )
-    return (row[0], row[1]) if row else (None, None)
 
+router = APIRouter()
 
-def _latest_weight_value(db: Session, plant_id: int):
-    row = (
-        db.query(WeightRecord.weight, WeightRecord.timestamp)
-        .filter(WeightRecord.plant_id == plant_id, WeightRecord.weight.isnot(None))
-        .order_by(WeightRecord.timestamp.desc())
-        .first()
-    )
-    return (row[0], row[1]) if row else (None, None)
 
 
 def _soil_pct(raw: Optional[float]) -> Optional[float]:
@@ -107,7 +101,7 @@ class PlantStatusOut(BaseModel):
 
 @router.post("/plants", response_model=PlantOut)
 
-def create_plant(payload: PlantCreate, db: Session = Depends(get_db)):
+async def create_plant(payload: PlantCreate, db: AsyncSession = Depends(get_async_db)):
 
     plant = Plant(
 
@@ -119,9 +113,9 @@ def create_plant(payload: PlantCreate, db: Session = Depends(get_db)):
 
     db.add(plant)
 
-    db.commit()
+    await db.commit()
 
-    db.refresh(plant)
+    await db.refresh(plant)
 
     return plant
 
@@ -131,9 +125,9 @@ def create_plant(payload: PlantCreate, db: Session = Depends(get_db)):
 
 @router.get("/plants", response_model=list[PlantOut])
 
-def list_plants(db: Session = Depends(get_db)):
+async def list_plants(db: AsyncSession = Depends(get_async_db)):
 
-    plants = db.query(Plant).all()
+    plants = (await db.scalars(select(Plant))).all()
 
     return plants
 
@@ -143,9 +137,9 @@ def list_plants(db: Session = Depends(get_db)):
 
 @router.get("/plants/by-nickname/{nickname}", response_model=PlantOut)
 
-def get_plant_by_nickname(nickname: str, db: Session = Depends(get_db)):
+async def get_plant_by_nickname(nickname: str, db: AsyncSession = Depends(get_async_db)):
 
-    plant = db.query(Plant).filter(Plant.nickname == nickname).first()
+    plant = await db.scalar(select(Plant).where(Plant.nickname == nickname).limit(1))
 
     if not plant:
 
@@ -159,11 +153,11 @@ def get_plant_by_nickname(nickname: str, db: Session = Depends(get_db)):
 
 @router.get("/plants/by-status", response_model=list[PlantStatusOut])
 
-def list_plants_by_status(
+async def list_plants_by_status(
 
     status: str = Query(..., description="growth status: normal|slow|stagnant|stressed"),
 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 
 ):
 
@@ -171,7 +165,7 @@ def list_plants_by_status(
 
     subq = (
 
-        db.query(
+        select(
 
             AnalysisResult.plant_id,
 
@@ -189,25 +183,27 @@ def list_plants_by_status(
 
     rows = (
 
-        db.query(Plant, AnalysisResult.growth_status)
+        await db.execute(
 
-        .join(subq, Plant.id == subq.c.plant_id)
+            select(Plant, AnalysisResult.growth_status)
 
-        .join(
+            .join(subq, Plant.id == subq.c.plant_id)
 
-            AnalysisResult,
+            .join(
 
-            (AnalysisResult.plant_id == subq.c.plant_id)
+                AnalysisResult,
 
-            & (AnalysisResult.created_at == subq.c.max_ts),
+                (AnalysisResult.plant_id == subq.c.plant_id)
 
-        )
+                & (AnalysisResult.created_at == subq.c.max_ts),
 
-        .filter(AnalysisResult.growth_status == status)
+            )
 
-        .all()
+            .where(AnalysisResult.growth_status == status)
 
-    )
+        )
+
+    ).all()
 
 
 
@@ -234,21 +230,16 @@ def list_plants_by_status(
 
 
 @router.get("/plants/{plant_id}/latest-summary")
-def get_latest_summary(plant_id: int, db: Session = Depends(get_db)):
+async def get_latest_summary(plant_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Latest sensor snapshot (temperature, light, soil_moisture %, weight) and latest suggestions.
     """
-    temp_val, temp_ts = _latest_sensor_value(db, plant_id, SensorRecord.temperature)
-    light_val, light_ts = _latest_sensor_value(db, plant_id, SensorRecord.light)
-    soil_raw, soil_ts = _latest_sensor_value(db, plant_id, SensorRecord.soil_moisture)
-    weight_val, weight_ts = _latest_weight_value(db, plant_id)
-
-    latest_analysis = (
-        db.query(AnalysisResult)
-        .filter(AnalysisResult.plant_id == plant_id)
-        .order_by(AnalysisResult.created_at.desc())
-        .first()
-    )
+    return await response_cache.cached_json(request, plant_id, lambda: _latest_summary(db, plant_id))
+
+
+async def _latest_summary(db: AsyncSession, plant_id: int) -> Dict[str, Any]:
+    state = await db.get(PlantLatestState, plant_id) or PlantLatestState(plant_id=plant_id)
+    latest_analysis = await db.get(AnalysisResult, state.analysis_id) if state.analysis_id else None
 
     def _entry(value, ts):
         return {"value": value, "timestamp": ts.isoformat() if ts else None}
@@ -256,28 +247,46 @@ def get_latest_summary(plant_id: int, db: Session = Depends(get_db)):
     return {
         "plant_id": plant_id,
         "sensors": {
-            "temperature": _entry(temp_val, temp_ts),
-            "light": _entry(light_val, light_ts),
-            "soil_moisture": _entry(_soil_pct(soil_raw), soil_ts),
-            "weight": _entry(weight_val, weight_ts),
+            "temperature": _entry(state.temperature, state.temperature_at),
+            "light": _entry(state.light, state.light_at),
+            "soil_moisture": _entry(_soil_pct(state.soil_moisture), state.soil_moisture_at),
+            "weight": _entry(state.weight, state.weight_at),
         },
         "suggestions": latest_analysis.suggestions if latest_analysis else None,
     }
 
 
+def _encode_cursor(ts: datetime, record_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{record_id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, record_id = raw.split("|")
+        return datetime.fromisoformat(ts), int(record_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+
 @router.get("/plants/{plant_id}/raw-data")
 
-def get_raw_sensor_data(
+async def get_raw_sensor_data(
 
     plant_id: int,
 
     sensor_type: str = Query(..., description="temperature|light|soil_moisture|weight"),
 
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, description="OFFSET paging; prefer `cursor` beyond the first page"),
 
     page_size: int = Query(25, ge=1, le=100),
 
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous response"),
+
+    total: str = Query("approx", pattern="^(exact|approx|none)$", description="approx: from rollup counts"),
+
+    db: AsyncSession = Depends(get_async_read_db),
 
 ):
 
@@ -303,19 +312,54 @@ def get_raw_sensor_data(
 
 
 
-    base_q = (
+    base_q = select(column, ts_col, model_cls.id).where(model_cls.plant_id == plant_id, column.isnot(None))
 
-        db.query(column, ts_col)
+    if total == "exact":
 
-        .filter(model_cls.plant_id == plant_id, column.isnot(None))
+        total_count = await db.scalar(select(func.count()).select_from(base_q.subquery()))
 
-        .order_by(ts_col.desc())
+    elif total == "approx":
 
-    )
+        # Rollups count the non-null readings per metric, so this is one small index range.
+        # Rollups outlive the raw retention window (they are the long-term history), so only
+        # days from the oldest raw row still stored are counted.
+        oldest = select(func.min(ts_col)).where(model_cls.plant_id == plant_id).scalar_subquery()
+        total_count = await db.scalar(
+            select(func.coalesce(func.sum(SensorRollupDaily.count), 0)).where(
+                SensorRollupDaily.plant_id == plant_id,
+                SensorRollupDaily.metric == sensor_type,
+                SensorRollupDaily.bucket_start >= func.date_trunc("day", oldest),
+            )
+        )
+
+    else:
+
+        total_count = None
+
+
+
+    # Keyset on (timestamp, id): each page is an index range scan, however deep
+    page_q = base_q.order_by(ts_col.desc(), model_cls.id.desc())
+
+    if cursor:
+
+        cursor_ts, cursor_id = _decode_cursor(cursor)
 
-    total = base_q.count()
+        page_q = page_q.where(tuple_(ts_col, model_cls.id) < tuple_(cursor_ts, cursor_id))
 
-    rows = base_q.offset((page - 1) * page_size).limit(page_size).all()
+    elif page > 1:
+
+        page_q = page_q.offset((page - 1) * page_size)
+
+    rows = (await db.execute(page_q.limit(page_size + 1))).all()
+
+    next_cursor = None
+
+    if len(rows) > page_size:
+
+        rows = rows[:page_size]
+
+        next_cursor = _encode_cursor(rows[-1][1], rows[-1][2])
 
 
 
@@ -331,7 +375,7 @@ def get_raw_sensor_data(
 
         }
 
-        for val, ts in rows
+        for val, ts, _ in rows
 
     ]
 
@@ -351,11 +395,15 @@ def get_raw_sensor_data(
 
         "date": date_label,
 
-        "page": page,
+        "page": None if cursor else page,
 
         "page_size": page_size,
 
-        "total": total,
+        "total": total_count,
+
+        "total_approximate": total == "approx",
+
+        "next_cursor": next_cursor,
 
         "records": records,
 
@@ -365,135 +413,170 @@ def get_raw_sensor_data(
 
 
 
-@router.get("/plants/{plant_id}/raw-data/export")
+def _export_range(date: Optional[str], start_time: Optional[str], end_time: Optional[str]):
 
-def export_raw_sensor_data(
+    if date:
 
-    plant_id: int,
+        from datetime import date as date_cls
 
-    sensor_type: str = Query(..., description="temperature|light|soil_moisture|weight"),
+        try:
 
-    date: Optional[str] = Query(None, description="ISO date YYYY-MM-DD"),
+            d = date_cls.fromisoformat(date)
 
-    start_time: Optional[str] = Query(None, description="ISO datetime start"),
+        except ValueError:
 
-    end_time: Optional[str] = Query(None, description="ISO datetime end"),
+            raise HTTPException(status_code=400, detail="Invalid date format, expected YYYY-MM-DD")
 
-    db: Session = Depends(get_db),
+        return datetime.combine(d, datetime.min.time()), datetime.combine(d, datetime.max.time())
 
-):
+    try:
 
-    sensor_map = {
+        start_dt = to_utc_naive(datetime.fromisoformat(start_time)) if start_time else None
 
-        "temperature": (SensorRecord, SensorRecord.temperature, SensorRecord.timestamp, "Temperature", "Â°C"),
+        end_dt = to_utc_naive(datetime.fromisoformat(end_time)) if end_time else None
 
-        "light": (SensorRecord, SensorRecord.light, SensorRecord.timestamp, "Light", "lux"),
+    except ValueError:
 
-        "soil_moisture": (SensorRecord, SensorRecord.soil_moisture, SensorRecord.timestamp, "SoilMoisture", "raw"),
+        raise HTTPException(status_code=400, detail="Invalid datetime format")
 
-        "weight": (WeightRecord, WeightRecord.weight, WeightRecord.timestamp, "Weight", "g"),
+    return start_dt, end_dt
 
-    }
 
-    if sensor_type not in sensor_map:
 
-        raise HTTPException(status_code=400, detail="Unsupported sensor_type")
+async def _export_response(plant_ids, sensor_type, fmt, gzip, date, start_time, end_time, single_plant):
 
+    metrics = list(export.METRICS) if sensor_type == "all" else [m.strip() for m in sensor_type.split(",") if m.strip()]
 
+    if not metrics or any(m not in export.METRICS for m in metrics):
 
-    model_cls, column, ts_col, label, unit = sensor_map[sensor_type]
+        raise HTTPException(status_code=400, detail="Unsupported sensor_type")
 
+    if fmt not in export.FORMATS:
 
+        raise HTTPException(status_code=400, detail=f"Unsupported format, expected one of {', '.join(export.FORMATS)}")
 
-    # Time range
+    start_dt, end_dt = _export_range(date, start_time, end_time)
 
-    if date:
+    # Original single-metric CSV layout stays as-is for the web UI
+    legacy = single_plant and len(metrics) == 1 and fmt == "csv"
 
-        from datetime import date as date_cls
+    query = export.export_query(plant_ids, metrics, start_dt, end_dt)
 
-        try:
+    body = await export.stream_export(await async_read_sessionmaker(), query, metrics, fmt, legacy, gzip)
 
-            d = date_cls.fromisoformat(date)
+    headers = {"Content-Encoding": "gzip"} if gzip else {}
 
-        except ValueError:
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
 
-            raise HTTPException(status_code=400, detail="Invalid date format, expected YYYY-MM-DD")
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
-        start_dt = datetime.combine(d, datetime.min.time())
 
-        end_dt = datetime.combine(d, datetime.max.time())
 
-    else:
+@router.get("/plants/raw-data/export")
 
-        try:
+async def export_raw_sensor_data_multi(
 
-            start_dt = datetime.fromisoformat(start_time) if start_time else None
+    plant_ids: Optional[str] = Query(None, description="comma-separated plant ids; default all plants"),
 
-            end_dt = datetime.fromisoformat(end_time) if end_time else None
+    sensor_type: str = Query("all", description="comma-separated temperature|light|soil_moisture|weight, or all"),
 
-        except ValueError:
+    fmt: str = Query("csv", alias="format", description="csv|ndjson"),
 
-            raise HTTPException(status_code=400, detail="Invalid datetime format")
+    gzip: bool = Query(False, description="gzip the response body (Content-Encoding: gzip)"),
 
+    date: Optional[str] = Query(None, description="ISO date YYYY-MM-DD"),
 
+    start_time: Optional[str] = Query(None, description="ISO datetime start"),
 
-    q = (
+    end_time: Optional[str] = Query(None, description="ISO datetime end"),
 
-        db.query(column, ts_col)
+    db: AsyncSession = Depends(get_async_read_db),
 
-        .filter(model_cls.plant_id == plant_id, column.isnot(None))
+):
 
-        .order_by(ts_col.asc())
+    """
+    Wide rows (plant_id, timestamp, one column per metric) for many plants, streamed
+    through a server-side cursor.
+    """
 
-    )
+    if plant_ids:
 
-    if start_dt:
+        try:
 
-        q = q.filter(ts_col >= start_dt)
+            ids = sorted({int(p) for p in plant_ids.split(",") if p.strip()})
 
-    if end_dt:
+        except ValueError:
 
-        q = q.filter(ts_col <= end_dt)
+            raise HTTPException(status_code=400, detail="plant_ids must be comma-separated integers")
 
+    else:
 
+        ids = list((await db.scalars(select(Plant.id).order_by(Plant.id))).all())
 
-    rows = q.all()
+    return await _export_response(ids, sensor_type, fmt, gzip, date, start_time, end_time, single_plant=False)
 
 
 
-    def _iter_csv():
+@router.get("/plants/{plant_id}/raw-data/export")
 
-        yield "time,sensor_type,value,unit\n"
+async def export_raw_sensor_data(
 
-        for val, ts in rows:
+    plant_id: int,
 
-            time_label = ts.strftime("%H:%M")
+    sensor_type: str = Query(..., description="temperature|light|soil_moisture|weight, comma-separated, or all"),
 
-            yield f"{time_label},{label},{val},{unit}\n"
+    fmt: str = Query("csv", alias="format", description="csv|ndjson"),
 
+    gzip: bool = Query(False, description="gzip the response body (Content-Encoding: gzip)"),
 
+    date: Optional[str] = Query(None, description="ISO date YYYY-MM-DD"),
 
-    return StreamingResponse(_iter_csv(), media_type="text/csv")
+    start_time: Optional[str] = Query(None, description="ISO datetime start"),
 
+    end_time: Optional[str] = Query(None, description="ISO datetime end"),
 
+):
 
+    """
+    Streamed through a server-side cursor in constant memory. A single metric as CSV
+    keeps the original `time,sensor_type,value,unit` layout; several metrics give
+    wide rows.
+    """
 
+    return await _export_response([plant_id], sensor_type, fmt, gzip, date, start_time, end_time, single_plant=True)
 
-@router.get("/plants/{plant_id}/growth-analytics")
 
-def get_growth_analytics(plant_id: int, days: int = 7, db: Session = Depends(get_db)):
 
-    """
 
-    Growth analytics visualization data for last N days (default 7).
 
+@router.get("/plants/{plant_id}/growth-analytics")
+async def get_growth_analytics(
+    plant_id: int, request: Request, days: int = 7, db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Growth analytics visualization data for last N days (default 7).
+    The analyzer is sync SQLAlchemy code, so it runs on the async connection via run_sync.
     """
+    return await response_cache.cached_json(
+        request,
+        plant_id,
+        lambda: db.run_sync(_growth_analytics, plant_id, days),
+        variant=datetime.utcnow().date().isoformat(),
+        read_db=db,
+    )
+
+
+def _growth_analytics(db: Session, plant_id: int, days: int) -> Dict[str, Any]:
 
     days = max(1, min(days, 14))
     now_dt = datetime.utcnow()
     now_date = now_dt.date()
     start_date = now_date - timedelta(days=days - 1)
-    ref_points, _ = growth_analyzer._compute_daily_reference_points(plant_id, db, days=days)
+    # Everything below reads these daily features (stored closed days + today in memory)
+    feature_rows = daily_features.load(
+        db, [plant_id], now_date - timedelta(days=max(days, growth_analyzer.ANALYSIS_WINDOW_DAYS)), now=now_dt
+    )[plant_id]
+    ref_points, _ = growth_analyzer._compute_daily_reference_points(plant_id, db, days=days, feature_rows=feature_rows)
 
 
 
@@ -506,50 +589,12 @@ def get_growth_analytics(plant_id: int, days: int = 7, db: Session = Depends(get
 
 
     # Actual daily avg weight
-
-    weight_rows = (
-
-        db.query(WeightRecord.timestamp, WeightRecord.weight)
-
-        .filter(
-
-            WeightRecord.plant_id == plant_id,
-
-            WeightRecord.timestamp >= datetime.combine(start_date, datetime.min.time()),
-
-            WeightRecord.weight.isnot(None),
-
-        )
-
-        .order_by(WeightRecord.timestamp.asc())
-
-        .all()
-
-    )
-
-    daily_actual: dict[datetime.date, list[float]] = {}
-
-    for ts, w in weight_rows:
-
-        d = ts.date()
-
-        if d not in daily_actual:
-
-            daily_actual[d] = []
-
-        daily_actual[d].append(w)
-
-
+    actual_map = {r["day"]: r["weight_avg"] for r in feature_rows}
 
     daily_weight = []
-
     for i in range(days):
-
         d = start_date + timedelta(days=i)
-
-        actual_vals = daily_actual.get(d, [])
-
-        actual_avg = sum(actual_vals) / len(actual_vals) if actual_vals else None
+        actual_avg = actual_map.get(d)
 
         daily_weight.append(
 
@@ -567,253 +612,52 @@ def get_growth_analytics(plant_id: int, days: int = 7, db: Session = Depends(get
 
 
 
-    # Growth rate 3d series: reuse reference points to compute rolling 3-day slope
-
-    growth_rate_series = []
-
+    # Growth rate 3d series: rolling 3-day slope over the reference points
     ref_sorted = sorted(ref_points, key=lambda p: p["date"])
+    slopes = growth_kernels.rolling_slopes(
+        growth_kernels.day_ordinals([p["date"] for p in ref_sorted]),
+        np.array([p["weight"] for p in ref_sorted], dtype=np.float64),
+        window=3,
+    )
+    growth_rate_series = [
+        {
+            "date": p["date"].isoformat(),
+            "growth_rate_pct": None if np.isnan(rate) else float(rate),  # grams/day; front-end can scale if needed
+        }
+        for p, rate in zip(ref_sorted, slopes)
+    ]
 
-    try:
-
-        g_norm = growth_analyzer.MIN_NORMAL_GROWTH
-
-        g_slow = growth_analyzer.MIN_SLOW_GROWTH
-
-    except Exception:
-
-        g_norm, g_slow = 0.2, 0.05
-
-
-
-    def _rate_to_score(rate: Optional[float]) -> float:
-
-        if rate is None:
-
-            return 5.0
-
-        if rate <= 0:
-
-            return 9.0
-
-        if rate < g_slow:
-
-            return 7.0
-
-        if rate < g_norm:
-
-            return 5.0
-
-        return 1.0
-
-
-
-    for idx in range(len(ref_sorted)):
-
-        window = ref_sorted[max(0, idx - 2): idx + 1]
-
-        if len(window) >= 2:
-
-            first = window[0]
-
-            last = window[-1]
-
-            span_days = (last["date"] - first["date"]).days or 1
-
-            rate = (last["weight"] - first["weight"]) / span_days
-
-            growth_rate_series.append(
-
-                {
-
-                    "date": ref_sorted[idx]["date"].isoformat(),
-
-                    "growth_rate_pct": rate,  # grams/day; front-end can scale if needed
-
-                }
-
-            )
-
-        else:
-
-            growth_rate_series.append(
-
-                {
-
-                    "date": ref_sorted[idx]["date"].isoformat(),
-
-                    "growth_rate_pct": None,
-
-                }
-
-            )
-
-
-
-    # Stress scores: numeric scores based on 24h averages + growth rate
-
-    analysis = growth_analyzer.analyze_growth(plant_id, db)
-
+    # Stress scores: 24h averages as z-scores against the last 7 days, plus growth rate
+    analysis = growth_analyzer.analyze_growth(plant_id, db, feature_rows=feature_rows)
     debug = analysis.get("debug") or {}
-
     sensor_24h = debug.get("sensor_24h") or {}
-
-    avg_temp = sensor_24h.get("avg_temperature")
-
-    avg_light = sensor_24h.get("avg_light")
-
-    avg_soil_norm = sensor_24h.get("avg_soil_moisture")  # normalized 0-1
-
     growth_rate_3d = analysis.get("growth_rate_3d")
 
-
-
-    try:
-
-        ideal_light = growth_analyzer.LIGHT_OPT_MIN
-
-    except Exception:
-
-        ideal_light = 200.0
-
-
-
-    try:
-
-        t_low = growth_analyzer.TEMP_OPT_LOW
-
-        t_high = growth_analyzer.TEMP_OPT_HIGH
-
-    except Exception:
-
-        t_low, t_high = 18.0, 30.0
-
-
-
-    try:
-
-        s_low = growth_analyzer.SOIL_MOIST_LOW
-
-        s_high = growth_analyzer.SOIL_MOIST_HIGH
-
-    except Exception:
-
-        s_low, s_high = 0.25, 0.75
-
-
-
-    # Helper: z-score based stress (|z| scaled to 0-10)
-
-    def _z_score(val: Optional[float], samples: list[float]) -> float:
-
-        if val is None or not samples:
-
-            return 5.0
-
-        mean = sum(samples) / len(samples)
-
-        var = sum((x - mean) ** 2 for x in samples) / max(len(samples), 1)
-
-        std = (var ** 0.5) or 1e-6
-
-        z = abs(val - mean) / std
-
-        return round(min(10.0, z * 2.0), 2)  # z=5 -> 10å?
-
-    # Collect last 7d samples for z-score
-    since_7d = datetime.combine(now_date - timedelta(days=6), datetime.min.time())
-    temp_samples = [
-
-        t for (t,) in db.query(SensorRecord.temperature).filter(
-
-            SensorRecord.plant_id == plant_id,
-
-            SensorRecord.timestamp >= since_7d,
-
-            SensorRecord.temperature.isnot(None),
-
-        ).all()
-
-    ]
-
-    light_samples = [
-
-        l for (l,) in db.query(SensorRecord.light).filter(
-
-            SensorRecord.plant_id == plant_id,
-
-            SensorRecord.timestamp >= since_7d,
-
-            SensorRecord.light.isnot(None),
-
-        ).all()
-
-    ]
-
-    soil_samples = [
-
-        s for (s,) in db.query(SensorRecord.soil_moisture).filter(
-
-            SensorRecord.plant_id == plant_id,
-
-            SensorRecord.timestamp >= since_7d,
-
-            SensorRecord.soil_moisture.isnot(None),
-
-        ).all()
-
+    # Sample mean/std for z-score over the last 7 calendar days (today included)
+    stats_7d = daily_features.merged_sensor_stats(r for r in feature_rows if r["day"] >= now_date - timedelta(days=6))
+    # Normalize soil to 0-1 for scoring: (255 - raw) / 255 shifts the mean and scales std by 1/255
+    soil_raw_stats = stats_7d["soil_moisture"]
+    soil_stats_norm = {"count": soil_raw_stats["count"], "avg": None, "std": None}
+    if soil_raw_stats["count"]:
+        soil_stats_norm["avg"] = (255.0 - soil_raw_stats["avg"]) / 255.0
+        soil_stats_norm["std"] = soil_raw_stats["std"] / 255.0
+
+    # temperature, light, soil (avg_soil_moisture is already normalized 0-1)
+    z_inputs = [
+        (sensor_24h.get("avg_temperature"), stats_7d["temperature"]),
+        (sensor_24h.get("avg_light"), stats_7d["light"]),
+        (sensor_24h.get("avg_soil_moisture"), soil_stats_norm),
     ]
-
-    # Normalize soil to 0-1 for scoring
-
-    soil_samples_norm = [(255.0 - s) / 255.0 for s in soil_samples] if soil_samples else []
-
-    avg_soil_norm_for_score = avg_soil_norm  # already normalized 0-1
-
-
-
-    light_score = max(0.5, _z_score(avg_light, light_samples))
-
-    temp_score = max(0.5, _z_score(avg_temp, temp_samples))
-
-    soil_score = max(0.5, _z_score(avg_soil_norm_for_score, soil_samples_norm))
-
-
-
-    def _score_growth(rate: Optional[float]) -> float:
-
-        if rate is None:
-
-            return 5.0
-
-        try:
-
-            g_norm = growth_analyzer.MIN_NORMAL_GROWTH
-
-            g_slow = growth_analyzer.MIN_SLOW_GROWTH
-
-        except Exception:
-
-            g_norm, g_slow = 0.2, 0.05
-
-        if rate >= g_norm:
-
-            return 0.5
-
-        if rate <= 0:
-
-            return 10.0
-
-        if rate < g_slow:
-
-            return round(6 + (1 - rate / g_slow) * 4, 2)
-
-        return round((1 - (rate - g_slow) / (g_norm - g_slow)) * 5.5 + 0.5, 2)
-
-
-
-    growth_score = max(0.5, _score_growth(growth_rate_3d))
-
-
+    temp_score, light_score, soil_score = growth_kernels.z_stress(
+        growth_kernels.as_float_array([val for val, _ in z_inputs]),
+        growth_kernels.as_float_array([stats["avg"] if stats["count"] else None for _, stats in z_inputs]),
+        growth_kernels.as_float_array([stats["std"] for _, stats in z_inputs]),
+    ).tolist()
+    growth_score = growth_kernels.growth_stress(
+        growth_kernels.as_float_array([growth_rate_3d]),
+        growth_analyzer.MIN_SLOW_GROWTH,
+        growth_analyzer.MIN_NORMAL_GROWTH,
+    ).tolist()[0]
 
     stress_scores = {
 
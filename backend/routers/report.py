@@ -1,16 +1,16 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 import json
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import ImageRecord, SensorRecord, AnalysisResult, Plant, Alert, DreamImageRecord, WeightRecord
+from models import ImageRecord, AnalysisResult, Plant, Alert, DreamImageRecord
 from services.growth_service import GrowthService
 from services.llm_service import LLMService
+from services import latest_state, metrics_snapshot
 from services.scheduler import _run_single_analysis_and_optionals
 
 router = APIRouter()
@@ -25,166 +25,13 @@ if not logger.handlers:
 @router.get("/report/{plant_id}")
 def generate_report(plant_id: int, db: Session = Depends(get_db)):
     logger.info("[report] start generate_report plant_id=%s", plant_id)
-    latest_image: Optional[ImageRecord] = (
-        db.query(ImageRecord)
-        .filter(ImageRecord.plant_id == plant_id)
-        .order_by(ImageRecord.captured_at.desc())
-        .first()
-    )
     plant: Optional[Plant] = db.query(Plant).filter(Plant.id == plant_id).first()
 
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    now = datetime.utcnow()
-
-    agg = (
-        db.query(
-            func.avg(SensorRecord.temperature),
-            func.avg(SensorRecord.light),
-            func.avg(SensorRecord.soil_moisture),
-        )
-        .filter(
-            SensorRecord.plant_id == plant_id,
-            SensorRecord.timestamp >= seven_days_ago,
-        )
-        .one()
-    )
-
-    sensor_summary_7d = {
-        "avg_temperature": agg[0],
-        "avg_light": agg[1],
-        "avg_soil_moisture": agg[2],
-    }
-
-    # Latest sensor & weight
-    latest_sensor = (
-        db.query(SensorRecord)
-        .filter(SensorRecord.plant_id == plant_id)
-        .order_by(SensorRecord.timestamp.desc())
-        .first()
-    )
-    latest_weight = (
-        db.query(WeightRecord)
-        .filter(WeightRecord.plant_id == plant_id)
-        .order_by(WeightRecord.timestamp.desc())
-        .first()
-    )
-
-    # Aggregations for last 24h and 6h/1h
-    since_24h = now - timedelta(hours=24)
-    since_6h = now - timedelta(hours=6)
-    since_1h = now - timedelta(hours=1)
-    today_start = datetime.combine(now.date(), datetime.min.time())
-
-    agg_24h = (
-        db.query(
-            func.min(SensorRecord.temperature),
-            func.max(SensorRecord.temperature),
-            func.avg(SensorRecord.temperature),
-            func.min(SensorRecord.soil_moisture),
-            func.max(SensorRecord.soil_moisture),
-            func.avg(SensorRecord.light),
-            func.sum(SensorRecord.light),
-        )
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_24h)
-        .one()
-    )
-    temp_24h_min, temp_24h_max, temp_24h_avg, soil_24h_min, soil_24h_max, light_24h_avg, light_24h_sum = agg_24h
-
-    temp_6h_avg = (
-        db.query(func.avg(SensorRecord.temperature))
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_6h)
-        .scalar()
-    )
-    light_1h_avg = (
-        db.query(func.avg(SensorRecord.light))
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_1h)
-        .scalar()
-    )
-
-    # Soil trend (24h): compare earliest vs latest in window
-    soil_24h_first = (
-        db.query(SensorRecord.soil_moisture)
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_24h)
-        .order_by(SensorRecord.timestamp.asc())
-        .first()
-    )
-    soil_24h_last = (
-        db.query(SensorRecord.soil_moisture)
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_24h)
-        .order_by(SensorRecord.timestamp.desc())
-        .first()
-    )
-    soil_trend = "stable"
-    if soil_24h_first and soil_24h_last and soil_24h_first[0] is not None and soil_24h_last[0] is not None:
-        diff = soil_24h_last[0] - soil_24h_first[0]
-        if diff <= -5:
-            soil_trend = "down"
-        elif diff >= 5:
-            soil_trend = "up"
-        else:
-            soil_trend = "stable"
-
-    # Weight deltas
-    weight_24h_ref = (
-        db.query(WeightRecord)
-        .filter(WeightRecord.plant_id == plant_id, WeightRecord.timestamp <= since_24h)
-        .order_by(WeightRecord.timestamp.desc())
-        .first()
-    )
-    weight_now = latest_weight.weight if latest_weight else None
-    weight_24h_diff = None
-    water_loss_per_hour = None
-    if weight_now is not None and weight_24h_ref and weight_24h_ref.weight is not None:
-        weight_24h_diff = weight_now - weight_24h_ref.weight
-        hours = max((now - weight_24h_ref.timestamp).total_seconds() / 3600.0, 1e-3)
-        water_loss_per_hour = weight_24h_diff / hours
-
-    hours_since_last_watering = None
-    weight_drop_since_last_watering = None
-    if plant and plant.last_watered_at:
-        hours_since_last_watering = round((now - plant.last_watered_at).total_seconds() / 3600.0, 2)
-        ref_weight = (
-            db.query(WeightRecord)
-            .filter(WeightRecord.plant_id == plant_id, WeightRecord.timestamp >= plant.last_watered_at)
-            .order_by(WeightRecord.timestamp.asc())
-            .first()
-        )
-        if weight_now is not None and ref_weight and ref_weight.weight is not None:
-            weight_drop_since_last_watering = weight_now - ref_weight.weight
-
-    metrics_snapshot = {
-        "temperature": {
-            "temp_now": latest_sensor.temperature if latest_sensor else 0,
-            "temp_6h_avg": temp_6h_avg or 0,
-            "temp_24h_min": temp_24h_min or 0,
-            "temp_24h_max": temp_24h_max or 0,
-        },
-        "soil_moisture": {
-            "soil_now": latest_sensor.soil_moisture if latest_sensor else 0,
-            "soil_24h_min": soil_24h_min or 0,
-            "soil_24h_max": soil_24h_max or 0,
-            "soil_24h_trend": soil_trend,
-        },
-        "light": {
-            "light_now": latest_sensor.light if latest_sensor else 0,
-            "light_1h_avg": light_1h_avg or 0,
-            "light_today_sum": light_24h_sum or 0,
-        },
-        "weight": {
-            "weight_now": weight_now if weight_now is not None else 0,
-            "weight_24h_diff": weight_24h_diff if weight_24h_diff is not None else 0,
-            "water_loss_per_hour": water_loss_per_hour if water_loss_per_hour is not None else 0,
-            "hours_since_last_watering": hours_since_last_watering if hours_since_last_watering is not None else 0,
-            "weight_drop_since_last_watering": weight_drop_since_last_watering if weight_drop_since_last_watering is not None else 0,
-        },
-    }
+    if not plant:
+        raise HTTPException(status_code=404, detail="Plant not found")
 
-    sensor_data_payload = {
-        "temperature": latest_sensor.temperature if latest_sensor else 0,
-        "light": latest_sensor.light if latest_sensor else 0,
-        "soil_moisture": latest_sensor.soil_moisture if latest_sensor else 0,
-        "weight": weight_now if weight_now is not None else 0,
-    }
+    snapshot = metrics_snapshot.build_llm_inputs(db, plant)
+    sensor_summary_7d = snapshot["sensor_summary_7d"]
 
     growth_result = growth_service.analyze(plant_id, db)
 
@@ -200,15 +47,16 @@ def generate_report(plant_id: int, db: Session = Depends(get_db)):
     growth_rate_val = growth_result.get("growth_rate_3d")
     growth_rate_str = "0" if growth_rate_val is None else str(growth_rate_val)
     plant_id_str = str(plant_id)
-    image_url_val = latest_image.file_path if latest_image else None
+    state = latest_state.get_state(db, plant_id)
+    image_url_val = state.image_path if state else None
 
     llm_input = {
         "growth_status": growth_status_val,
         "growth_rate_3d": growth_rate_str,
         "plant_id": plant_id_str,
         "nickname": plant.nickname if plant else "",
-        "metrics_snapshot": metrics_snapshot,
-        "sensor_data": sensor_data_payload,
+        "metrics_snapshot": snapshot["metrics_snapshot"],
+        "sensor_data": snapshot["sensor_data"],
         "stress_factors": growth_result.get("stress_factors") or {
             "humidity_pressure": 0,
             "light_pressure": 0,
@@ -266,6 +114,7 @@ def generate_report(plant_id: int, db: Session = Depends(get_db)):
 
     db.add(result)
     db.flush()
+    latest_state.record_analysis(db, result)
 
     # Update plant species if empty and plant_type is provided
     if plant and plant_type and (plant.species is None or plant.species == ""):
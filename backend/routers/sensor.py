@@ -1,12 +1,17 @@
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_async_db
 from models import SensorRecord, WeightRecord, Plant
+from services import latest_state
+from services.rollups import refresh_rollups
+from utils.time_utils import to_utc_naive
 
 router = APIRouter()
 
@@ -25,17 +30,115 @@ class WeightCreate(BaseModel):
     timestamp: Optional[datetime] = None
 
 
+class TelemetryCreate(BaseModel):
+    plant_id: int
+    temperature: Optional[float] = None
+    light: Optional[float] = None
+    soil_moisture: Optional[float] = None
+    weight: Optional[float] = None
+    timestamp: Optional[datetime] = None
+
+
+class TelemetryBatchCreate(BaseModel):
+    sensor: List[SensorCreate] = []
+    weight: List[WeightCreate] = []
+
+
+MAX_BATCH_SIZE = 5000  # readings per batch request (sensor + weight)
+
+
 def _validate_limit(limit: int) -> int:
     return max(1, min(limit, 100))
 
 
+def _validate_batch_size(count: int) -> None:
+    if count == 0:
+        raise HTTPException(status_code=400, detail="Batch is empty.")
+    if count > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch too large; max {MAX_BATCH_SIZE} readings per request.")
+
+
+async def _validate_plant_ids(db: AsyncSession, plant_ids: Iterable[int]) -> None:
+    """
+    Check all referenced plants with a single query instead of one SELECT per reading.
+    """
+    wanted = set(plant_ids)
+    found = set(await db.scalars(select(Plant.id).where(Plant.id.in_(wanted))))
+    missing = sorted(wanted - found)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Plants {missing} do not exist.")
+
+
+def _refresh_batch_rollups(db: Session, rows: List[dict]) -> None:
+    if not rows:
+        return
+    timestamps = [r["timestamp"] for r in rows]
+    refresh_rollups(db, min(timestamps), max(timestamps), plant_ids={r["plant_id"] for r in rows})
+
+
+def _sensor_row(record: SensorRecord) -> dict:
+    return {
+        "id": record.id,
+        "plant_id": record.plant_id,
+        "timestamp": record.timestamp,
+        "temperature": record.temperature,
+        "light": record.light,
+        "soil_moisture": record.soil_moisture,
+    }
+
+
+def _weight_row(record: WeightRecord) -> dict:
+    return {"id": record.id, "plant_id": record.plant_id, "timestamp": record.timestamp, "weight": record.weight}
+
+
+def _bulk_insert_sensor(db: Session, readings: List[SensorCreate], now: datetime) -> List[int]:
+    if not readings:
+        return []
+    rows = [
+        {
+            "plant_id": r.plant_id,
+            "temperature": r.temperature,
+            "light": r.light,
+            "soil_moisture": r.soil_moisture,
+            "timestamp": to_utc_naive(r.timestamp) or now,
+        }
+        for r in readings
+    ]
+    stmt = insert(SensorRecord).returning(SensorRecord.id, sort_by_parameter_order=True)
+    ids = list(db.scalars(stmt, rows))
+    _refresh_batch_rollups(db, rows)
+    latest_state.record_sensor_rows(db, [{**row, "id": rid} for row, rid in zip(rows, ids)])
+    return ids
+
+
+def _bulk_insert_weight(db: Session, readings: List[WeightCreate], now: datetime) -> List[int]:
+    if not readings:
+        return []
+    rows = [
+        {
+            "plant_id": r.plant_id,
+            "weight": r.weight,
+            "timestamp": to_utc_naive(r.timestamp) or now,
+        }
+        for r in readings
+    ]
+    stmt = insert(WeightRecord).returning(WeightRecord.id, sort_by_parameter_order=True)
+    ids = list(db.scalars(stmt, rows))
+    _refresh_batch_rollups(db, rows)
+    latest_state.record_weight_rows(db, [{**row, "id": rid} for row, rid in zip(rows, ids)])
+    return ids
+
+
+async def _require_plant(db: AsyncSession, plant_id: int) -> None:
+    if await db.get(Plant, plant_id) is None:
+        raise HTTPException(status_code=400, detail=f"Plant {plant_id} does not exist.")
+
+
 @router.post("/sensor")
-def create_sensor_record(payload: SensorCreate, db: Session = Depends(get_db)):
-    plant = db.query(Plant).filter(Plant.id == payload.plant_id).first()
-    if not plant:
-        raise HTTPException(status_code=400, detail=f"Plant {payload.plant_id} does not exist.")
+async def create_sensor_record(payload: SensorCreate, db: AsyncSession = Depends(get_async_db)):
+    await _require_plant(db, payload.plant_id)
 
-    ts = payload.timestamp or datetime.utcnow()
+    ts = to_utc_naive(payload.timestamp) or datetime.utcnow()
 
     record = SensorRecord(
         plant_id=payload.plant_id,
@@ -46,8 +149,10 @@ def create_sensor_record(payload: SensorCreate, db: Session = Depends(get_db)):
     )
 
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.flush()
+    await db.run_sync(refresh_rollups, ts, ts, plant_ids=[payload.plant_id])
+    await db.run_sync(latest_state.record_sensor_rows, [_sensor_row(record)])
+    await db.commit()
 
     return {
         "status": "ok",
@@ -58,12 +163,10 @@ def create_sensor_record(payload: SensorCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/weight")
-def create_weight_record(payload: WeightCreate, db: Session = Depends(get_db)):
-    plant = db.query(Plant).filter(Plant.id == payload.plant_id).first()
-    if not plant:
-        raise HTTPException(status_code=400, detail=f"Plant {payload.plant_id} does not exist.")
+async def create_weight_record(payload: WeightCreate, db: AsyncSession = Depends(get_async_db)):
+    await _require_plant(db, payload.plant_id)
 
-    ts = payload.timestamp or datetime.utcnow()
+    ts = to_utc_naive(payload.timestamp) or datetime.utcnow()
 
     record = WeightRecord(
         plant_id=payload.plant_id,
@@ -72,12 +175,110 @@ def create_weight_record(payload: WeightCreate, db: Session = Depends(get_db)):
     )
 
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.flush()
+    await db.run_sync(refresh_rollups, ts, ts, plant_ids=[payload.plant_id])
+    await db.run_sync(latest_state.record_weight_rows, [_weight_row(record)])
+    await db.commit()
 
     return {"status": "ok", "id": record.id, "timestamp": record.timestamp, "watering_detected": False}
 
 
+@router.post("/telemetry")
+async def create_telemetry_record(payload: TelemetryCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    One edge cycle in one call: sensor + weight rows share a timestamp and are committed together.
+    The weight row is skipped when no weight reading is available.
+    """
+    await _require_plant(db, payload.plant_id)
+
+    ts = to_utc_naive(payload.timestamp) or datetime.utcnow()
+
+    sensor_record = SensorRecord(
+        plant_id=payload.plant_id,
+        temperature=payload.temperature,
+        light=payload.light,
+        soil_moisture=payload.soil_moisture,
+        timestamp=ts,
+    )
+    db.add(sensor_record)
+
+    weight_record = None
+    if payload.weight is not None:
+        weight_record = WeightRecord(
+            plant_id=payload.plant_id,
+            weight=payload.weight,
+            timestamp=ts,
+        )
+        db.add(weight_record)
+
+    await db.flush()
+    sensor_id = sensor_record.id
+    weight_id = weight_record.id if weight_record else None
+    await db.run_sync(refresh_rollups, ts, ts, plant_ids=[payload.plant_id])
+    await db.run_sync(latest_state.record_sensor_rows, [_sensor_row(sensor_record)])
+    if weight_record is not None:
+        await db.run_sync(latest_state.record_weight_rows, [_weight_row(weight_record)])
+    await db.commit()
+
+    return {
+        "status": "ok",
+        "record_id": sensor_id,
+        "weight_id": weight_id,
+        "timestamp": ts,
+        "watering_detected": False,
+    }
+
+
+@router.post("/sensor/batch")
+async def create_sensor_records_batch(payload: List[SensorCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Insert many sensor readings (one or more plants) in a single multi-row INSERT and transaction.
+    """
+    _validate_batch_size(len(payload))
+    await _validate_plant_ids(db, (r.plant_id for r in payload))
+
+    record_ids = await db.run_sync(_bulk_insert_sensor, payload, datetime.utcnow())
+    await db.commit()
+
+    return {"status": "ok", "inserted": len(record_ids), "record_ids": record_ids}
+
+
+@router.post("/weight/batch")
+async def create_weight_records_batch(payload: List[WeightCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Insert many weight readings (one or more plants) in a single multi-row INSERT and transaction.
+    """
+    _validate_batch_size(len(payload))
+    await _validate_plant_ids(db, (r.plant_id for r in payload))
+
+    record_ids = await db.run_sync(_bulk_insert_weight, payload, datetime.utcnow())
+    await db.commit()
+
+    return {"status": "ok", "inserted": len(record_ids), "ids": record_ids}
+
+
+@router.post("/telemetry/batch")
+async def create_telemetry_batch(payload: TelemetryBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Combined sensor + weight backfill; both lists are written in one transaction.
+    """
+    _validate_batch_size(len(payload.sensor) + len(payload.weight))
+    await _validate_plant_ids(db, [r.plant_id for r in payload.sensor] + [r.plant_id for r in payload.weight])
+
+    now = datetime.utcnow()
+    sensor_ids = await db.run_sync(_bulk_insert_sensor, payload.sensor, now)
+    weight_ids = await db.run_sync(_bulk_insert_weight, payload.weight, now)
+    await db.commit()
+
+    return {
+        "status": "ok",
+        "sensor_inserted": len(sensor_ids),
+        "weight_inserted": len(weight_ids),
+        "sensor_record_ids": sensor_ids,
+        "weight_ids": weight_ids,
+    }
+
+
 def _soil_to_pct(raw: float | None) -> float | None:
     if raw is None:
         return None
@@ -86,15 +287,16 @@ def _soil_to_pct(raw: float | None) -> float | None:
 
 
 @router.get("/sensor/recent/soil")
-def recent_soil_moisture(plant_id: int, limit: int = 10, db: Session = Depends(get_db)):
+async def recent_soil_moisture(plant_id: int, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
     limit = _validate_limit(limit)
     rows = (
-        db.query(SensorRecord.soil_moisture, SensorRecord.timestamp)
-        .filter(SensorRecord.plant_id == plant_id)
-        .order_by(SensorRecord.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
+        await db.execute(
+            select(SensorRecord.soil_moisture, SensorRecord.timestamp)
+            .where(SensorRecord.plant_id == plant_id)
+            .order_by(SensorRecord.timestamp.desc())
+            .limit(limit)
+        )
+    ).all()
     return [
         {
             "soil_moisture_raw": r[0],
@@ -106,39 +308,42 @@ def recent_soil_moisture(plant_id: int, limit: int = 10, db: Session = Depends(g
 
 
 @router.get("/sensor/recent/temperature")
-def recent_temperature(plant_id: int, limit: int = 10, db: Session = Depends(get_db)):
+async def recent_temperature(plant_id: int, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
     limit = _validate_limit(limit)
     rows = (
-        db.query(SensorRecord.temperature, SensorRecord.timestamp)
-        .filter(SensorRecord.plant_id == plant_id)
-        .order_by(SensorRecord.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
+        await db.execute(
+            select(SensorRecord.temperature, SensorRecord.timestamp)
+            .where(SensorRecord.plant_id == plant_id)
+            .order_by(SensorRecord.timestamp.desc())
+            .limit(limit)
+        )
+    ).all()
     return [{"temperature": r[0], "timestamp": r[1]} for r in rows]
 
 
 @router.get("/sensor/recent/light")
-def recent_light(plant_id: int, limit: int = 10, db: Session = Depends(get_db)):
+async def recent_light(plant_id: int, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
     limit = _validate_limit(limit)
     rows = (
-        db.query(SensorRecord.light, SensorRecord.timestamp)
-        .filter(SensorRecord.plant_id == plant_id)
-        .order_by(SensorRecord.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
+        await db.execute(
+            select(SensorRecord.light, SensorRecord.timestamp)
+            .where(SensorRecord.plant_id == plant_id)
+            .order_by(SensorRecord.timestamp.desc())
+            .limit(limit)
+        )
+    ).all()
     return [{"light": r[0], "timestamp": r[1]} for r in rows]
 
 
 @router.get("/weight/recent")
-def recent_weight(plant_id: int, limit: int = 10, db: Session = Depends(get_db)):
+async def recent_weight(plant_id: int, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
     limit = _validate_limit(limit)
     rows = (
-        db.query(WeightRecord.weight, WeightRecord.timestamp)
-        .filter(WeightRecord.plant_id == plant_id)
-        .order_by(WeightRecord.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
+        await db.execute(
+            select(WeightRecord.weight, WeightRecord.timestamp)
+            .where(WeightRecord.plant_id == plant_id)
+            .order_by(WeightRecord.timestamp.desc())
+            .limit(limit)
+        )
+    ).all()
     return [{"weight": r[0], "timestamp": r[1]} for r in rows]
@@ -0,0 +1,279 @@
+import csv
+import io
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from external_modules.growth import features as daily_features
+from models import Plant
+from services import latest_state, response_cache
+from services.partitions import ensure_partitions
+from services.rollups import refresh_rollups
+from services.scheduler import recompute_growth_analysis
+
+try:
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pq = None
+
+SENSOR_FIELDS = ("temperature", "light", "soil_moisture")
+FIELDS = SENSOR_FIELDS + ("weight",)
+FORMATS = ("csv", "parquet")
+PARQUET_BATCH_ROWS = 50_000
+MAX_ERRORS_REPORTED = 20
+ANALYSIS_WINDOW = timedelta(days=7)  # growth analysis only looks this far back
+
+# Accepted header spellings (lower-cased), e.g. ThingsBoard exports use "Timestamp" / "ts".
+ALIASES = {
+    "plant_id": "plant_id",
+    "plant": "plant_id",
+    "timestamp": "timestamp",
+    "ts": "timestamp",
+    "time": "timestamp",
+    "temperature": "temperature",
+    "temp": "temperature",
+    "light": "light",
+    "lux": "light",
+    "soil_moisture": "soil_moisture",
+    "soil": "soil_moisture",
+    "moisture": "soil_moisture",
+    "weight": "weight",
+}
+
+# Plausible ranges; soil moisture is the raw 0 (wet) - 255 (dry) scale.
+RANGES = {
+    "temperature": (-50.0, 100.0),
+    "light": (0.0, 500_000.0),
+    "soil_moisture": (0.0, 255.0),
+    "weight": (0.0, math.inf),
+}
+
+_STAGE_DDL = """
+CREATE TEMP TABLE telemetry_import (
+    plant_id integer NOT NULL,
+    "timestamp" timestamp NOT NULL,
+    temperature double precision,
+    light double precision,
+    soil_moisture double precision,
+    weight double precision
+) ON COMMIT DROP
+"""
+
+# Skip readings already stored for (plant_id, timestamp) and duplicates within the file.
+_INSERT_SENSOR = """
+INSERT INTO sensor_records (plant_id, "timestamp", temperature, light, soil_moisture)
+SELECT DISTINCT ON (s.plant_id, s."timestamp") s.plant_id, s."timestamp", s.temperature, s.light, s.soil_moisture
+FROM telemetry_import s
+WHERE (s.temperature IS NOT NULL OR s.light IS NOT NULL OR s.soil_moisture IS NOT NULL)
+  AND NOT EXISTS (
+      SELECT 1 FROM sensor_records r WHERE r.plant_id = s.plant_id AND r."timestamp" = s."timestamp"
+  )
+ORDER BY s.plant_id, s."timestamp"
+"""
+
+_INSERT_WEIGHT = """
+INSERT INTO weight_records (plant_id, "timestamp", weight)
+SELECT DISTINCT ON (s.plant_id, s."timestamp") s.plant_id, s."timestamp", s.weight
+FROM telemetry_import s
+WHERE s.weight IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM weight_records r WHERE r.plant_id = s.plant_id AND r."timestamp" = s."timestamp"
+  )
+ORDER BY s.plant_id, s."timestamp"
+"""
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_valid = 0
+        self.errors: List[str] = []
+        self.rejected = 0
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS_REPORTED:
+            self.errors.append(f"row {line}: {reason}")
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """ISO string, datetime, or epoch seconds/milliseconds -> naive UTC."""
+    if isinstance(value, datetime):
+        ts = value
+    elif isinstance(value, (int, float)) or (isinstance(value, str) and value.strip().lstrip("-").isdigit()):
+        epoch = float(value)
+        if abs(epoch) > 1e11:  # milliseconds (ThingsBoard)
+            epoch /= 1000.0
+        return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+    else:
+        ts = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _number(field: str, value: Any) -> Optional[float]:
+    if value is None or (isinstance(value, str) and value.strip() == ""):
+        return None
+    number = float(value)
+    low, high = RANGES[field]
+    if not math.isfinite(number) or not low <= number <= high:
+        raise ValueError(f"{field}={value} outside [{low}, {high}]")
+    return number
+
+
+def validate_rows(
+    records: Iterable[Dict[str, Any]],
+    known_plants: set,
+    report: ImportReport,
+    default_plant_id: Optional[int] = None,
+) -> Iterator[tuple]:
+    """
+    Normalise header aliases, parse and range-check each record; yields
+    (plant_id, timestamp, temperature, light, soil_moisture, weight). Bad rows are
+    counted in `report` and skipped.
+    """
+    for line, record in enumerate(records, start=1):
+        report.rows_read += 1
+        row = {ALIASES[k.strip().lower()]: v for k, v in record.items() if k and k.strip().lower() in ALIASES}
+        try:
+            raw_plant = row.get("plant_id")
+            plant_id = int(raw_plant) if raw_plant not in (None, "") else default_plant_id
+            if plant_id is None:
+                raise ValueError("missing plant_id")
+            if plant_id not in known_plants:
+                raise ValueError(f"plant {plant_id} does not exist")
+            if row.get("timestamp") in (None, ""):
+                raise ValueError("missing timestamp")
+            ts = parse_timestamp(row["timestamp"])
+            values = [_number(f, row.get(f)) for f in FIELDS]
+        except (ValueError, TypeError, OverflowError) as exc:
+            report.reject(line, str(exc))
+            continue
+        if all(v is None for v in values):
+            report.reject(line, "no readings")
+            continue
+        report.rows_valid += 1
+        yield (plant_id, ts, *values)
+
+
+def read_csv(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    return csv.DictReader(stream)
+
+
+def read_parquet(source) -> Iterator[Dict[str, Any]]:
+    if pq is None:
+        raise RuntimeError("Parquet import requires pyarrow")
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        yield from batch.to_pylist()
+
+
+class _CopyStream(io.RawIOBase):
+    """File object over validated rows in COPY csv format, produced on demand."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._buffer = b""
+        self.min_ts: Optional[datetime] = None
+        self.max_ts: Optional[datetime] = None
+        self.plant_ids: set = set()
+        self.months: set = set()
+
+    def readable(self) -> bool:
+        return True
+
+    def _line(self, row: tuple) -> bytes:
+        plant_id, ts = row[0], row[1]
+        self.plant_ids.add(plant_id)
+        self.months.add(datetime(ts.year, ts.month, 1))
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+        values = ["" if v is None else repr(v) for v in row[2:]]
+        return (",".join([str(plant_id), ts.isoformat(sep=" ")] + values) + "\n").encode()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += self._line(row)
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def import_telemetry(
+    db: Session,
+    records: Iterable[Dict[str, Any]],
+    default_plant_id: Optional[int] = None,
+    recompute_analysis: bool = True,
+) -> Dict[str, Any]:
+    """
+    Bulk-load historical readings: validate -> COPY into a temp staging table ->
+    INSERT ... SELECT into sensor_records / weight_records, skipping (plant_id,
+    timestamp) pairs that are already stored. Missing monthly partitions are created,
+    rollups for the imported range and plant_latest_state are recomputed, and growth
+    analysis is re-run when the range reaches into its window. One transaction;
+    the caller commits. Note that weekly_data_cleanup still drops partitions past
+    the retention window, imported months included.
+    """
+    report = ImportReport()
+    known_plants = {pid for (pid,) in db.query(Plant.id)}
+    stream = _CopyStream(validate_rows(records, known_plants, report, default_plant_id))
+
+    db.execute(text(_STAGE_DDL))
+    # Raw psycopg2 cursor on the session's connection, so COPY joins its transaction.
+    cursor = db.connection().connection.cursor()
+    cursor.copy_expert(
+        'COPY telemetry_import (plant_id, "timestamp", temperature, light, soil_moisture, weight) '
+        "FROM STDIN WITH (FORMAT csv)",
+        stream,
+    )
+
+    result: Dict[str, Any] = {
+        "rows_read": report.rows_read,
+        "rows_valid": report.rows_valid,
+        "rows_rejected": report.rejected,
+        "errors": report.errors,
+        "sensor_inserted": 0,
+        "weight_inserted": 0,
+        "plant_ids": sorted(stream.plant_ids),
+        "start": stream.min_ts.isoformat() if stream.min_ts else None,
+        "end": stream.max_ts.isoformat() if stream.max_ts else None,
+        "partitions_created": [],
+        "analysis_recomputed": [],
+    }
+    if not report.rows_valid:
+        return result
+
+    # Only months that actually receive rows; a sparse backfill should not fan out empty partitions.
+    for month in sorted(stream.months):
+        result["partitions_created"] += ensure_partitions(db, month, month)
+    result["sensor_inserted"] = db.execute(text(_INSERT_SENSOR)).rowcount
+    result["weight_inserted"] = db.execute(text(_INSERT_WEIGHT)).rowcount
+    if not result["sensor_inserted"] and not result["weight_inserted"]:
+        return result
+
+    refresh_rollups(db, stream.min_ts, stream.max_ts, plant_ids=stream.plant_ids)
+    latest_state.refresh_latest_state(db, stream.plant_ids)
+    daily_features.invalidate(db, {plant_id: stream.min_ts for plant_id in stream.plant_ids})
+    for plant_id in stream.plant_ids:
+        response_cache.touch(db, plant_id)
+    if recompute_analysis and stream.max_ts >= datetime.utcnow() - ANALYSIS_WINDOW:
+        result["analysis_recomputed"] = recompute_growth_analysis(db, stream.plant_ids, trigger="backfill")
+    return result
+
+
+def read_upload(stream, filename: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Records from a CSV or Parquet file object; format from `fmt` or the file extension."""
+    fmt = (fmt or ("parquet" if filename.lower().endswith((".parquet", ".pq")) else "csv")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        return read_parquet(stream)
+    return read_csv(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
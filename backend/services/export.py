@@ -0,0 +1,238 @@
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select
+
+from models import SensorRecord, WeightRecord
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pa = pq = None
+
+CHUNK_ROWS = 2000  # rows fetched per server-side cursor round trip (and per output chunk)
+BATCH_ROWS = 50_000  # rows per Arrow record batch / Parquet row group
+
+# metric -> (column, CSV label, unit)
+METRICS = {
+    "temperature": (SensorRecord.temperature, "Temperature", "°C"),
+    "light": (SensorRecord.light, "Light", "lux"),
+    "soil_moisture": (SensorRecord.soil_moisture, "SoilMoisture", "raw"),
+    "weight": (WeightRecord.weight, "Weight", "g"),
+}
+FORMATS = ("csv", "ndjson")
+COLUMNAR_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def export_query(
+    plant_ids: Sequence[int],
+    metrics: Sequence[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """
+    One wide row per (plant_id, timestamp): columns plant_id, ts, then `metrics` in order.
+    Sensor and weight readings taken at the same instant (e.g. /telemetry) share a row;
+    otherwise the other table's columns are NULL. Ordered by plant, then time.
+    """
+    sensor_metrics = [m for m in metrics if m != "weight"]
+
+    def _ranged(model, q):
+        q = q.where(model.plant_id.in_(list(plant_ids)))
+        if start is not None:
+            q = q.where(model.timestamp >= start)
+        if end is not None:
+            q = q.where(model.timestamp <= end)
+        return q
+
+    sensor = weight = None
+    if sensor_metrics:
+        cols = [METRICS[m][0] for m in sensor_metrics]
+        sensor = _ranged(
+            SensorRecord,
+            select(SensorRecord.plant_id, SensorRecord.timestamp.label("ts"), *cols).where(
+                or_(*[c.isnot(None) for c in cols])
+            ),
+        ).subquery("s")
+    if "weight" in metrics:
+        weight = _ranged(
+            WeightRecord,
+            select(WeightRecord.plant_id, WeightRecord.timestamp.label("ts"), WeightRecord.weight).where(
+                WeightRecord.weight.isnot(None)
+            ),
+        ).subquery("w")
+
+    if sensor is not None and weight is not None:
+        plant_col = func.coalesce(sensor.c.plant_id, weight.c.plant_id).label("plant_id")
+        ts_col = func.coalesce(sensor.c.ts, weight.c.ts).label("ts")
+        values = [weight.c.weight if m == "weight" else sensor.c[m] for m in metrics]
+        q = select(plant_col, ts_col, *values).select_from(
+            sensor.outerjoin(
+                weight, and_(sensor.c.plant_id == weight.c.plant_id, sensor.c.ts == weight.c.ts), full=True
+            )
+        )
+    else:
+        src = sensor if sensor is not None else weight
+        q = select(src.c.plant_id, src.c.ts, *[src.c[m] for m in metrics])
+    return q.order_by("plant_id", "ts")
+
+
+def _csv_value(value) -> str:
+    return "" if value is None else str(value)
+
+
+def format_rows(rows: Iterable[Sequence], metrics: Sequence[str], fmt: str, legacy: bool) -> str:
+    """
+    Render one chunk. `legacy` keeps the original single-metric CSV layout
+    (`time,sensor_type,value,unit`, time as HH:MM) that the web UI downloads.
+    """
+    if fmt == "ndjson":
+        out = []
+        for row in rows:
+            record = {"plant_id": row[0], "timestamp": row[1].isoformat()}
+            record.update(zip(metrics, row[2:]))
+            out.append(json.dumps(record, separators=(",", ":")))
+        return "\n".join(out) + "\n" if out else ""
+    if legacy:
+        _, label, unit = METRICS[metrics[0]]
+        return "".join(f"{row[1].strftime('%H:%M')},{label},{row[2]},{unit}\n" for row in rows)
+    return "".join(
+        ",".join([str(row[0]), row[1].isoformat()] + [_csv_value(v) for v in row[2:]]) + "\n" for row in rows
+    )
+
+
+def header(metrics: Sequence[str], fmt: str, legacy: bool) -> str:
+    if fmt == "ndjson":
+        return ""
+    if legacy:
+        return "time,sensor_type,value,unit\n"
+    return ",".join(["plant_id", "timestamp"] + list(metrics)) + "\n"
+
+
+async def _open_chunks(session_factory, query, rows_per_chunk: int) -> AsyncIterator[Sequence]:
+    """
+    Open a session and a server-side cursor for `query` and fetch the first chunk
+    right away, so a failing query raises here, while the route can still answer
+    with an error status, instead of inside a response that already sent 200.
+    The returned iterator yields row chunks and closes the session at the end.
+    """
+    db = session_factory()
+    try:
+        result = await db.stream(query.execution_options(yield_per=rows_per_chunk))
+        partitions = result.partitions()
+        first = await anext(partitions, None)
+    except Exception:
+        await db.close()
+        raise
+
+    async def _chunks():
+        try:
+            if first is not None:
+                yield first
+                async for rows in partitions:
+                    yield rows
+        finally:
+            await db.close()
+
+    return _chunks()
+
+
+async def stream_export(
+    session_factory,
+    query,
+    metrics: List[str],
+    fmt: str = "csv",
+    legacy: bool = False,
+    gzip: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Stream an export_query() through a server-side cursor, CHUNK_ROWS at a time, so
+    memory stays flat however long the range. The session is opened here (not in a
+    request dependency) because the body is produced after the route has returned.
+    Awaiting this runs the query; the returned iterator produces the body.
+    """
+    chunks = await _open_chunks(session_factory, query, CHUNK_ROWS)
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip else None
+
+    def _encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    async def _body():
+        first = header(metrics, fmt, legacy)
+        if first:
+            yield _encode(first)
+        async for rows in chunks:
+            chunk = _encode(format_rows(rows, metrics, fmt, legacy))
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.flush()
+
+    return _body()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose bytes are handed out (and dropped) after each batch."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def arrow_schema(metrics: Sequence[str]):
+    return pa.schema(
+        [pa.field("plant_id", pa.int32(), nullable=False), pa.field("timestamp", pa.timestamp("us", tz="UTC"), nullable=False)]
+        + [pa.field(m, pa.float64()) for m in metrics]
+    )
+
+
+def _record_batch(rows: Sequence[Sequence], schema):
+    columns = list(zip(*rows))
+    return pa.record_batch(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+    )
+
+
+async def stream_columnar(session_factory, query, metrics: List[str], fmt: str) -> AsyncIterator[bytes]:
+    """
+    Stream an export_query() as Parquet (one zstd row group per batch) or an Arrow IPC
+    stream, BATCH_ROWS at a time from a server-side cursor. Timestamps are UTC
+    microseconds and every metric is float64, so pandas/DuckDB read it as-is.
+    Awaiting this runs the query; the returned iterator produces the body.
+    """
+    schema = arrow_schema(metrics)
+    chunks = await _open_chunks(session_factory, query, BATCH_ROWS)
+
+    async def _body():
+        sink = _DrainableSink()
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+        async for rows in chunks:
+            writer.write_batch(_record_batch(rows, schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        writer.close()
+        yield sink.drain()
+
+    return _body()
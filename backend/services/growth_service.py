@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Iterable
 
 from sqlalchemy.orm import Session
 
@@ -8,3 +8,6 @@ from external_modules.growth import analyzer
 class GrowthService:
     def analyze(self, plant_id: int, db: Session) -> Dict:
         return analyzer.analyze_growth(plant_id, db)
+
+    def analyze_many(self, plant_ids: Iterable[int], db: Session) -> Dict[int, Dict]:
+        return analyzer.analyze_growth_many(db, plant_ids)
@@ -0,0 +1,203 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from external_modules.growth import features as daily_features
+from models import AnalysisResult, ImageRecord, PlantLatestState
+from services import response_cache
+
+# group -> (timestamp column, value columns). A group only moves forward in time.
+_GROUPS = {
+    "temperature": ("temperature_at", ("temperature",)),
+    "light": ("light_at", ("light",)),
+    "soil_moisture": ("soil_moisture_at", ("soil_moisture",)),
+    "sensor": ("sensor_at", ("sensor_record_id",)),
+    "weight": ("weight_at", ("weight", "weight_record_id")),
+    "image": ("image_at", ("image_id", "image_path")),
+    "analysis": ("analysis_at", ("analysis_id",)),
+}
+
+# Rebuild from the source tables (migration backfill / repair).
+_REFRESH_SQL = """
+INSERT INTO plant_latest_state (
+    plant_id, temperature, temperature_at, light, light_at, soil_moisture, soil_moisture_at,
+    sensor_record_id, sensor_at, weight, weight_record_id, weight_at,
+    image_id, image_path, image_at, analysis_id, analysis_at, updated_at
+)
+SELECT p.id, t.temperature, t."timestamp", l.light, l."timestamp", m.soil_moisture, m."timestamp",
+       s.id, s."timestamp", w.weight, w.id, w."timestamp",
+       i.id, i.file_path, i.captured_at, a.id, a.created_at, :now
+FROM plants p
+LEFT JOIN LATERAL (
+    SELECT temperature, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id AND temperature IS NOT NULL ORDER BY "timestamp" DESC LIMIT 1
+) t ON true
+LEFT JOIN LATERAL (
+    SELECT light, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id AND light IS NOT NULL ORDER BY "timestamp" DESC LIMIT 1
+) l ON true
+LEFT JOIN LATERAL (
+    SELECT soil_moisture, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id AND soil_moisture IS NOT NULL ORDER BY "timestamp" DESC LIMIT 1
+) m ON true
+LEFT JOIN LATERAL (
+    SELECT id, "timestamp" FROM sensor_records
+    WHERE plant_id = p.id ORDER BY "timestamp" DESC LIMIT 1
+) s ON true
+LEFT JOIN LATERAL (
+    SELECT id, weight, "timestamp" FROM weight_records
+    WHERE plant_id = p.id ORDER BY "timestamp" DESC LIMIT 1
+) w ON true
+LEFT JOIN LATERAL (
+    SELECT id, file_path, captured_at FROM images
+    WHERE plant_id = p.id ORDER BY captured_at DESC LIMIT 1
+) i ON true
+LEFT JOIN LATERAL (
+    SELECT id, created_at FROM analysis_results
+    WHERE plant_id = p.id ORDER BY created_at DESC LIMIT 1
+) a ON true
+{plant_filter}
+ON CONFLICT (plant_id) DO UPDATE SET
+    temperature = EXCLUDED.temperature, temperature_at = EXCLUDED.temperature_at,
+    light = EXCLUDED.light, light_at = EXCLUDED.light_at,
+    soil_moisture = EXCLUDED.soil_moisture, soil_moisture_at = EXCLUDED.soil_moisture_at,
+    sensor_record_id = EXCLUDED.sensor_record_id, sensor_at = EXCLUDED.sensor_at,
+    weight = EXCLUDED.weight, weight_record_id = EXCLUDED.weight_record_id, weight_at = EXCLUDED.weight_at,
+    image_id = EXCLUDED.image_id, image_path = EXCLUDED.image_path, image_at = EXCLUDED.image_at,
+    analysis_id = EXCLUDED.analysis_id, analysis_at = EXCLUDED.analysis_at,
+    updated_at = EXCLUDED.updated_at
+"""
+
+Updates = Dict[str, Tuple[datetime, Dict[str, object]]]
+
+
+def _set_clauses(groups: Iterable[str]) -> List[str]:
+    sets: List[str] = []
+    for group in groups:
+        ts_col, cols = _GROUPS[group]
+        newer = f"plant_latest_state.{ts_col} IS NULL OR EXCLUDED.{ts_col} >= plant_latest_state.{ts_col}"
+        for col in cols:
+            sets.append(f"{col} = CASE WHEN {newer} THEN EXCLUDED.{col} ELSE plant_latest_state.{col} END")
+        sets.append(f"{ts_col} = GREATEST(plant_latest_state.{ts_col}, EXCLUDED.{ts_col})")
+    sets.append("updated_at = EXCLUDED.updated_at")
+    return sets
+
+
+def _upsert(db: Session, plant_id: int, updates: Updates) -> None:
+    if not updates:
+        return
+    # Every write that moves a plant's state also stales its cached read responses.
+    response_cache.touch(db, plant_id)
+    params: Dict[str, object] = {"plant_id": plant_id, "updated_at": datetime.utcnow()}
+    for group, (ts, values) in updates.items():
+        params[_GROUPS[group][0]] = ts
+        params.update(values)
+    cols = list(params)
+    db.execute(
+        text(
+            f"INSERT INTO plant_latest_state ({', '.join(cols)}) "
+            f"VALUES ({', '.join(':' + c for c in cols)}) "
+            f"ON CONFLICT (plant_id) DO UPDATE SET {', '.join(_set_clauses(updates))}"
+        ),
+        params,
+    )
+
+
+def _merge(pending: Dict[int, Updates], plant_id: int, group: str, ts: datetime, values: Dict[str, object]) -> None:
+    updates = pending.setdefault(plant_id, {})
+    current = updates.get(group)
+    if current is None or ts >= current[0]:
+        updates[group] = (ts, values)
+
+
+def _flush(db: Session, pending: Dict[int, Updates], earliest: Dict[int, datetime]) -> None:
+    # Sorted so concurrent batches lock plant rows in the same order.
+    for plant_id in sorted(pending):
+        _upsert(db, plant_id, pending[plant_id])
+    # Late rows for closed days reopen the stored daily features from that day on.
+    daily_features.invalidate(db, earliest)
+
+
+def _note_earliest(earliest: Dict[int, datetime], plant_id: int, ts: datetime) -> None:
+    if plant_id not in earliest or ts < earliest[plant_id]:
+        earliest[plant_id] = ts
+
+
+def record_sensor_rows(db: Session, rows: Iterable[dict]) -> None:
+    """
+    rows: dicts with id, plant_id, timestamp, temperature, light, soil_moisture.
+    A batch is reduced to one upsert per plant. Caller commits.
+    """
+    pending: Dict[int, Updates] = {}
+    earliest: Dict[int, datetime] = {}
+    for r in rows:
+        pid, ts = r["plant_id"], r["timestamp"]
+        _note_earliest(earliest, pid, ts)
+        _merge(pending, pid, "sensor", ts, {"sensor_record_id": r["id"]})
+        for col in ("temperature", "light", "soil_moisture"):
+            if r.get(col) is not None:
+                _merge(pending, pid, col, ts, {col: r[col]})
+    _flush(db, pending, earliest)
+
+
+def record_weight_rows(db: Session, rows: Iterable[dict]) -> None:
+    """rows: dicts with id, plant_id, timestamp, weight. Caller commits."""
+    pending: Dict[int, Updates] = {}
+    earliest: Dict[int, datetime] = {}
+    for r in rows:
+        _note_earliest(earliest, r["plant_id"], r["timestamp"])
+        _merge(pending, r["plant_id"], "weight", r["timestamp"], {"weight": r["weight"], "weight_record_id": r["id"]})
+    _flush(db, pending, earliest)
+
+
+def record_image(db: Session, image: ImageRecord) -> None:
+    _upsert(db, image.plant_id, {"image": (image.captured_at, {"image_id": image.id, "image_path": image.file_path})})
+
+
+def record_analysis(db: Session, analysis: AnalysisResult) -> None:
+    _upsert(db, analysis.plant_id, {"analysis": (analysis.created_at, {"analysis_id": analysis.id})})
+
+
+def record_analyses(db: Session, analyses: Iterable[Tuple[int, int, datetime]]) -> None:
+    """(plant_id, analysis_id, created_at) for many plants in one statement (batch analysis). Caller commits."""
+    latest: Dict[int, Tuple[int, datetime]] = {}
+    for plant_id, analysis_id, created_at in analyses:
+        if plant_id not in latest or created_at >= latest[plant_id][1]:
+            latest[plant_id] = (analysis_id, created_at)
+    if not latest:
+        return
+    plant_ids = sorted(latest)
+    for plant_id in plant_ids:
+        response_cache.touch(db, plant_id)
+    db.execute(
+        text(
+            "INSERT INTO plant_latest_state (plant_id, analysis_id, analysis_at, updated_at) "
+            "SELECT t.plant_id, t.analysis_id, t.analysis_at, :updated_at "
+            "FROM unnest(CAST(:plant_ids AS integer[]), CAST(:analysis_ids AS integer[]), "
+            "CAST(:analysis_at AS timestamp[])) AS t(plant_id, analysis_id, analysis_at) "
+            f"ON CONFLICT (plant_id) DO UPDATE SET {', '.join(_set_clauses(['analysis']))}"
+        ),
+        {
+            "plant_ids": plant_ids,
+            "analysis_ids": [latest[pid][0] for pid in plant_ids],
+            "analysis_at": [latest[pid][1] for pid in plant_ids],
+            "updated_at": datetime.utcnow(),
+        },
+    )
+
+
+def refresh_latest_state(db, plant_ids: Optional[Iterable[int]] = None) -> None:
+    """Recompute state rows from the source tables. `db` may be a Session or a Connection."""
+    params: Dict[str, object] = {"now": datetime.utcnow()}
+    plant_filter = ""
+    if plant_ids is not None:
+        params["plant_ids"] = sorted(set(plant_ids))
+        plant_filter = "WHERE p.id = ANY(:plant_ids)"
+    db.execute(text(_REFRESH_SQL.format(plant_filter=plant_filter)), params)
+
+
+def get_state(db: Session, plant_id: int) -> Optional[PlantLatestState]:
+    """Primary-key lookup; None when the plant has never reported anything."""
+    return db.get(PlantLatestState, plant_id)
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.rollups import LIGHT_MAX_GAP_MIN, floor_hour
+
+# Everything /metrics/{id} needs in one round trip: a single scan of the last 24h
+# of sensor rows (window function for light spacing, FILTER for the sub-windows),
+# plus index-only "latest"/"at or before" lookups as scalar subqueries. The 7-day
+# averages come from the hourly rollups.
+_LIVE_METRICS_SQL = text(
+    """
+    WITH win AS (
+        SELECT "timestamp" AS ts, temperature, light, soil_moisture,
+               lead("timestamp") OVER (PARTITION BY light IS NOT NULL ORDER BY "timestamp") AS next_ts
+        FROM sensor_records
+        WHERE plant_id = :plant_id AND "timestamp" >= :since_24h
+    ),
+    agg AS (
+        SELECT
+            avg(temperature) FILTER (WHERE ts >= :since_6h) AS temp_6h_avg,
+            min(temperature) AS temp_24h_min,
+            max(temperature) AS temp_24h_max,
+            min(soil_moisture) AS soil_24h_min,
+            max(soil_moisture) AS soil_24h_max,
+            avg(light) FILTER (WHERE ts >= :since_1h) AS light_1h_avg,
+            sum(
+                light * GREATEST(0.0, EXTRACT(EPOCH FROM (
+                    LEAST(COALESCE(next_ts, ts + :max_gap), ts + :max_gap, :now) - ts
+                ))) / 3600.0
+            ) FILTER (WHERE ts >= :today_start AND light IS NOT NULL) AS light_today_sum
+        FROM win
+    ),
+    latest_temp AS (
+        SELECT temperature AS value, "timestamp" AS ts FROM sensor_records
+        WHERE plant_id = :plant_id AND temperature IS NOT NULL
+        ORDER BY "timestamp" DESC LIMIT 1
+    ),
+    latest_soil AS (
+        SELECT soil_moisture AS value, "timestamp" AS ts FROM sensor_records
+        WHERE plant_id = :plant_id AND soil_moisture IS NOT NULL
+        ORDER BY "timestamp" DESC LIMIT 1
+    ),
+    latest_light AS (
+        SELECT light AS value, "timestamp" AS ts FROM sensor_records
+        WHERE plant_id = :plant_id AND light IS NOT NULL
+        ORDER BY "timestamp" DESC LIMIT 1
+    ),
+    soil_before AS (
+        SELECT soil_moisture AS value FROM sensor_records
+        WHERE plant_id = :plant_id AND soil_moisture IS NOT NULL AND "timestamp" <= :since_24h
+        ORDER BY "timestamp" DESC LIMIT 1
+    ),
+    latest_weight AS (
+        SELECT weight AS value, "timestamp" AS ts FROM weight_records
+        WHERE plant_id = :plant_id
+        ORDER BY "timestamp" DESC LIMIT 1
+    ),
+    first_weight_24h AS (
+        SELECT weight AS value, "timestamp" AS ts FROM weight_records
+        WHERE plant_id = :plant_id AND "timestamp" >= :since_24h
+        ORDER BY "timestamp" ASC LIMIT 1
+    ),
+    watering_weight AS (
+        SELECT weight AS value FROM weight_records
+        WHERE plant_id = :plant_id AND "timestamp" >= :last_watered_at
+        ORDER BY "timestamp" ASC LIMIT 1
+    ),
+    summary_7d AS (
+        SELECT
+            sum(sum) FILTER (WHERE metric = 'temperature')
+                / NULLIF(sum(count) FILTER (WHERE metric = 'temperature'), 0) AS temp_7d_avg,
+            sum(sum) FILTER (WHERE metric = 'light')
+                / NULLIF(sum(count) FILTER (WHERE metric = 'light'), 0) AS light_7d_avg,
+            sum(sum) FILTER (WHERE metric = 'soil_pct')
+                / NULLIF(sum(count) FILTER (WHERE metric = 'soil_pct'), 0) AS soil_pct_7d_avg
+        FROM sensor_rollups_hourly
+        WHERE plant_id = :plant_id AND bucket_start >= :since_7d
+    )
+    SELECT
+        agg.*,
+        summary_7d.*,
+        (SELECT value FROM latest_temp) AS temp_now,
+        (SELECT ts FROM latest_temp) AS temp_at,
+        (SELECT value FROM latest_soil) AS soil_now,
+        (SELECT ts FROM latest_soil) AS soil_at,
+        (SELECT value FROM soil_before) AS soil_24h_before,
+        (SELECT value FROM latest_light) AS light_now,
+        (SELECT ts FROM latest_light) AS light_at,
+        (SELECT value FROM latest_weight) AS weight_now,
+        (SELECT ts FROM latest_weight) AS weight_at,
+        (SELECT value FROM first_weight_24h) AS weight_first_24h,
+        (SELECT ts FROM first_weight_24h) AS weight_first_24h_at,
+        (SELECT value FROM watering_weight) AS weight_at_watering
+    FROM agg, summary_7d
+    """
+)
+
+
+def live_metrics(
+    db: Session,
+    plant_id: int,
+    now: Optional[datetime] = None,
+    last_watered_at: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Raw (unformatted) live metrics for one plant in a single query.
+    Soil values are on the raw scale (0 wet, 255 dry) except soil_pct_7d_avg (0-100);
+    light_today_sum is lux-hours integrated over the real sample spacing (gaps
+    capped like the rollups). weight_at_watering is None without `last_watered_at`.
+    """
+    now = now or datetime.utcnow()
+    params = {
+        "plant_id": plant_id,
+        "now": now,
+        "since_1h": now - timedelta(hours=1),
+        "since_6h": now - timedelta(hours=6),
+        "since_24h": now - timedelta(hours=24),
+        "since_7d": floor_hour(now - timedelta(days=7)),
+        "last_watered_at": last_watered_at,
+        "today_start": datetime.combine(now.date(), datetime.min.time()),
+        "max_gap": timedelta(minutes=LIGHT_MAX_GAP_MIN),
+    }
+    return dict(db.execute(_LIVE_METRICS_SQL, params).mappings().one())
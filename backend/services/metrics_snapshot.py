@@ -0,0 +1,157 @@
+import copy
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Plant
+from services import latest_state, metrics_engine
+
+SOIL_SCALE = 255.0  # raw scale: 0 wet, 255 dry
+SOIL_TREND_THRESHOLD_PCT = 2.0  # |24h change| below this is "stable"
+MEMO_TTL_SECONDS = 120
+
+_memo: Dict[int, tuple] = {}
+_memo_lock = threading.Lock()
+
+def iso_utc(ts: Optional[datetime]) -> Optional[str]:
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    else:
+        ts = ts.astimezone(timezone.utc)
+    return ts.isoformat()
+
+
+def soil_pct(raw: Optional[float]) -> Optional[float]:
+    if raw is None:
+        return None
+    pct = (SOIL_SCALE - raw) / SOIL_SCALE * 100.0
+    return round(max(0.0, min(100.0, pct)), 2)
+
+
+def _soil_trend(m: Dict[str, Any]) -> Optional[float]:
+    if m["soil_now"] is None or m["soil_24h_before"] is None:
+        return None
+    return round(soil_pct(m["soil_now"]) - soil_pct(m["soil_24h_before"]), 2)
+
+
+def _weight_24h(m: Dict[str, Any]):
+    if m["weight_now"] is None or m["weight_first_24h"] is None:
+        return None, None
+    diff = m["weight_now"] - m["weight_first_24h"]
+    hours_span = max(1.0, (m["weight_at"] - m["weight_first_24h_at"]).total_seconds() / 3600.0)
+    return diff, diff / hours_span
+
+
+def live_metrics_payload(m: Dict[str, Any], last_watered_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    The /metrics/{id} response built from metrics_engine.live_metrics().
+    Soil is in % (0 dry - 100 wet); the % min comes from the raw max and vice versa.
+    """
+    weight_24h_diff, water_loss_per_hour = _weight_24h(m)
+    hours_since_last_watering = None
+    weight_drop_since_last_watering = None
+    if last_watered_at is not None:
+        hours_since_last_watering = round((datetime.utcnow() - last_watered_at).total_seconds() / 3600.0, 2)
+        if m["weight_now"] is not None and m["weight_at_watering"] is not None:
+            weight_drop_since_last_watering = m["weight_now"] - m["weight_at_watering"]
+
+    ts_candidates = [m["temp_at"], m["soil_at"], m["light_at"], m["weight_at"]]
+    latest_ts = max([t for t in ts_candidates if t is not None], default=None)
+
+    return {
+        "temperature": {
+            "temp_now": m["temp_now"],
+            "temp_6h_avg": m["temp_6h_avg"],
+            "temp_24h_min": m["temp_24h_min"],
+            "temp_24h_max": m["temp_24h_max"],
+            "temp_at": iso_utc(m["temp_at"]),
+        },
+        "soil_moisture": {
+            "soil_now": soil_pct(m["soil_now"]),
+            "soil_24h_min": soil_pct(m["soil_24h_max"]),
+            "soil_24h_max": soil_pct(m["soil_24h_min"]),
+            "soil_24h_trend": _soil_trend(m),
+            "soil_at": iso_utc(m["soil_at"]),
+        },
+        "light": {
+            "light_now": m["light_now"],
+            "light_1h_avg": m["light_1h_avg"],
+            "light_today_sum": m["light_today_sum"],
+            "light_at": iso_utc(m["light_at"]),
+        },
+        "weight": {
+            "weight_now": m["weight_now"],
+            "weight_24h_diff": weight_24h_diff,
+            "water_loss_per_hour": water_loss_per_hour,
+            "hours_since_last_watering": hours_since_last_watering,
+            "weight_drop_since_last_watering": weight_drop_since_last_watering,
+            "weight_at": iso_utc(m["weight_at"]),
+        },
+        "meta": {
+            "last_sensor_timestamp": iso_utc(latest_ts),
+        },
+    }
+
+
+def _zero(value):
+    return 0 if value is None else value
+
+
+def _llm_inputs(m: Dict[str, Any], last_watered_at: Optional[datetime]) -> Dict[str, Any]:
+    live = live_metrics_payload(m, last_watered_at)
+    trend = live["soil_moisture"]["soil_24h_trend"]
+    trend_label = "stable"
+    if trend is not None and trend >= SOIL_TREND_THRESHOLD_PCT:
+        trend_label = "up"
+    elif trend is not None and trend <= -SOIL_TREND_THRESHOLD_PCT:
+        trend_label = "down"
+
+    # LLM workflow expects numbers (0 for missing) and a trend label; units match /metrics.
+    metrics_snapshot = {
+        group: {k: _zero(v) for k, v in values.items() if not k.endswith("_at")}
+        for group, values in live.items()
+        if group != "meta"
+    }
+    metrics_snapshot["soil_moisture"]["soil_24h_trend"] = trend_label
+
+    sensor_data = {
+        "temperature": _zero(m["temp_now"]),
+        "light": _zero(m["light_now"]),
+        "soil_moisture": _zero(soil_pct(m["soil_now"])),
+        "weight": _zero(m["weight_now"]),
+    }
+    sensor_summary_7d = {
+        "avg_temperature": m["temp_7d_avg"],
+        "avg_light": m["light_7d_avg"],
+        "avg_soil_moisture": m["soil_pct_7d_avg"],
+    }
+    return {
+        "metrics_snapshot": metrics_snapshot,
+        "sensor_data": sensor_data,
+        "sensor_summary_7d": sensor_summary_7d,
+    }
+
+
+def build_llm_inputs(db: Session, plant: Plant) -> Dict[str, Any]:
+    """
+    `metrics_snapshot`, `sensor_data` and `sensor_summary_7d` for the LLM / dream
+    workflows, shared by /report and the scheduler jobs.
+    Memoised per plant for MEMO_TTL_SECONDS while no newer telemetry has arrived.
+    """
+    state = latest_state.get_state(db, plant.id)
+    key = (state.sensor_at, state.weight_at, plant.last_watered_at) if state else (None, None, plant.last_watered_at)
+    with _memo_lock:
+        hit = _memo.get(plant.id)
+    if hit and hit[0] == key and time.monotonic() - hit[1] < MEMO_TTL_SECONDS:
+        return copy.deepcopy(hit[2])
+
+    m = metrics_engine.live_metrics(db, plant.id, last_watered_at=plant.last_watered_at)
+    inputs = _llm_inputs(m, plant.last_watered_at)
+    with _memo_lock:
+        _memo[plant.id] = (key, time.monotonic(), copy.deepcopy(inputs))
+    return inputs
@@ -0,0 +1,116 @@
+import re
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Monthly RANGE(timestamp) partitions created by migration 0003.
+PARTITIONED_TABLES = ("sensor_records", "weight_records")
+MONTHS_AHEAD = 2  # keep this many future months pre-created
+# ATTACH/DETACH need strong locks on the parent; give up rather than queue ingest behind us.
+DDL_LOCK_TIMEOUT = "10s"
+
+_PARTITION_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    idx = dt.year * 12 + dt.month - 1 + months
+    return datetime(idx // 12, idx % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def list_partitions(db: Session, table: str) -> List[str]:
+    rows = db.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table
+            ORDER BY c.relname
+            """
+        ),
+        {"table": table},
+    ).all()
+    return [r[0] for r in rows]
+
+
+def _create_month_partition(db: Session, table: str, month: datetime) -> None:
+    """
+    Create one monthly partition. Rows that already landed in the default
+    partition for that month are moved over before the partition is attached
+    (ATTACH fails if the default partition still holds matching rows).
+    """
+    name = partition_name(table, month)
+    lower = month.isoformat(sep=" ")
+    upper = _add_months(month, 1).isoformat(sep=" ")
+    db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    db.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {table}_default
+                WHERE "timestamp" >= :lower AND "timestamp" < :upper
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+
+
+def ensure_partitions(db: Session, start: datetime, end: datetime) -> List[str]:
+    """
+    Make sure every month in [start, end] has a partition on all telemetry tables.
+    Returns the names of partitions that were created. Caller commits.
+    """
+    created: List[str] = []
+    db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+    for table in PARTITIONED_TABLES:
+        existing = set(list_partitions(db, table))
+        month = _month_start(start)
+        while month <= end:
+            name = partition_name(table, month)
+            if name not in existing:
+                _create_month_partition(db, table, month)
+                created.append(name)
+            month = _add_months(month, 1)
+    return created
+
+
+def ensure_upcoming_partitions(db: Session, months_ahead: int = MONTHS_AHEAD) -> List[str]:
+    now = datetime.utcnow()
+    return ensure_partitions(db, now, _add_months(_month_start(now), months_ahead))
+
+
+def drop_expired_partitions(db: Session, cutoff: datetime) -> List[str]:
+    """
+    Retention by partition: detach and drop every monthly partition whose whole
+    range is older than `cutoff` (metadata-only, no row-by-row DELETE).
+    Stray rows in the default partition are deleted directly. Caller commits.
+    """
+    dropped: List[str] = []
+    db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+    for table in PARTITIONED_TABLES:
+        for name in list_partitions(db, table):
+            match = _PARTITION_RE.search(name)
+            if not match:
+                continue
+            month = datetime(int(match.group(1)), int(match.group(2)), 1)
+            if _add_months(month, 1) <= cutoff:
+                db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                db.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        db.execute(text(f'DELETE FROM {table}_default WHERE "timestamp" < :cutoff'), {"cutoff": cutoff})
+    return dropped
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_REDIS_URL,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from models import PlantLatestState
+
+try:
+    import redis  # type: ignore
+except Exception:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_TOUCHED = "response_cache_touched_plants"
+
+# Entry: {"body": str, "etag": str, "last_modified": str}. Keys embed a per-plant
+# generation; invalidating a plant bumps it, so older entries are never read again
+# and age out through TTL / LRU. Replica-served routes also key on the plant's
+# plant_latest_state.updated_at as seen by that replica: every touch() commits together
+# with a latest-state write, so a lagging replica can only fill the entry for the
+# version it actually has, never the one the bumped generation is waiting for.
+
+
+class MemoryBackend:
+    """Per-process LRU with TTL."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+
+    def generation(self, plant_id: int) -> int:
+        with self._lock:
+            return self._generations.get(plant_id, 0)
+
+    def bump(self, plant_id: int) -> None:
+        with self._lock:
+            self._generations[plant_id] = self._generations.get(plant_id, 0) + 1
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            if hit[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return hit[1]
+
+    def set(self, key: str, entry: Dict[str, str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Shared across workers/instances; invalidation is visible to all of them."""
+
+    def __init__(self, url: str, ttl: int):
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def generation(self, plant_id: int) -> int:
+        return int(self._client.get(f"rc:gen:{plant_id}") or 0)
+
+    def bump(self, plant_id: int) -> None:
+        self._client.incr(f"rc:gen:{plant_id}")
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        raw = self._client.get(f"rc:{key}")
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, entry: Dict[str, str]) -> None:
+        self._client.setex(f"rc:{key}", self.ttl, json.dumps(entry))
+
+
+def _make_backend():
+    if RESPONSE_CACHE_REDIS_URL:
+        if redis is not None:
+            return RedisBackend(RESPONSE_CACHE_REDIS_URL, RESPONSE_CACHE_TTL_SECONDS)
+        logger.warning("RESPONSE_CACHE_REDIS_URL is set but redis is not installed; using in-process cache.")
+    return MemoryBackend(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+
+
+backend = _make_backend()
+
+
+def invalidate_plant(plant_id: int) -> None:
+    try:
+        backend.bump(plant_id)
+    except Exception:
+        logger.exception("response cache: invalidation failed for plant %s", plant_id)
+
+
+def touch(db: Session, plant_id: int) -> None:
+    """Invalidate the plant's cached responses once `db` commits (nothing on rollback)."""
+    db.info.setdefault(_TOUCHED, set()).add(plant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_touched(session: Session) -> None:
+    for plant_id in session.info.pop(_TOUCHED, ()):
+        invalidate_plant(plant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched(session: Session) -> None:
+    session.info.pop(_TOUCHED, None)
+
+
+def _cache_key(plant_id: int, generation: int, request: Request, variant: str) -> str:
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{plant_id}:{generation}:{request.url.path}?{params}#{variant}"
+
+
+async def _state_version(db: AsyncSession, plant_id: int) -> str:
+    updated_at = await db.scalar(select(PlantLatestState.updated_at).where(PlantLatestState.plant_id == plant_id))
+    return updated_at.isoformat() if updated_at else ""
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as for any GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _render(entry: Dict[str, str], request: Request) -> Response:
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": entry["last_modified"],
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+async def cached_json(
+    request: Request,
+    plant_id: int,
+    build: Callable[[], Awaitable[Any]],
+    variant: str = "",
+    read_db: Optional[AsyncSession] = None,
+) -> Response:
+    """
+    JSON response for a per-plant read endpoint, cached under (plant, path, query) until
+    the plant gets new telemetry/images/analysis or the TTL runs out. `variant` separates
+    entries whose result depends on more than the request (e.g. the current window).
+    Routes on a possibly lagging replica pass their session as `read_db` so the entry is
+    keyed by the state version that session sees (one primary-key lookup per request).
+    Adds ETag and Last-Modified and answers a matching If-None-Match with 304.
+    """
+    key = None
+    entry = None
+    if RESPONSE_CACHE_ENABLED:
+        try:
+            if read_db is not None:
+                variant = f"{variant}@{await _state_version(read_db, plant_id)}"
+            key = _cache_key(plant_id, backend.generation(plant_id), request, variant)
+            entry = backend.get(key)
+        except Exception:
+            logger.exception("response cache: read failed")
+    if entry is None:
+        # Same encoding as FastAPI's JSONResponse
+        body = json.dumps(
+            jsonable_encoder(await build()), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        )
+        entry = {
+            "body": body,
+            "etag": '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"',
+            "last_modified": formatdate(usegmt=True),
+        }
+        if key is not None:
+            try:
+                backend.set(key, entry)
+            except Exception:
+                logger.exception("response cache: write failed")
+    return _render(entry, request)
@@ -0,0 +1,233 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import SensorRollupDaily, SensorRollupHourly
+
+METRICS = ("temperature", "light", "soil_moisture", "soil_pct", "weight")
+LIGHT_MAX_GAP_MIN = 30.0  # a light sample never counts for longer than this (sensor outage)
+
+# Unpivot raw rows into (plant, ts, metric, value, next_ts); next_ts is the real spacing
+# used for the lux-hours integral. The scan runs past :end by one max gap so the last
+# sample in range still sees its successor.
+_SAMPLES_CTE = """
+samples AS (
+    SELECT s.plant_id, s."timestamp" AS ts, v.metric, v.value,
+           lead(s."timestamp") OVER (PARTITION BY s.plant_id, v.metric ORDER BY s."timestamp") AS next_ts
+    FROM sensor_records s
+    CROSS JOIN LATERAL (VALUES
+        ('temperature', s.temperature),
+        ('light', s.light),
+        ('soil_moisture', s.soil_moisture),
+        ('soil_pct', GREATEST(0.0, LEAST(100.0, (255.0 - s.soil_moisture) / 255.0 * 100.0)))
+    ) AS v(metric, value)
+    WHERE s."timestamp" >= :start AND s."timestamp" < :scan_end AND v.value IS NOT NULL {sensor_filter}
+    UNION ALL
+    SELECT w.plant_id, w."timestamp", 'weight', w.weight,
+           lead(w."timestamp") OVER (PARTITION BY w.plant_id ORDER BY w."timestamp")
+    FROM weight_records w
+    WHERE w."timestamp" >= :start AND w."timestamp" < :scan_end AND w.weight IS NOT NULL {weight_filter}
+)
+"""
+
+_HOURLY_UPSERT = (
+    "WITH "
+    + _SAMPLES_CTE
+    + """
+INSERT INTO sensor_rollups_hourly
+    (plant_id, metric, bucket_start, count, sum, sum_sq, min, max,
+     first_value, first_at, last_value, last_at, integral, updated_at)
+SELECT plant_id, metric, date_trunc('hour', ts),
+       count(*), sum(value), sum(value * value), min(value), max(value),
+       (array_agg(value ORDER BY ts))[1], min(ts),
+       (array_agg(value ORDER BY ts DESC))[1], max(ts),
+       CASE WHEN metric = 'light' THEN sum(
+           value * GREATEST(0.0, EXTRACT(EPOCH FROM (
+               LEAST(COALESCE(next_ts, ts + :max_gap), ts + :max_gap, :now) - ts
+           ))) / 3600.0
+       ) END,
+       :now
+FROM samples
+WHERE ts < :end
+GROUP BY plant_id, metric, date_trunc('hour', ts)
+ON CONFLICT (plant_id, metric, bucket_start) DO UPDATE SET
+    count = EXCLUDED.count, sum = EXCLUDED.sum, sum_sq = EXCLUDED.sum_sq,
+    min = EXCLUDED.min, max = EXCLUDED.max,
+    first_value = EXCLUDED.first_value, first_at = EXCLUDED.first_at,
+    last_value = EXCLUDED.last_value, last_at = EXCLUDED.last_at,
+    integral = EXCLUDED.integral, updated_at = EXCLUDED.updated_at
+"""
+)
+
+_DAILY_UPSERT = """
+INSERT INTO sensor_rollups_daily
+    (plant_id, metric, bucket_start, count, sum, sum_sq, min, max,
+     first_value, first_at, last_value, last_at, integral, updated_at)
+SELECT plant_id, metric, date_trunc('day', bucket_start),
+       sum(count), sum(sum), sum(sum_sq), min(min), max(max),
+       (array_agg(first_value ORDER BY first_at))[1], min(first_at),
+       (array_agg(last_value ORDER BY last_at DESC))[1], max(last_at),
+       sum(integral), :now
+FROM sensor_rollups_hourly
+WHERE bucket_start >= :start AND bucket_start < :end {plant_filter}
+GROUP BY plant_id, metric, date_trunc('day', bucket_start)
+ON CONFLICT (plant_id, metric, bucket_start) DO UPDATE SET
+    count = EXCLUDED.count, sum = EXCLUDED.sum, sum_sq = EXCLUDED.sum_sq,
+    min = EXCLUDED.min, max = EXCLUDED.max,
+    first_value = EXCLUDED.first_value, first_at = EXCLUDED.first_at,
+    last_value = EXCLUDED.last_value, last_at = EXCLUDED.last_at,
+    integral = EXCLUDED.integral, updated_at = EXCLUDED.updated_at
+"""
+
+
+def floor_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def refresh_rollups(
+    db,
+    start: datetime,
+    end: datetime,
+    plant_ids: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    Recompute the hourly buckets touching [start, end] from raw rows, then the
+    daily buckets from the hourly ones. Idempotent (upsert), so it is safe to call
+    on every ingest, after backfills, or over the whole history.
+    The window starts one max gap early: a new sample is the successor of the one
+    before it, whose light integral (capped at :now until then) may sit in the
+    previous hour.
+    `db` may be a Session or a Connection; the caller commits.
+    """
+    max_gap = timedelta(minutes=LIGHT_MAX_GAP_MIN)
+    hour_start = floor_hour(start - max_gap)
+    hour_end = floor_hour(end) + timedelta(hours=1)
+    day_start = floor_day(hour_start)
+    day_end = floor_day(hour_end - timedelta(hours=1)) + timedelta(days=1)
+
+    params = {
+        "start": hour_start,
+        "end": hour_end,
+        "scan_end": hour_end + max_gap,
+        "max_gap": max_gap,
+        "now": datetime.utcnow(),
+    }
+    sensor_filter = weight_filter = plant_filter = ""
+    if plant_ids is not None:
+        params["plant_ids"] = sorted(set(plant_ids))
+        sensor_filter = "AND s.plant_id = ANY(:plant_ids)"
+        weight_filter = "AND w.plant_id = ANY(:plant_ids)"
+        plant_filter = "AND plant_id = ANY(:plant_ids)"
+
+    db.execute(text(_HOURLY_UPSERT.format(sensor_filter=sensor_filter, weight_filter=weight_filter)), params)
+    db.execute(
+        text(_DAILY_UPSERT.format(plant_filter=plant_filter)),
+        {**params, "start": day_start, "end": day_end},
+    )
+
+
+_ROW_FIELDS = (
+    "count", "sum", "sum_sq", "min", "max",
+    "first_value", "first_at", "last_value", "last_at", "integral",
+)
+
+
+def _stats(row: Dict) -> Dict[str, Optional[float]]:
+    avg = std = None
+    if row["count"]:
+        avg = row["sum"] / row["count"]
+        std = max(0.0, row["sum_sq"] / row["count"] - avg * avg) ** 0.5
+    return {
+        "count": row["count"],
+        "sum": row["sum"],
+        "avg": avg,
+        "std": std,
+        "min": row["min"],
+        "max": row["max"],
+        "first": row["first_value"],
+        "first_at": row["first_at"],
+        "last": row["last_value"],
+        "last_at": row["last_at"],
+        "integral": row["integral"],
+    }
+
+
+def _model(granularity: str):
+    if granularity == "hour":
+        return SensorRollupHourly
+    if granularity == "day":
+        return SensorRollupDaily
+    raise ValueError(f"unsupported granularity: {granularity}")
+
+
+def _fetch_buckets(db: Session, plant_id: int, start: datetime, end: datetime, granularity: str, metrics):
+    model = _model(granularity)
+    return (
+        db.query(model)
+        .filter(
+            model.plant_id == plant_id,
+            model.metric.in_(list(metrics)),
+            model.bucket_start >= start,
+            model.bucket_start < end,
+        )
+        .order_by(model.bucket_start.asc())
+        .all()
+    )
+
+
+def bucket_stats(
+    db: Session,
+    plant_id: int,
+    start: datetime,
+    end: datetime,
+    granularity: str = "hour",
+    metrics: Iterable[str] = METRICS,
+) -> Dict[Tuple[str, datetime], Dict[str, Optional[float]]]:
+    """
+    Per-bucket stats keyed by (metric, bucket_start) for buckets in [start, end).
+    """
+    rows = _fetch_buckets(db, plant_id, start, end, granularity, metrics)
+    return {(r.metric, r.bucket_start): _stats({f: getattr(r, f) for f in _ROW_FIELDS}) for r in rows}
+
+
+def window_stats(
+    db: Session,
+    plant_id: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+    granularity: str = "hour",
+    metrics: Iterable[str] = METRICS,
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Stats per metric merged over all buckets in [start, end). `start` is floored to
+    the bucket size, so "last 24h" over hourly buckets covers up to 25h.
+    """
+    metrics = list(metrics)
+    floor = floor_hour if granularity == "hour" else floor_day
+    end = end or datetime.utcnow() + timedelta(days=1)
+
+    merged: Dict[str, Dict] = {
+        m: {"count": 0, "sum": 0.0, "sum_sq": 0.0, "min": None, "max": None, "first_value": None,
+            "first_at": None, "last_value": None, "last_at": None, "integral": None}
+        for m in metrics
+    }
+    for r in _fetch_buckets(db, plant_id, floor(start), end, granularity, metrics):
+        m = merged[r.metric]
+        m["count"] += r.count
+        m["sum"] += r.sum
+        m["sum_sq"] += r.sum_sq
+        m["min"] = r.min if m["min"] is None else min(m["min"], r.min)
+        m["max"] = r.max if m["max"] is None else max(m["max"], r.max)
+        if m["first_at"] is None:
+            m["first_value"], m["first_at"] = r.first_value, r.first_at
+        m["last_value"], m["last_at"] = r.last_value, r.last_at
+        if r.integral is not None:
+            m["integral"] = (m["integral"] or 0.0) + r.integral
+
+    return {metric: _stats(merged[metric]) for metric in metrics}
@@ -1,24 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Callable
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import func
+from sqlalchemy import insert, or_
 
-from config import SUPABASE_DREAM_BUCKET
+from config import SCHEDULER_PLANT_CONCURRENCY, SUPABASE_DREAM_BUCKET
 from database import SessionLocal
 from models import (
     AnalysisResult,
     DreamImageRecord,
-    ImageRecord,
     Plant,
+    PlantLatestState,
     Alert,
     SchedulerJob,
     SchedulerJobRun,
-    SensorRecord,
-    WeightRecord,
 )
 from services.growth_service import GrowthService
 from services.llm_service import LLMService
+from services import latest_state, metrics_snapshot, rollups
+from services.partitions import drop_expired_partitions, ensure_upcoming_partitions
 from services.storage import upload_bytes
 
 scheduler = BackgroundScheduler()
@@ -43,34 +44,53 @@ JOB_METADATA = {
     },
     "weekly_data_cleanup": {
         "name": "Data cleanup task",
-        "description": "Clean sensor/weight data older than 30 days every Sunday at 02:00",
+        "description": "Drop sensor/weight partitions older than 30 days every Sunday at 02:00",
         "cron_expr": "0 2 * * 0",
     },
+    "rollup_refresh": {
+        "name": "Rollup refresh",
+        "description": "Recompute hourly/daily rollups for the last 3 hours at minute 5 of every hour",
+        "cron_expr": "5 * * * *",
+    },
+    "partition_maintenance": {
+        "name": "Partition maintenance",
+        "description": "Pre-create upcoming monthly sensor/weight partitions every day at 01:00",
+        "cron_expr": "0 1 * * *",
+    },
 }
 
 
-def _get_last_data_timestamp(db, plant_id: int) -> datetime | None:
-    last_sensor_ts = (
-        db.query(func.max(SensorRecord.timestamp))
-        .filter(SensorRecord.plant_id == plant_id)
-        .scalar()
-    )
-    last_weight_ts = (
-        db.query(func.max(WeightRecord.timestamp))
-        .filter(WeightRecord.plant_id == plant_id)
-        .scalar()
-    )
-    candidates = [ts for ts in (last_sensor_ts, last_weight_ts) if ts is not None]
-    if not candidates:
-        return None
-    return max(candidates)
+# Plants each job processes: those with a sensor / weight / image timestamp in
+# plant_latest_state newer than `days` ago on any of `sources`.
+PLANT_SELECTION = {
+    "daily_analysis": {"days": 1, "sources": ("sensor", "weight")},
+    "periodic_llm_report": {"days": 1, "sources": ("sensor", "weight")},
+    "periodic_dream_image": {"days": 1, "sources": ("sensor", "weight")},
+    "periodic_llm_and_dream": {"days": 1, "sources": ("sensor", "weight")},
+}
+
+_SOURCE_COLUMNS = {
+    "sensor": PlantLatestState.sensor_at,
+    "weight": PlantLatestState.weight_at,
+    "image": PlantLatestState.image_at,
+}
 
 
-def _has_recent_data(db, plant_id: int, days: int = 1) -> bool:
-    last_ts = _get_last_data_timestamp(db, plant_id)
-    if not last_ts:
-        return False
-    return last_ts >= datetime.utcnow() - timedelta(days=days)
+def _select_plants(db, job_key: str) -> list:
+    """
+    Plants `job_key` should process per PLANT_SELECTION, in one round trip over
+    plants joined to plant_latest_state. Rows carry the Plant and its latest
+    sensor_at / weight_at / image_at, ordered by plant id.
+    """
+    criteria = PLANT_SELECTION[job_key]
+    cutoff = datetime.utcnow() - timedelta(days=criteria["days"])
+    return (
+        db.query(Plant, PlantLatestState.sensor_at, PlantLatestState.weight_at, PlantLatestState.image_at)
+        .join(PlantLatestState, PlantLatestState.plant_id == Plant.id)
+        .filter(or_(*(_SOURCE_COLUMNS[source] >= cutoff for source in criteria["sources"])))
+        .order_by(Plant.id)
+        .all()
+    )
 
 
 def _log_job_run(job_key: str, status: str, message: str | None, started_at: datetime, finished_at: datetime | None):
@@ -105,170 +125,22 @@ def _run_single_analysis_and_optionals(
     trigger: str = "default",
 ) -> None:
     plant_id = plant.id
-    now = datetime.utcnow()
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-
-    agg = (
-        db.query(
-            func.avg(SensorRecord.temperature),
-            func.avg(SensorRecord.light),
-            func.avg(SensorRecord.soil_moisture),
-        )
-        .filter(
-            SensorRecord.plant_id == plant_id,
-            SensorRecord.timestamp >= seven_days_ago,
-        )
-        .one()
-    )
-
-    # Latest sensor & weight
-    latest_sensor = (
-        db.query(SensorRecord)
-        .filter(SensorRecord.plant_id == plant_id)
-        .order_by(SensorRecord.timestamp.desc())
-        .first()
-    )
-    latest_weight = (
-        db.query(WeightRecord)
-        .filter(WeightRecord.plant_id == plant_id)
-        .order_by(WeightRecord.timestamp.desc())
-        .first()
-    )
-    latest_image = (
-        db.query(ImageRecord)
-        .filter(ImageRecord.plant_id == plant_id)
-        .order_by(ImageRecord.captured_at.desc())
-        .first()
-    )
-
-    # Aggregations for last 24h and 6h/1h
-    since_24h = now - timedelta(hours=24)
-    since_6h = now - timedelta(hours=6)
-    since_1h = now - timedelta(hours=1)
-
-    agg_24h = (
-        db.query(
-            func.min(SensorRecord.temperature),
-            func.max(SensorRecord.temperature),
-            func.avg(SensorRecord.temperature),
-            func.min(SensorRecord.soil_moisture),
-            func.max(SensorRecord.soil_moisture),
-            func.avg(SensorRecord.light),
-            func.sum(SensorRecord.light),
-        )
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_24h)
-        .one()
-    )
-    temp_24h_min, temp_24h_max, temp_24h_avg, soil_24h_min, soil_24h_max, light_24h_avg, light_24h_sum = agg_24h
-
-    temp_6h_avg = (
-        db.query(func.avg(SensorRecord.temperature))
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_6h)
-        .scalar()
-    )
-    light_1h_avg = (
-        db.query(func.avg(SensorRecord.light))
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_1h)
-        .scalar()
-    )
-
-    # Soil trend (24h): compare earliest vs latest in window
-    soil_24h_first = (
-        db.query(SensorRecord.soil_moisture)
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_24h)
-        .order_by(SensorRecord.timestamp.asc())
-        .first()
-    )
-    soil_24h_last = (
-        db.query(SensorRecord.soil_moisture)
-        .filter(SensorRecord.plant_id == plant_id, SensorRecord.timestamp >= since_24h)
-        .order_by(SensorRecord.timestamp.desc())
-        .first()
-    )
-    soil_trend = "stable"
-    if soil_24h_first and soil_24h_last and soil_24h_first[0] is not None and soil_24h_last[0] is not None:
-        diff = soil_24h_last[0] - soil_24h_first[0]
-        if diff <= -5:
-            soil_trend = "down"
-        elif diff >= 5:
-            soil_trend = "up"
-        else:
-            soil_trend = "stable"
-
-    # Weight deltas
-    weight_24h_ref = (
-        db.query(WeightRecord)
-        .filter(WeightRecord.plant_id == plant_id, WeightRecord.timestamp <= since_24h)
-        .order_by(WeightRecord.timestamp.desc())
-        .first()
-    )
-    weight_now = latest_weight.weight if latest_weight else None
-    weight_24h_diff = None
-    water_loss_per_hour = None
-    if weight_now is not None and weight_24h_ref and weight_24h_ref.weight is not None:
-        weight_24h_diff = weight_now - weight_24h_ref.weight
-        hours = max((now - weight_24h_ref.timestamp).total_seconds() / 3600.0, 1e-3)
-        water_loss_per_hour = weight_24h_diff / hours
-
-    hours_since_last_watering = None
-    weight_drop_since_last_watering = None
-    if plant and plant.last_watered_at:
-        hours_since_last_watering = round((now - plant.last_watered_at).total_seconds() / 3600.0, 2)
-        ref_weight = (
-            db.query(WeightRecord)
-            .filter(WeightRecord.plant_id == plant_id, WeightRecord.timestamp >= plant.last_watered_at)
-            .order_by(WeightRecord.timestamp.asc())
-            .first()
-        )
-        if weight_now is not None and ref_weight and ref_weight.weight is not None:
-            weight_drop_since_last_watering = weight_now - ref_weight.weight
-
-    metrics_snapshot = {
-        "temperature": {
-            "temp_now": latest_sensor.temperature if latest_sensor else 0,
-            "temp_6h_avg": temp_6h_avg or 0,
-            "temp_24h_min": temp_24h_min or 0,
-            "temp_24h_max": temp_24h_max or 0,
-        },
-        "soil_moisture": {
-            "soil_now": latest_sensor.soil_moisture if latest_sensor else 0,
-            "soil_24h_min": soil_24h_min or 0,
-            "soil_24h_max": soil_24h_max or 0,
-            "soil_24h_trend": soil_trend,
-        },
-        "light": {
-            "light_now": latest_sensor.light if latest_sensor else 0,
-            "light_1h_avg": light_1h_avg or 0,
-            "light_today_sum": light_24h_sum or 0,
-        },
-        "weight": {
-            "weight_now": weight_now if weight_now is not None else 0,
-            "weight_24h_diff": weight_24h_diff if weight_24h_diff is not None else 0,
-            "water_loss_per_hour": water_loss_per_hour if water_loss_per_hour is not None else 0,
-            "hours_since_last_watering": hours_since_last_watering if hours_since_last_watering is not None else 0,
-            "weight_drop_since_last_watering": weight_drop_since_last_watering if weight_drop_since_last_watering is not None else 0,
-        },
-    }
-
-    sensor_data_payload = {
-        "temperature": latest_sensor.temperature if latest_sensor else 0,
-        "light": latest_sensor.light if latest_sensor else 0,
-        "soil_moisture": latest_sensor.soil_moisture if latest_sensor else 0,
-        "weight": weight_now if weight_now is not None else 0,
-    }
-
-    sensor_summary_7d = {
-        "avg_temperature": agg[0],
-        "avg_light": agg[1],
-        "avg_soil_moisture": agg[2],
-    }
+    state = latest_state.get_state(db, plant_id)
+    # Telemetry inputs are only needed by the LLM / dream workflows
+    snapshot = None
+    if include_llm or include_dream:
+        snapshot = metrics_snapshot.build_llm_inputs(db, plant)
 
     growth_result = growth_service.analyze(plant_id, db)
+    if include_llm or include_dream:
+        # End the read transaction before the slow workflow calls so the
+        # connection is not left idle in transaction; the writes below start a new one.
+        db.commit()
 
     analysis_payload = {
         "growth_status": growth_result.get("growth_status"),
         "growth_rate_3d": growth_result.get("growth_rate_3d"),
-        "sensor_summary_7d": sensor_summary_7d,
+        "sensor_summary_7d": snapshot["sensor_summary_7d"] if snapshot else None,
         "stress_factors": growth_result.get("stress_factors")
         or {
             "humidity_pressure": 0,
@@ -279,9 +151,9 @@ def _run_single_analysis_and_optionals(
         # Fields expected by LLM workflow (align with manual /report)
         "plant_id": plant_id,
         "nickname": plant.nickname or "",
-        "image_url": latest_image.file_path if latest_image else None,
-        "metrics_snapshot": metrics_snapshot,
-        "sensor_data": sensor_data_payload,
+        "image_url": state.image_path if state else None,
+        "metrics_snapshot": snapshot["metrics_snapshot"] if snapshot else None,
+        "sensor_data": snapshot["sensor_data"] if snapshot else None,
     }
 
     llm_short = None
@@ -332,6 +204,7 @@ def _run_single_analysis_and_optionals(
     )
     db.add(analysis_record)
     db.flush()
+    latest_state.record_analysis(db, analysis_record)
 
     # If plant species is empty and LLM provided plant_type, update species
     if plant_type and (plant.species is None or plant.species == ""):
@@ -354,18 +227,6 @@ def _run_single_analysis_and_optionals(
         ext = dream_result.get("ext", "png")
         description = dream_result.get("describe") or dream_result.get("description") or None
         url = dream_result.get("url")
-        latest_sensor_row = (
-            db.query(SensorRecord)
-            .filter(SensorRecord.plant_id == plant_id)
-            .order_by(SensorRecord.timestamp.desc())
-            .first()
-        )
-        latest_weight_row = (
-            db.query(WeightRecord)
-            .filter(WeightRecord.plant_id == plant_id, WeightRecord.weight.isnot(None))
-            .order_by(WeightRecord.timestamp.desc())
-            .first()
-        )
         file_path = None
         if dream_bytes:
             ts = int(datetime.utcnow().timestamp())
@@ -418,8 +279,8 @@ def _run_single_analysis_and_optionals(
             db.add(
                 DreamImageRecord(
                     plant_id=plant_id,
-                    sensor_record_id=latest_sensor_row.id if latest_sensor_row else None,
-                    weight_record_id=latest_weight_row.id if latest_weight_row else None,
+                    sensor_record_id=state.sensor_record_id if state else None,
+                    weight_record_id=state.weight_record_id if state else None,
                     file_path=file_path,
                     description=description,
                     created_at=datetime.utcnow(),
@@ -427,6 +288,91 @@ def _run_single_analysis_and_optionals(
             )
 
 
+def _run_batch_analysis(db, plant_ids, trigger: str = "scheduled") -> list[int]:
+    """
+    The non-LLM part of _run_single_analysis_and_optionals for many plants with a
+    fixed number of queries: one fleet analysis (GrowthService.analyze_many), one
+    multi-row AnalysisResult INSERT and one plant_latest_state upsert. Caller commits.
+    """
+    results = growth_service.analyze_many(plant_ids, db)
+    if not results:
+        return []
+    created_at = datetime.utcnow()
+    inserted = db.execute(
+        insert(AnalysisResult).returning(AnalysisResult.id, AnalysisResult.plant_id, sort_by_parameter_order=True),
+        [
+            {
+                "plant_id": plant_id,
+                "growth_status": result.get("growth_status"),
+                "growth_rate_3d": result.get("growth_rate_3d"),
+                "trigger": trigger,
+                "created_at": created_at,
+            }
+            for plant_id, result in results.items()
+        ],
+    ).all()
+    latest_state.record_analyses(db, [(plant_id, analysis_id, created_at) for analysis_id, plant_id in inserted])
+    return list(results)
+
+
+def _run_plant_in_session(plant_id: int, include_llm: bool, include_dream: bool, trigger: str) -> None:
+    """One plant of a fan-out job, in its own session and transaction."""
+    db = SessionLocal()
+    try:
+        plant = db.get(Plant, plant_id)
+        if plant is None:
+            return
+        _run_single_analysis_and_optionals(
+            plant=plant,
+            db=db,
+            include_llm=include_llm,
+            include_dream=include_dream,
+            trigger=trigger,
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _run_plants_concurrently(
+    job_key: str,
+    plant_ids: list[int],
+    include_llm: bool,
+    include_dream: bool,
+    trigger: str = "default",
+) -> list[str]:
+    """
+    Run _run_single_analysis_and_optionals for each plant on a pool of
+    SCHEDULER_PLANT_CONCURRENCY threads, so slow workflow calls overlap. A failing
+    plant rolls back only its own work. Returns one error message per failed plant.
+    """
+    errors = []
+    workers = max(1, min(SCHEDULER_PLANT_CONCURRENCY, len(plant_ids)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=job_key) as pool:
+        futures = {
+            pool.submit(_run_plant_in_session, plant_id, include_llm, include_dream, trigger): plant_id
+            for plant_id in plant_ids
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                errors.append(f"plant {futures[future]}: {exc}")
+    return sorted(errors)
+
+
+def _log_fan_out(job_key: str, label: str, total: int, errors: list[str], started_at: datetime) -> None:
+    if not errors:
+        _log_job_run(job_key, "success", f"{label} completed ({total} plants)", started_at, datetime.utcnow())
+        return
+    status = "failed" if len(errors) == total else "warning"
+    message = f"{label}: {len(errors)}/{total} plants failed; " + "; ".join(errors[:5])
+    _log_job_run(job_key, status, message, started_at, datetime.utcnow())
+
+
 def _wrap_job(job_key: str, fn: Callable, *args, **kwargs):
     started = datetime.utcnow()
     try:
@@ -440,24 +386,21 @@ def run_daily_analysis():
     started_at = datetime.utcnow()
     db = SessionLocal()
     try:
-        plants = db.query(Plant).all()
-        if not plants:
+        selected = _select_plants(db, "daily_analysis")
+        if not selected:
             _log_job_run("daily_analysis", "warning", "No plants to process", started_at, datetime.utcnow())
             return
 
-        for plant in plants:
-            if not _has_recent_data(db, plant.id, days=1):
-                continue
-            _run_single_analysis_and_optionals(
-                plant=plant,
-                db=db,
-                include_llm=False,
-                include_dream=False,
-                trigger="scheduled",
-            )
+        analysed = _run_batch_analysis(db, [row.Plant.id for row in selected], trigger="scheduled")
 
         db.commit()
-        _log_job_run("daily_analysis", "success", "Daily analysis completed", started_at, datetime.utcnow())
+        _log_job_run(
+            "daily_analysis",
+            "success",
+            f"Daily analysis completed ({len(analysed)} plants)",
+            started_at,
+            datetime.utcnow(),
+        )
     except Exception as exc:
         db.rollback()
         _log_job_run("daily_analysis", "failed", f"Error: {exc}", started_at, datetime.utcnow())
@@ -465,92 +408,86 @@ def run_daily_analysis():
         db.close()
 
 
+def recompute_growth_analysis(db, plant_ids, trigger: str = "backfill") -> list[int]:
+    """
+    Re-run the (non-LLM) growth analysis for plants whose recent history changed,
+    e.g. after a bulk import. Returns the plant ids analysed. Caller commits.
+    """
+    known = [pid for (pid,) in db.query(Plant.id).filter(Plant.id.in_(sorted(set(plant_ids))))]
+    return _run_batch_analysis(db, known, trigger=trigger)
+
+
 def run_periodic_llm_and_dream():
     started_at = datetime.utcnow()
     db = SessionLocal()
     try:
-        plants = db.query(Plant).all()
-        if not plants:
-            _log_job_run("periodic_llm_and_dream", "warning", "No plants to process", started_at, datetime.utcnow())
-            return
-
-        for plant in plants:
-            if not _has_recent_data(db, plant.id, days=1):
-                continue
-
-            _run_single_analysis_and_optionals(
-                plant=plant,
-                db=db,
-                include_llm=True,
-                include_dream=True,
-                trigger="scheduled",
-            )
-
-        db.commit()
-        _log_job_run("periodic_llm_and_dream", "success", "LLM+Dream pipeline completed", started_at, datetime.utcnow())
+        selected = _select_plants(db, "periodic_llm_and_dream")
     except Exception as exc:
-        db.rollback()
         _log_job_run("periodic_llm_and_dream", "failed", f"Error: {exc}", started_at, datetime.utcnow())
+        return
     finally:
         db.close()
+    if not selected:
+        _log_job_run("periodic_llm_and_dream", "warning", "No plants to process", started_at, datetime.utcnow())
+        return
+
+    plant_ids = [row.Plant.id for row in selected]
+    errors = _run_plants_concurrently(
+        "periodic_llm_and_dream",
+        plant_ids,
+        include_llm=True,
+        include_dream=True,
+        trigger="scheduled",
+    )
+    _log_fan_out("periodic_llm_and_dream", "LLM+Dream pipeline", len(plant_ids), errors, started_at)
 
 
 def run_periodic_llm_report():
     started_at = datetime.utcnow()
     db = SessionLocal()
     try:
-        plants = db.query(Plant).all()
-        if not plants:
-            _log_job_run("periodic_llm_report", "warning", "No plants to process", started_at, datetime.utcnow())
-            return
-
-        for plant in plants:
-            if not _has_recent_data(db, plant.id, days=1):
-                continue
-
-            _run_single_analysis_and_optionals(
-                plant=plant,
-                db=db,
-                include_llm=True,
-                include_dream=False,
-            )
-
-        db.commit()
-        _log_job_run("periodic_llm_report", "success", "LLM report job completed", started_at, datetime.utcnow())
+        selected = _select_plants(db, "periodic_llm_report")
     except Exception as exc:
-        db.rollback()
         _log_job_run("periodic_llm_report", "failed", f"Error: {exc}", started_at, datetime.utcnow())
+        return
     finally:
         db.close()
+    if not selected:
+        _log_job_run("periodic_llm_report", "warning", "No plants to process", started_at, datetime.utcnow())
+        return
+
+    plant_ids = [row.Plant.id for row in selected]
+    errors = _run_plants_concurrently(
+        "periodic_llm_report",
+        plant_ids,
+        include_llm=True,
+        include_dream=False,
+    )
+    _log_fan_out("periodic_llm_report", "LLM report job", len(plant_ids), errors, started_at)
 
 
 def run_periodic_dream_image():
     started_at = datetime.utcnow()
     db = SessionLocal()
     try:
-        plants = db.query(Plant).all()
-        if not plants:
-            _log_job_run("periodic_dream_image", "warning", "No plants to process", started_at, datetime.utcnow())
-            return
-
-        for plant in plants:
-            if not _has_recent_data(db, plant.id, days=1):
-                continue
-
-            _run_single_analysis_and_optionals(
-                plant=plant,
-                db=db,
-                include_llm=False,
-                include_dream=True,
-            )
-
-        db.commit()
-        _log_job_run("periodic_dream_image", "success", "Dream image job completed", started_at, datetime.utcnow())
+        selected = _select_plants(db, "periodic_dream_image")
     except Exception as exc:
-        db.rollback()
         _log_job_run("periodic_dream_image", "failed", f"Error: {exc}", started_at, datetime.utcnow())
+        return
     finally:
         db.close()
+    if not selected:
+        _log_job_run("periodic_dream_image", "warning", "No plants to process", started_at, datetime.utcnow())
+        return
+
+    plant_ids = [row.Plant.id for row in selected]
+    errors = _run_plants_concurrently(
+        "periodic_dream_image",
+        plant_ids,
+        include_llm=False,
+        include_dream=True,
+    )
+    _log_fan_out("periodic_dream_image", "Dream image job", len(plant_ids), errors, started_at)
 
 
 def run_weekly_data_cleanup(retention_days: int = 30):
@@ -558,13 +495,14 @@ def run_weekly_data_cleanup(retention_days: int = 30):
     cutoff = datetime.utcnow() - timedelta(days=retention_days)
     db = SessionLocal()
     try:
-        db.query(SensorRecord).filter(SensorRecord.timestamp < cutoff).delete(synchronize_session=False)
-        db.query(WeightRecord).filter(WeightRecord.timestamp < cutoff).delete(synchronize_session=False)
+        # Whole monthly partitions past the cutoff are detached and dropped;
+        # rows younger than the partition boundary live on until the next run.
+        dropped = drop_expired_partitions(db, cutoff)
         db.commit()
         _log_job_run(
             "weekly_data_cleanup",
             "success",
-            f"Cleaned data older than {retention_days} days",
+            f"Cleaned data older than {retention_days} days (dropped partitions: {', '.join(dropped) or 'none'})",
             started_at,
             datetime.utcnow(),
         )
@@ -575,6 +513,44 @@ def run_weekly_data_cleanup(retention_days: int = 30):
         db.close()
 
 
+def run_rollup_refresh(hours: int = 3):
+    """
+    Safety net for the ingest-time rollup refresh: recompute recent buckets for all
+    plants (covers concurrent-ingest races and rows written outside the API).
+    """
+    started_at = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        rollups.refresh_rollups(db, started_at - timedelta(hours=hours), started_at)
+        db.commit()
+        _log_job_run("rollup_refresh", "success", f"Rollups refreshed for last {hours}h", started_at, datetime.utcnow())
+    except Exception as exc:
+        db.rollback()
+        _log_job_run("rollup_refresh", "failed", f"Error: {exc}", started_at, datetime.utcnow())
+    finally:
+        db.close()
+
+
+def run_partition_maintenance():
+    started_at = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        created = ensure_upcoming_partitions(db)
+        db.commit()
+        _log_job_run(
+            "partition_maintenance",
+            "success",
+            f"Partitions created: {', '.join(created) or 'none'}",
+            started_at,
+            datetime.utcnow(),
+        )
+    except Exception as exc:
+        db.rollback()
+        _log_job_run("partition_maintenance", "failed", f"Error: {exc}", started_at, datetime.utcnow())
+    finally:
+        db.close()
+
+
 def _sync_jobs_table():
     db = SessionLocal()
     try:
@@ -641,6 +617,8 @@ def run_job_now(job_key: str):
         "periodic_llm_report": run_periodic_llm_report,
         "periodic_dream_image": run_periodic_dream_image,
         "weekly_data_cleanup": run_weekly_data_cleanup,
+        "partition_maintenance": run_partition_maintenance,
+        "rollup_refresh": run_rollup_refresh,
     }
     fn = fn_map.get(job_key)
     if fn:
@@ -680,6 +658,10 @@ def start_scheduler():
             minute=0,
             id="weekly_data_cleanup",
         )
+        scheduler.add_job(
+            run_partition_maintenance, "cron", hour=1, minute=0, id="partition_maintenance"
+        )
+        scheduler.add_job(run_rollup_refresh, "cron", minute=5, id="rollup_refresh")
 
     scheduler.start()
     _sync_jobs_table()
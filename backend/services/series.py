@@ -0,0 +1,139 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import SensorRollupDaily, SensorRollupHourly
+
+# Buckets are aligned on this origin (a midnight), so 1h/1d bins match date_trunc.
+ORIGIN = datetime(2000, 1, 1)
+AGGREGATES = ("avg", "min", "max")
+MAX_POINTS = 2000  # cap on buckets per request
+
+_BUCKET_RE = re.compile(r"^(\d+)([smhd])$")
+_BUCKET_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+# SQL expression per metric; soil_pct is the 0-100 view of the raw 0 (wet)-255 (dry) scale.
+_SENSOR_EXPR = {
+    "temperature": "temperature",
+    "light": "light",
+    "soil_moisture": "soil_moisture",
+    "soil_pct": "GREATEST(0.0, LEAST(100.0, (255.0 - soil_moisture) / 255.0 * 100.0))",
+}
+METRICS = tuple(_SENSOR_EXPR) + ("weight",)
+
+
+def parse_bucket(value: str) -> timedelta:
+    """'15m' -> timedelta(minutes=15). Units: s, m, h, d."""
+    match = _BUCKET_RE.match(value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid bucket '{value}', expected e.g. 30s, 15m, 1h, 1d")
+    return timedelta(**{_BUCKET_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def floor_bucket(ts: datetime, bucket: timedelta) -> datetime:
+    return ORIGIN + ((ts - ORIGIN) // bucket) * bucket
+
+
+def bucket_starts(start: datetime, end: datetime, bucket: timedelta) -> List[datetime]:
+    cursor = floor_bucket(start, bucket)
+    starts = []
+    while cursor < end:
+        starts.append(cursor)
+        cursor += bucket
+    return starts
+
+
+def _from_rollups(db: Session, plant_id: int, metrics, bucket: timedelta, start, end, agg: str):
+    model = SensorRollupHourly if bucket == timedelta(hours=1) else SensorRollupDaily
+    rows = (
+        db.query(model.metric, model.bucket_start, model.count, model.sum, model.min, model.max)
+        .filter(
+            model.plant_id == plant_id,
+            model.metric.in_(list(metrics)),
+            model.bucket_start >= start,
+            model.bucket_start < end,
+        )
+        .all()
+    )
+    out: Dict[str, Dict[datetime, Optional[float]]] = {m: {} for m in metrics}
+    for metric, b_start, count, total, lo, hi in rows:
+        if agg == "avg":
+            value = total / count if count else None
+        else:
+            value = lo if agg == "min" else hi
+        out[metric][b_start] = value
+    return out
+
+
+def _from_raw(db: Session, plant_id: int, metrics, bucket: timedelta, start, end, agg: str):
+    out: Dict[str, Dict[datetime, Optional[float]]] = {m: {} for m in metrics}
+    params = {"plant_id": plant_id, "bucket": bucket, "origin": ORIGIN, "start": start, "end": end}
+
+    sensor_metrics = [m for m in metrics if m in _SENSOR_EXPR]
+    if sensor_metrics:
+        cols = ", ".join(f"{agg}({_SENSOR_EXPR[m]})" for m in sensor_metrics)
+        rows = db.execute(
+            text(
+                f"""
+                SELECT date_bin(:bucket, "timestamp", :origin) AS b, {cols}
+                FROM sensor_records
+                WHERE plant_id = :plant_id AND "timestamp" >= :start AND "timestamp" < :end
+                GROUP BY b
+                """
+            ),
+            params,
+        ).all()
+        for row in rows:
+            for metric, value in zip(sensor_metrics, row[1:]):
+                if value is not None:
+                    out[metric][row[0]] = value
+
+    if "weight" in metrics:
+        rows = db.execute(
+            text(
+                f"""
+                SELECT date_bin(:bucket, "timestamp", :origin) AS b, {agg}(weight)
+                FROM weight_records
+                WHERE plant_id = :plant_id AND "timestamp" >= :start AND "timestamp" < :end
+                GROUP BY b
+                """
+            ),
+            params,
+        ).all()
+        out["weight"] = {b: value for b, value in rows}
+    return out
+
+
+def bucketed(
+    db: Session,
+    plant_id: int,
+    metrics: Iterable[str],
+    bucket: timedelta,
+    start: datetime,
+    end: datetime,
+    agg: str = "avg",
+) -> Dict[str, Dict[datetime, Optional[float]]]:
+    """
+    Aggregate each metric into fixed buckets over [floor(start), end) in the database.
+    Returns {metric: {bucket_start: value}}; empty buckets are absent.
+    1h and 1d buckets are served from the rollup tables, anything else from raw
+    rows via date_bin/GROUP BY, so the work scales with buckets, not readings.
+    """
+    metrics = list(metrics)
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        raise ValueError(f"Unsupported metric(s): {', '.join(unknown)}")
+    if agg not in AGGREGATES:
+        raise ValueError(f"Unsupported agg '{agg}', expected one of {', '.join(AGGREGATES)}")
+    start = floor_bucket(start, bucket)
+    if end <= start:
+        raise ValueError("'to' must be after 'from'")
+    if (end - start) / bucket > MAX_POINTS:
+        raise ValueError(f"Too many buckets (max {MAX_POINTS}); use a larger bucket or a shorter range")
+
+    if bucket in (timedelta(hours=1), timedelta(days=1)):
+        return _from_rollups(db, plant_id, metrics, bucket, start, end, agg)
+    return _from_raw(db, plant_id, metrics, bucket, start, end, agg)
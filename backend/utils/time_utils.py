@@ -0,0 +1,9 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def to_utc_naive(ts: Optional[datetime]) -> Optional[datetime]:
+    """Offset-aware -> naive UTC (the timestamp columns are naive UTC); naive and None pass through."""
+    if ts is not None and ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
@@ -35,21 +35,19 @@ def get_plant_id_by_nickname(nickname: str) -> Optional[int]:
 
 
 def upload_sensor_and_weight(plant_id: int, temp, light, soil, weight):
-    url_sensor = f"{BASE_URL}/sensor"
-    url_weight = f"{BASE_URL}/weight"
-    payload_sensor = {
+    """
+    Send one cycle's sensor + weight readings in a single /telemetry call;
+    the backend stores both rows with the same timestamp.
+    """
+    url = f"{BASE_URL}/telemetry"
+    payload = {
         "plant_id": plant_id,
         "temperature": temp,
         "light": light,
         "soil_moisture": soil,
-    }
-    payload_weight = {
-        "plant_id": plant_id,
         "weight": weight,
     }
-    r1 = session.post(url_sensor, json=payload_sensor, timeout=TIMEOUT)
-    r2 = session.post(url_weight, json=payload_weight, timeout=TIMEOUT)
-    return r1, r2
+    return session.post(url, json=payload, timeout=TIMEOUT)
 
 
 def upload_image_file(plant_id: int, photo_path: str):
@@ -8,6 +8,24 @@ async function fetchJson<T>(path: string): Promise<T> {
   return res.json() as Promise<T>;
 }
 
+const DREAMS_PAGE_LIMIT = 500; // backend max page size
+
+// GET /dreams/{id} is keyset-paged: follow X-Next-Before-Id until the last page.
+async function fetchAllDreams(plantId: number): Promise<DreamDto[]> {
+  const dreams: DreamDto[] = [];
+  let beforeId: string | null = null;
+  do {
+    const qs = beforeId ? `&before_id=${beforeId}` : '';
+    const res = await fetch(`${API_BASE}/dreams/${plantId}?limit=${DREAMS_PAGE_LIMIT}${qs}`);
+    if (!res.ok) {
+      throw new Error(`Request failed: ${res.status}`);
+    }
+    dreams.push(...((await res.json()) as DreamDto[]));
+    beforeId = res.headers.get('X-Next-Before-Id');
+  } while (beforeId);
+  return dreams;
+}
+
 async function fetchText(path: string): Promise<string> {
   const res = await fetch(`${API_BASE}${path}`);
   if (!res.ok) {
@@ -162,9 +180,11 @@ export type RawDataResponse = {
   sensor_type: string;
   unit: string | null;
   date?: string | null;
-  page: number;
+  page: number | null;
   page_size: number;
-  total: number;
+  total: number | null;
+  total_approximate?: boolean;
+  next_cursor?: string | null;
   records: RawDataRecord[];
 };
 
@@ -186,7 +206,7 @@ export const api = {
   getSystemOverview: () => fetchJson<SystemOverview>('/system/overview'),
   getPlants: () => fetchJson<Plant[]>('/plants'),
   getAlerts: (limit = 20) => fetchJson<AlertDto[]>(`/alerts?limit=${limit}`),
-  getDreamsByPlant: (plantId: number) => fetchJson<DreamDto[]>(`/dreams/${plantId}`),
+  getDreamsByPlant: (plantId: number) => fetchAllDreams(plantId),
   getMetrics: (plantId: number) => fetchJson<MetricsDto>(`/metrics/${plantId}`),
   getMetricsDaily7d: (plantId: number) => fetchJson<{ metrics: DailyMetric[] }>(`/metrics/${plantId}/daily-7d`),
   getMetricsHourly24h: (plantId: number) => fetchJson<{ metrics: HourlyMetric[] }>(`/metrics/${plantId}/hourly-24h`),